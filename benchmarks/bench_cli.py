@@ -0,0 +1,78 @@
+"""Cold start of komodo-cli, against a wall-clock budget
+
+Runs `komodo-cli --json list` on the simulated backend in fresh processes and
+reports the best and median wall time. Also checks that importing the
+command line does not load GTK or Adwaita. Exits with status 1 when the
+median goes over budget or a toolkit gets imported.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cli
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 10
+BUDGET_MS = 150.0
+
+TOOLKIT_CHECK = (
+    "import sys, src.cli; "
+    "print(','.join(m for m in ('gi.repository.Gtk', 'gi.repository.Adw') "
+    "if m in sys.modules))"
+)
+
+
+def run_cli(env) -> float:
+    """Milliseconds taken by one komodo-cli process"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "src.cli", "--json", "list"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as state:
+        env = dict(
+            os.environ,
+            KOMODO_BACKEND="simulated",
+            KOMODO_SIM_APS="100",
+            XDG_STATE_HOME=state,
+        )
+
+        toolkits = subprocess.run(
+            [sys.executable, "-c", TOOLKIT_CHECK],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+
+        # The first run warms the page cache and writes bytecode
+        run_cli(env)
+        times = [run_cli(env) for _ in range(RUNS)]
+
+    median = statistics.median(times)
+    print(f"best {min(times):.1f} ms, median {median:.1f} ms, budget {BUDGET_MS} ms")
+
+    failed = False
+    if median > BUDGET_MS:
+        print("OVER BUDGET")
+        failed = True
+    if toolkits:
+        print(f"komodo-cli imports {toolkits}")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
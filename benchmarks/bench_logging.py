@@ -0,0 +1,114 @@
+"""Cost of a log call on the hot path, against a per-call budget
+
+Compares the logging setup from src.utils.log with the old one, an eager
+f-string of an access point list written synchronously to a file at DEBUG.
+Exits with status 1 when a measured case goes over its budget.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_logging
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from loguru import logger
+
+from src.utils.log import LOG_FORMAT, QueueSink, RateLimiter
+
+CALLS = 20000
+
+# Microseconds allowed per call
+BUDGET_US = {
+    "debug below level": 2.0,
+    "info, queued": 60.0,
+    "info, rate limited": 20.0,
+}
+
+ACCESS_POINTS = [
+    {"ssid": f"network-{n:03d}", "bssid": f"02:00:00:00:00:{n:02X}", "strength": n}
+    for n in range(50)
+]
+
+
+def per_call_us(fn, calls=CALLS):
+    """Microseconds per call of fn, best of three runs"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def measure(directory):
+    """Run every case, returning (name, microseconds per call) pairs"""
+    results = []
+
+    # The old setup: everything at DEBUG, formatted eagerly, written in place
+    logger.remove()
+    legacy = logger.add(
+        os.path.join(directory, "legacy.log"), level="DEBUG", format=LOG_FORMAT
+    )
+    results.append(
+        (
+            "legacy eager debug",
+            per_call_us(
+                lambda: logger.debug(f"Found access points: {ACCESS_POINTS}"),
+                calls=CALLS // 10,
+            ),
+        )
+    )
+    logger.remove(legacy)
+
+    sink = QueueSink(os.path.join(directory, "komodo.log"))
+    limiter = RateLimiter(limit=CALLS * 10)
+    handler = logger.add(sink.write, level="INFO", format=LOG_FORMAT, filter=limiter)
+
+    results.append(
+        (
+            "debug below level",
+            per_call_us(lambda: logger.debug("Found access points: {}", ACCESS_POINTS)),
+        )
+    )
+    results.append(
+        ("info, queued", per_call_us(lambda: logger.info("Found {} networks", 50)))
+    )
+
+    # Same call site over and over, so nearly every record is suppressed
+    limiter.limit = 1
+    results.append(
+        (
+            "info, rate limited",
+            per_call_us(lambda: logger.info("Found {} networks", 50)),
+        )
+    )
+
+    logger.remove(handler)
+    sink.stop()
+    return results
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        results = measure(directory)
+
+    over_budget = False
+    print(f"{'case':<22} {'us/call':>9} {'budget':>8}")
+    for name, us in results:
+        budget = BUDGET_US.get(name)
+        flag = ""
+        if budget is not None and us > budget:
+            flag = "  OVER BUDGET"
+            over_budget = True
+        budget_text = f"{budget:.1f}" if budget is not None else "-"
+        print(f"{name:<22} {us:>9.2f} {budget_text:>8}{flag}")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
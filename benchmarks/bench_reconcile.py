@@ -0,0 +1,65 @@
+"""Widget allocations per NetworkList refresh: full rebuild vs keyed diffing
+
+Run from the repository root:
+
+    python -m benchmarks.bench_reconcile
+"""
+
+import random
+import time
+
+from src.utils.reconcile import OP_INSERT, diff_keyed
+
+# Gtk.ListBoxRow, Gtk.Box, Gtk.Label and Gtk.Image per network row
+WIDGETS_PER_ROW = 4
+REFRESHES = 200
+
+
+def make_refreshes(count, churn, seed=0):
+    """Build a sequence of (SSID, is active) lists changing `churn` rows each"""
+    rng = random.Random(seed)
+    names = [f"network-{index:04d}" for index in range(count)]
+    next_index = count
+    refreshes = [[(name, False) for name in sorted(names)]]
+
+    for _ in range(REFRESHES):
+        for _ in range(churn):
+            names.remove(rng.choice(names))
+            names.append(f"network-{next_index:04d}")
+            next_index += 1
+        refreshes.append([(name, False) for name in sorted(names)])
+
+    return refreshes
+
+
+def run(count, churn):
+    """Return (rebuild allocations, keyed allocations, keyed ms) per refresh"""
+    refreshes = make_refreshes(count, churn)
+    rebuild_allocations = sum(len(items) for items in refreshes[1:]) * WIDGETS_PER_ROW
+
+    keyed_allocations = 0
+    started = time.perf_counter()
+    for previous, current in zip(refreshes, refreshes[1:]):
+        ops = diff_keyed(previous, current)
+        keyed_allocations += sum(op.kind == OP_INSERT for op in ops) * WIDGETS_PER_ROW
+    elapsed = time.perf_counter() - started
+
+    return (
+        rebuild_allocations / REFRESHES,
+        keyed_allocations / REFRESHES,
+        elapsed * 1000 / REFRESHES,
+    )
+
+
+def main():
+    print(f"{'rows':>6} {'churn':>6} {'rebuild':>9} {'keyed':>7} {'diff ms':>8}")
+    for count in (10, 150, 1000):
+        for churn in (0, 1, 5):
+            rebuild, keyed, diff_ms = run(count, churn)
+            print(
+                f"{count:>6} {churn:>6} {rebuild:>9.0f} {keyed:>7.1f} {diff_ms:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
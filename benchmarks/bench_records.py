@@ -0,0 +1,57 @@
+"""Memory per access point: AccessPointRecord vs a dict with the same fields
+
+Run from the repository root:
+
+    python -m benchmarks.bench_records
+"""
+
+import tracemalloc
+
+from src.utils.access_point import AccessPointRecord
+
+FIELDS = AccessPointRecord.__slots__
+
+
+def make_fields(index, ssids):
+    """Field values for the index-th BSSID, spread over a few SSIDs"""
+    ssid, ssid_bytes = ssids[index % len(ssids)]
+    return (
+        ssid,
+        ssid_bytes,
+        f"02:10:{index >> 24 & 0xFF:02X}:{index >> 16 & 0xFF:02X}:"
+        f"{index >> 8 & 0xFF:02X}:{index & 0xFF:02X}",
+        2412 + 5 * (index % 13),
+        index % 100,
+        866000,
+        1000 + index,
+        "WPA2",
+        f"/org/freedesktop/NetworkManager/AccessPoint/{index}",
+        "wlan0",
+    )
+
+
+def measure(count, build):
+    """Bytes allocated per access point when building count of them"""
+    ssids = [(f"network-{n:04d}", f"network-{n:04d}".encode()) for n in range(64)]
+    rows = [make_fields(index, ssids) for index in range(count)]
+
+    tracemalloc.start()
+    before, _peak = tracemalloc.get_traced_memory()
+    built = [build(row) for row in rows]
+    after, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del built
+    return (after - before) / count
+
+
+def main():
+    print(f"{'APs':>6} {'record B/AP':>12} {'dict B/AP':>10}")
+    for count in (100, 1000, 5000):
+        record = measure(count, lambda row: AccessPointRecord(*row))
+        as_dict = measure(count, lambda row: dict(zip(FIELDS, row)))
+        print(f"{count:>6} {record:>12.0f} {as_dict:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
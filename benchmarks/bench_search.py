@@ -0,0 +1,84 @@
+"""Type-ahead search over the network list, against a one-frame budget
+
+Types a query into a SearchIndex of 5,000 network names one keystroke at a
+time, then deletes it again, timing each keystroke. Exits with status 1 when
+the slowest keystroke goes over the 16 ms frame budget.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search
+"""
+
+import random
+import sys
+import time
+
+from src.utils.search import SearchIndex
+
+NAMES = 5000
+BUDGET_MS = 16.0
+QUERIES = ("network-4", "Office Guest", "xyz")
+
+WORDS = (
+    "home",
+    "office",
+    "guest",
+    "cafe",
+    "library",
+    "hotspot",
+    "mesh",
+    "lab",
+    "iot",
+    "printer",
+)
+
+
+def make_names(count):
+    """Network names resembling a busy scan, deterministic"""
+    rng = random.Random(0)
+    names = set()
+    while len(names) < count:
+        style = rng.random()
+        if style < 0.5:
+            names.add(f"Network-{rng.randrange(100000):05d}")
+        elif style < 0.9:
+            names.add(
+                f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {rng.randrange(1000)}"
+            )
+        else:
+            names.add(f"café-{rng.randrange(100000)}")
+    return sorted(names)
+
+
+def keystrokes(query):
+    """Queries seen while typing query and then deleting it"""
+    typed = [query[:length] for length in range(1, len(query) + 1)]
+    return typed + list(reversed(typed[:-1])) + [""]
+
+
+def main():
+    index = SearchIndex(make_names(NAMES))
+
+    over_budget = False
+    print(f"{'query':<16} {'keystrokes':>10} {'max ms':>8} {'mean ms':>8}")
+    for query in QUERIES:
+        times = []
+        for text in keystrokes(query):
+            start = time.perf_counter()
+            index.set_query(text)
+            times.append((time.perf_counter() - start) * 1000)
+
+        flag = ""
+        if max(times) > BUDGET_MS:
+            flag = "  OVER BUDGET"
+            over_budget = True
+        print(
+            f"{query:<16} {len(times):>10} {max(times):>8.2f} "
+            f"{sum(times) / len(times):>8.2f}{flag}"
+        )
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
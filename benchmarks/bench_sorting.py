@@ -0,0 +1,115 @@
+"""Incremental sorting of the network list, against a one-frame budget
+
+Keeps 5,000 networks sorted by signal in a SortedNetworks and replays
+refreshes where every strength jitters by a few percent and a handful of
+networks change a lot, timing each refresh and counting the row moves the
+list would make. Exits with status 1 when the slowest refresh goes over the
+16 ms frame budget or jitter alone moves a row.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sorting
+"""
+
+import random
+import sys
+import time
+
+from src.utils.reconcile import diff_keyed
+from src.utils.sorting import (
+    SORT_KEYS,
+    STRENGTH_HYSTERESIS,
+    NetworkSortInfo,
+    SortedNetworks,
+)
+
+NETWORKS = 5000
+REFRESHES = 50
+BIG_CHANGES = 5
+BUDGET_MS = 16.0
+
+SECURITIES = ("WPA2", "WPA", "WEP", "Open")
+FREQUENCIES = (2412, 2437, 2462, 5180, 5500, 5745, 5975)
+
+
+def make_infos(rng):
+    """Deterministic networks, name -> NetworkSortInfo"""
+    now = int(time.time())
+    return {
+        f"Network-{index:05d}": NetworkSortInfo(
+            rng.randrange(101),
+            rng.choice(SECURITIES),
+            rng.choice(FREQUENCIES),
+            now - rng.randrange(60),
+            rng.random() < 0.1,
+            False,
+        )
+        for index in range(NETWORKS)
+    }
+
+
+def refresh(rng, infos, jitter_only):
+    """The next refresh's values, jittered and with a few big changes"""
+    jitter = STRENGTH_HYSTERESIS - 1
+    updated = {
+        name: info._replace(
+            strength=max(0, min(100, info.strength + rng.randint(-jitter, jitter)))
+        )
+        for name, info in infos.items()
+    }
+    if not jitter_only:
+        for name in rng.sample(sorted(infos), BIG_CHANGES):
+            updated[name] = updated[name]._replace(strength=rng.randrange(101))
+    return updated
+
+
+def run(sort_key, jitter_only):
+    """Slowest refresh in ms and row moves per refresh for one scenario"""
+    rng = random.Random(0)
+    base = make_infos(rng)
+    networks = SortedNetworks(sort_key)
+    for name, info in base.items():
+        networks.update(name, info)
+
+    rows = [(name, None) for name in networks]
+    times = []
+    moves = 0
+    for _ in range(REFRESHES):
+        # Jitter around the original values, as a stable signal would
+        infos = refresh(rng, base, jitter_only)
+        start = time.perf_counter()
+        for name, info in infos.items():
+            networks.update(name, info)
+        new_rows = [(name, None) for name in networks]
+        times.append((time.perf_counter() - start) * 1000)
+
+        moves += len(diff_keyed(rows, new_rows))
+        rows = new_rows
+
+    return max(times), moves / REFRESHES
+
+
+def main():
+    failed = False
+    print(f"{'sort key':<10} {'changes':<8} {'max ms':>8} {'moves':>7}")
+    for sort_key in SORT_KEYS:
+        for jitter_only in (True, False):
+            worst, moves = run(sort_key, jitter_only)
+
+            flag = ""
+            if worst > BUDGET_MS:
+                flag = "  OVER BUDGET"
+                failed = True
+            if jitter_only and moves:
+                flag += "  JITTER MOVED ROWS"
+                failed = True
+            print(
+                f"{sort_key:<10} {'jitter' if jitter_only else 'big':<8} "
+                f"{worst:>8.2f} {moves:>7.1f}{flag}"
+            )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
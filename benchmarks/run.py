@@ -0,0 +1,341 @@
+"""Benchmark suite for the scan, refresh and render paths
+
+Every scenario runs against the simulated backend at 10, 100, 1,000 and 5,000
+access points, each in a fresh process so its peak RSS is its own. For each
+run the suite reports latency percentiles, the memory allocated per call and
+peak RSS, then compares them against a JSON baseline and flags regressions.
+Scenarios that need a display are skipped when GTK cannot initialize.
+
+Run from the repository root:
+
+    python -m benchmarks.run                  # compare against the baseline
+    python -m benchmarks.run --save           # record a new baseline
+    python -m benchmarks.run --scales 10 100 --scenarios get_network_names
+
+Exits with status 1 when a regression is found.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+SCALES = (10, 100, 1000, 5000)
+ITERATIONS = 50
+WARMUP = 3
+ALLOCATION_ITERATIONS = 10
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# A metric regresses when it grows by more than this fraction of its baseline
+THRESHOLD = 0.25
+
+# ...and by more than this much, so noise on tiny numbers is not flagged
+NOISE_FLOOR = {"p50_ms": 0.05, "p95_ms": 0.1, "alloc_kib": 16, "peak_rss_mib": 2}
+
+
+# Scenarios
+#
+# Each returns (prepare, op) for a simulated world with `scale` access points.
+# prepare() runs untimed before every op() call, and may be None.
+
+
+def _setup_backend(scale):
+    from src.utils.backends import get_client, set_backend
+    from src.utils.backends.simulated import SimulatedBackend, SimulatedConfig
+
+    set_backend(SimulatedBackend(SimulatedConfig(access_points=scale, seed=0)))
+    return get_client()
+
+
+def _next_scan(client):
+    """Advance the world and drop cached results, as after a scan"""
+    from src.utils.snapshot import invalidate_snapshot
+
+    client.step()
+    invalidate_snapshot()
+
+
+def scenario_get_network_names(scale):
+    from src.utils.nmcli import get_network_names
+
+    client = _setup_backend(scale)
+    return (lambda: _next_scan(client)), get_network_names
+
+
+def scenario_get_network_names_cached(scale):
+    from src.utils.nmcli import get_network_names
+
+    _setup_backend(scale)
+    get_network_names()
+    return None, get_network_names
+
+
+def _run_coroutine(coro):
+    """Drive a coroutine that never suspends, without an event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("Coroutine suspended outside an event loop")
+
+
+def _ssid_picker(with_active):
+    """Cycle through known SSIDs, every fourth pick being the active one"""
+    from src.utils.nmcli import get_active_network, get_network_names
+
+    names = get_network_names()
+    active = get_active_network()
+    rng = random.Random(0)
+    state = {"count": 0, "ssid": None}
+
+    def pick():
+        state["count"] += 1
+        if with_active and active and state["count"] % 4 == 0:
+            state["ssid"] = active
+        else:
+            state["ssid"] = rng.choice(names)
+
+    return pick, state
+
+
+def scenario_get_network_info(scale):
+    from src.utils.nmcli import get_network_info
+
+    _setup_backend(scale)
+    pick, state = _ssid_picker(with_active=False)
+    return pick, lambda: get_network_info(state["ssid"])
+
+
+def scenario_fetch_network_info(scale):
+    from src.ui.widgets.details_box import DetailsBox
+
+    _setup_backend(scale)
+    pick, state = _ssid_picker(with_active=True)
+    return pick, lambda: _run_coroutine(DetailsBox._fetch_network_info(state["ssid"]))
+
+
+def _update_list_box_scenario(scale, list_backend):
+    from src.ui.widgets.network_list import NetworkList
+    from src.utils.nmcli import get_active_network, get_network_names
+
+    client = _setup_backend(scale)
+    network_list = NetworkList(backend=list_backend)
+    network_list.pause_monitoring()
+    state = {}
+
+    def prepare():
+        _next_scan(client)
+        state["names"] = set(get_network_names())
+        state["active"] = get_active_network()
+
+    def op():
+        network_list.update_list_box(state["names"], state["active"])
+
+    return prepare, op
+
+
+def scenario_update_list_box_listbox(scale):
+    return _update_list_box_scenario(scale, "listbox")
+
+
+def scenario_update_list_box_listview(scale):
+    return _update_list_box_scenario(scale, "listview")
+
+
+# name -> (setup, needs GTK)
+SCENARIOS = {
+    "get_network_names": (scenario_get_network_names, False),
+    "get_network_names_cached": (scenario_get_network_names_cached, False),
+    "get_network_info": (scenario_get_network_info, False),
+    "fetch_network_info": (scenario_fetch_network_info, False),
+    "update_list_box[listbox]": (scenario_update_list_box_listbox, True),
+    "update_list_box[listview]": (scenario_update_list_box_listview, True),
+}
+
+
+# Measurement, run inside a worker process
+
+
+def _gtk_available():
+    try:
+        import gi
+
+        gi.require_version("Gtk", "4.0")
+        from gi.repository import Gtk
+
+        return bool(Gtk.init_check())
+    except (ImportError, ValueError):
+        return False
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(name, scale, iterations):
+    """Run one scenario at one scale and return its metrics"""
+    from loguru import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    setup, needs_gtk = SCENARIOS[name]
+    if needs_gtk and not _gtk_available():
+        return {"skipped": "GTK could not initialize (no display?)"}
+
+    prepare, op = setup(scale)
+    prepare = prepare or (lambda: None)
+
+    for _ in range(WARMUP):
+        prepare()
+        op()
+
+    # Latency
+    samples = []
+    for _ in range(iterations):
+        prepare()
+        started = time.perf_counter()
+        op()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    # Memory allocated per call, measured separately since tracing is slow
+    allocated = []
+    tracemalloc.start()
+    for _ in range(ALLOCATION_ITERATIONS):
+        prepare()
+        before, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        op()
+        _current, peak = tracemalloc.get_traced_memory()
+        allocated.append((peak - before) / 1024)
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": _percentile(samples, 0.50),
+        "p95_ms": _percentile(samples, 0.95),
+        "p99_ms": _percentile(samples, 0.99),
+        "max_ms": max(samples),
+        "alloc_kib": sum(allocated) / len(allocated),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+# Orchestration
+
+
+def run_worker(name, scale, iterations):
+    """Measure a scenario in a fresh interpreter"""
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.run",
+        "--worker",
+        name,
+        str(scale),
+        "--iterations",
+        str(iterations),
+    ]
+    process = subprocess.run(command, capture_output=True, text=True)
+    if process.returncode != 0:
+        return {"error": process.stderr.strip().splitlines()[-1:] or ["failed"]}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def compare(result, baseline, threshold):
+    """List the metrics of result that regressed against baseline"""
+    regressions = []
+    for metric, floor in NOISE_FLOOR.items():
+        old, new = baseline.get(metric), result.get(metric)
+        if old is None or new is None:
+            continue
+        if new > old * (1 + threshold) and new - old > floor:
+            regressions.append(f"{metric} {old:.2f} -> {new:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write a new baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--worker", nargs=2, metavar=("SCENARIO", "SCALE"))
+    args = parser.parse_args()
+
+    if args.worker:
+        name, scale = args.worker
+        print(json.dumps(measure(name, int(scale), args.iterations)))
+        return 0
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressed = False
+    print(
+        f"{'scenario':<28} {'APs':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'KiB/call':>9} {'RSS MiB':>8}  status"
+    )
+
+    for name in args.scenarios:
+        for scale in args.scales:
+            key = f"{name}@{scale}"
+            result = run_worker(name, scale, args.iterations)
+            results[key] = result
+
+            if "skipped" in result or "error" in result:
+                status = result.get("skipped") or f"error: {result['error'][0]}"
+                print(
+                    f"{name:<28} {scale:>5} {'-':>8} {'-':>8} {'-':>8} "
+                    f"{'-':>9} {'-':>8}  {status}"
+                )
+                continue
+
+            if args.save:
+                status = "saved"
+            elif key not in baseline:
+                status = "new" if baseline else ""
+            else:
+                regressions = compare(result, baseline[key], args.threshold)
+                regressed = regressed or bool(regressions)
+                status = "REGRESSION " + ", ".join(regressions) if regressions else "ok"
+
+            print(
+                f"{name:<28} {scale:>5} {result['p50_ms']:>8.3f} "
+                f"{result['p95_ms']:>8.3f} {result['p99_ms']:>8.3f} "
+                f"{result['alloc_kib']:>9.1f} {result['peak_rss_mib']:>8.1f}  {status}"
+            )
+
+    if args.save:
+        # Keep the baseline for scenarios and scales not run this time
+        baseline.update(
+            (key, result)
+            for key, result in results.items()
+            if "skipped" not in result and "error" not in result
+        )
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
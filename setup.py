@@ -6,21 +6,29 @@ setup(
     author="FurthestDrop",
     description="GTK Network Manager",
     license="GPL3+",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*", "tests", "tests.*"]),
     install_requires=[
-        "pygobject",
+        "pygobject>=3.50",
         "loguru",
     ],
     entry_points={
         "gui_scripts": [
             "komodo=src.main:main",
         ],
+        "console_scripts": [
+            "komodo-cli=src.cli:main",
+            "komodo-service=src.service:main",
+        ],
     },
     data_files=[
         (
             "share/applications",
             ["data/applications/dev.furthestdrop.komodo.desktop"],
         ),
+        (
+            "share/dbus-1/services",
+            ["data/dbus-1/services/dev.furthestdrop.Komodo1.service"],
+        ),
         # (
         #     "share/icons/hicolor/scalable/apps",
         #     ["data/icons/hicolor/scalable/apps/komodo.svg"],
@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import getpass
+import json
+import sys
+
+from loguru import logger
+
+from .utils import nmcli, nmcli_async
+from .utils.connect import OUTCOME_ACTIVATED
+from .utils.log import setup_logging, shutdown_logging
+from .utils.network_model import get_network_model
+from .utils.tasks import install_event_loop
+
+# Exit status of a command that was interrupted with Ctrl+C
+EXIT_INTERRUPTED = 130
+
+
+def _print_json(value):
+    """Write one JSON document per line, flushed for readers of a pipe"""
+    print(json.dumps(value), flush=True)
+
+
+def _network_entry(records, active_ssid: str) -> dict:
+    """Describe a network by its strongest access point"""
+    record = records[0]
+    return {
+        "ssid": record.ssid,
+        "signal": record.strength,
+        "security": record.security,
+        "bssid": record.bssid,
+        "frequency": record.frequency,
+        "channel": record.channel,
+        "access_points": len(records),
+        "is_active": record.ssid == active_ssid,
+    }
+
+
+def _result_entry(result) -> dict:
+    """Describe a ConnectResult"""
+    return {
+        "ssid": result.ssid,
+        "outcome": result.outcome,
+        "reason": result.reason,
+        "total": round(result.total, 3),
+        "stages": [[stage, round(seconds, 3)] for stage, seconds in result.stages],
+    }
+
+
+def _read_password(args):
+    """Build the credentials provider for connect"""
+
+    def ask_password(ssid, callback):
+        if args.password_stdin:
+            password = sys.stdin.readline().rstrip("\n")
+        elif sys.stdin.isatty():
+            password = getpass.getpass(f"Password for {ssid}: ")
+        else:
+            logger.error(f"{ssid} needs a password, pass it with --password-stdin")
+            password = None
+        callback(password or None)
+
+    return ask_password
+
+
+# Commands
+
+
+async def cmd_list(args) -> int:
+    """List the visible networks, strongest first"""
+    if args.rescan:
+        await nmcli_async.request_network_scan()
+
+    snapshot = nmcli.get_scan_snapshot()
+    networks = sorted(
+        (
+            _network_entry(records, snapshot.active_ssid)
+            for records in snapshot.by_ssid.values()
+        ),
+        key=lambda network: network["signal"],
+        reverse=True,
+    )
+
+    if args.json:
+        _print_json(networks)
+        return 0
+
+    print(f"  {'SSID':<32} {'SIGNAL':>6} {'SECURITY':<8} {'CHANNEL':>7}")
+    for network in networks:
+        print(
+            f"{'*' if network['is_active'] else ' '} {network['ssid']:<32} "
+            f"{network['signal']:>5}% {network['security']:<8} "
+            f"{network['channel']:>7}"
+        )
+    return 0
+
+
+async def cmd_info(args) -> int:
+    """Show the details of a network, the active one by default"""
+    ssid = args.ssid or nmcli.get_active_network()
+    if not ssid:
+        logger.error("Not connected to any network")
+        return 1
+
+    info = nmcli.get_network_info(ssid)
+    if not info:
+        return 1
+    if info["device"]:
+        info.update(nmcli.get_device_info(info["device"]))
+
+    if args.json:
+        _print_json(info)
+    else:
+        for key, value in info.items():
+            print(f"{key + ':':<15} {value}")
+    return 0
+
+
+async def cmd_connect(args) -> int:
+    """Connect to a network and wait until it is up or the attempt ends"""
+
+    def on_stage(stage):
+        if args.json:
+            _print_json({"ssid": args.ssid, "stage": stage})
+        else:
+            print(f"{args.ssid}: {stage}", file=sys.stderr, flush=True)
+
+    result = await nmcli_async.connect_to_network(
+        args.ssid, on_stage=on_stage, ask_password=_read_password(args)
+    )
+    if result is None:
+        return 1
+
+    if args.json:
+        _print_json(_result_entry(result))
+    elif result.outcome == OUTCOME_ACTIVATED:
+        print(f"Connected to {result.ssid} in {result.total:.1f}s")
+    else:
+        print(f"Could not connect to {result.ssid}: {result.reason}")
+    return 0 if result.outcome == OUTCOME_ACTIVATED else 1
+
+
+async def cmd_disconnect(args) -> int:
+    """Disconnect from a network, the active one by default"""
+    ssid = args.ssid or nmcli.get_active_network()
+    if not ssid:
+        logger.error("Not connected to any network")
+        return 1
+
+    ok = await nmcli_async.disconnect_from_network(ssid)
+    if args.json:
+        _print_json({"ssid": ssid, "disconnected": ok})
+    elif ok:
+        print(f"Disconnected from {ssid}")
+    return 0 if ok else 1
+
+
+def cmd_watch(args) -> int:
+    """Print the visible networks, then every change, until interrupted"""
+    for delta in get_network_model().watch():
+        if args.json:
+            _print_json(delta._asdict())
+        else:
+            print(
+                f"{delta.kind:<8} {delta.ssid} {delta.strength}%"
+                f"{' (active)' if delta.is_active else ''}",
+                flush=True,
+            )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="komodo-cli",
+        description="Manage Wi-Fi networks through NetworkManager, without a GUI",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print JSON, or one JSON object per line for streams",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="list the visible networks")
+    list_parser.add_argument(
+        "--rescan", action="store_true", help="scan and wait for fresh results"
+    )
+    list_parser.set_defaults(run=cmd_list)
+
+    info_parser = commands.add_parser("info", help="show the details of a network")
+    info_parser.add_argument(
+        "ssid", nargs="?", help="network, the active one if omitted"
+    )
+    info_parser.set_defaults(run=cmd_info)
+
+    connect_parser = commands.add_parser("connect", help="connect to a network")
+    connect_parser.add_argument("ssid", help="network to connect to")
+    connect_parser.add_argument(
+        "--password-stdin",
+        action="store_true",
+        help="read the password of a new network from the first line of stdin",
+    )
+    connect_parser.set_defaults(run=cmd_connect)
+
+    disconnect_parser = commands.add_parser(
+        "disconnect", help="disconnect from a network"
+    )
+    disconnect_parser.add_argument(
+        "ssid", nargs="?", help="network, the active one if omitted"
+    )
+    disconnect_parser.set_defaults(run=cmd_disconnect)
+
+    watch_parser = commands.add_parser(
+        "watch", help="print network changes as they happen"
+    )
+    watch_parser.set_defaults(run=cmd_watch)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    """Command-line entry point"""
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    logger.debug("Entered cli main() with command: {}", args.command)
+
+    try:
+        if not asyncio.iscoroutinefunction(args.run):
+            return args.run(args)
+
+        # libnm callbacks are dispatched while asyncio waits
+        if not install_event_loop():
+            logger.error("komodo-cli needs PyGObject 3.50 or newer")
+            return 1
+        return asyncio.run(args.run(args))
+
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        logger.exception(f"Unhandled exception in {args.command}: {e}")
+        return 1
+    finally:
+        logger.debug("Exiting cli main()")
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,13 @@ import sys
 import gi
 from loguru import logger
 from .ui import Window
+from .utils.backends import request_client
+from .utils.connections import get_connection_index
+from .utils.log import setup_logging, shutdown_logging
+from .utils.metrics import get_main_loop_probe
+from .utils.remote import request_service
+from .utils.startup import mark
+from .utils.tasks import install_event_loop
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -11,15 +18,6 @@ gi.require_version("Adw", "1")
 gi.require_version("NM", "1.0")
 from gi.repository import Adw, Gio, Gtk  # noqa: E402
 
-# Configure loguru
-logger.add(
-    "Komodo.log",
-    rotation="10 MB",
-    retention="30 days",
-    level="DEBUG",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {module}:{function}:{line} | {message}",
-)
-
 
 class Application(Gtk.Application):
     """Main application class"""
@@ -43,9 +41,21 @@ class Application(Gtk.Application):
         """Create and present the main application window"""
         logger.debug("Entered Application.do_activate()")
         try:
+            # Connect to NetworkManager while the window is being built
+            logger.info("Requesting NetworkManager client")
+            request_client(self.on_client_ready)
+
+            # Look up the shared service meanwhile, without blocking
+            request_service(self.on_service_ready)
+
+            # Register the main loop, thread and task metrics; the diagnostics
+            # page runs the probe while it is shown
+            get_main_loop_probe()
+
             logger.info("Activating main window")
             window = Window(self)
             window.present()
+            mark("window presented")
             logger.debug("Main window presented")
         except Exception as e:
             logger.exception(f"Exception during main window activation: {e}")
@@ -53,9 +63,24 @@ class Application(Gtk.Application):
         finally:
             logger.debug("Exiting Application.do_activate()")
 
+    def on_client_ready(self, client):
+        """Record when NetworkManager's state became available"""
+        if client is None:
+            mark("client failed")
+            return
+        mark("client ready")
+
+        # Index saved profiles on the main thread, before anyone connects
+        get_connection_index()
+
+    def on_service_ready(self, connection):
+        """Record when it was known whether the shared service is used"""
+        mark("service found" if connection else "no service")
+
 
 def main():
     """Application entry point"""
+    setup_logging()
     logger.debug("Entered main()")
     try:
         logger.info("Starting application")
@@ -64,16 +89,20 @@ def main():
         Adw.init()
         logger.debug("Adwaita initialized")
 
+        # Run asyncio tasks on the application's main loop
+        install_event_loop()
+
         # Create and run application
         app = Application()
         result = app.run(sys.argv)
-        logger.info(f"Application exited with code {result}")
+        logger.info("Application exited with code {}", result)
         return result
     except Exception as e:
         logger.exception(f"Unhandled exception in main: {e}")
         return 1
     finally:
         logger.debug("Exiting main()")
+        shutdown_logging()
 
 
 if __name__ == "__main__":
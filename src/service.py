@@ -0,0 +1,209 @@
+import signal
+import sys
+
+from gi.repository import Gio, GLib
+from loguru import logger
+
+from .utils import nmcli
+from .utils.log import setup_logging, shutdown_logging
+from .utils.metrics import get_metrics
+from .utils.network_model import get_network_model
+from .utils.remote import (
+    BUS_NAME,
+    ERROR_PREFIX,
+    INTERFACE_NAME,
+    OBJECT_PATH,
+    get_interface_info,
+)
+from .utils.scan import get_scan_scheduler
+
+
+def _info_to_variant(info: dict) -> GLib.Variant:
+    """Pack a get_network_info() result as a{sv}, leaving out unset values"""
+    values = {}
+    for key, value in info.items():
+        if value is None:
+            continue
+        elif isinstance(value, bool):
+            values[key] = GLib.Variant("b", value)
+        elif isinstance(value, int):
+            values[key] = GLib.Variant("x", value)
+        elif isinstance(value, dict):
+            values[key] = GLib.Variant("a{sx}", value)
+        else:
+            values[key] = GLib.Variant("s", str(value))
+    return GLib.Variant("(a{sv})", (values,))
+
+
+class KomodoService:
+    """Publishes the network model and scan scheduler on D-Bus
+
+    One service per session owns the NetworkModel and ScanScheduler, so
+    every front-end following it shares a single set of libnm signals and
+    one coalescing, rate-limited scan loop. Model deltas are re-emitted as
+    NetworksChanged and scan outcomes as ScanFinished.
+
+    Must be used from the main thread.
+    """
+
+    def __init__(self, connection: Gio.DBusConnection):
+        logger.debug("Initializing KomodoService")
+        self.connection = connection
+        self.model = get_network_model()
+        self.scheduler = get_scan_scheduler()
+
+        self._methods = {
+            "GetNetworks": self._get_networks,
+            "GetActiveNetwork": self._get_active_network,
+            "GetNetworkInfo": self._get_network_info,
+            "RequestScan": self._request_scan,
+        }
+
+        self._registration_id = connection.register_object(
+            OBJECT_PATH, get_interface_info(), self._on_method_call, None, None
+        )
+        self._model_subscription = self.model.subscribe(self._on_network_deltas)
+        self._scan_subscription = self.scheduler.subscribe(self._on_scan_result)
+        logger.info("Komodo service registered at {}", OBJECT_PATH)
+
+    def close(self):
+        """Stop publishing"""
+        logger.debug("Closing KomodoService")
+        self.model.unsubscribe(self._model_subscription)
+        self.scheduler.unsubscribe(self._scan_subscription)
+        if self._registration_id:
+            self.connection.unregister_object(self._registration_id)
+            self._registration_id = 0
+
+    # Methods
+
+    def _on_method_call(
+        self,
+        connection,
+        sender,
+        object_path,
+        interface_name,
+        method_name,
+        parameters,
+        invocation,
+    ):
+        logger.debug("{} called {}", sender, method_name)
+        get_metrics().counter(f"service.calls.{method_name}").inc()
+
+        try:
+            invocation.return_value(self._methods[method_name](*parameters.unpack()))
+        except Exception as e:
+            logger.exception(f"Error handling {method_name} from {sender}: {e}")
+            invocation.return_dbus_error(f"{ERROR_PREFIX}.Failed", str(e))
+
+    def _get_networks(self) -> GLib.Variant:
+        return GLib.Variant(
+            "(a(syb))",
+            (
+                [
+                    (entry.ssid, entry.strength, entry.is_active)
+                    for entry in self.model.get_networks()
+                ],
+            ),
+        )
+
+    def _get_active_network(self) -> GLib.Variant:
+        return GLib.Variant("(s)", (self.model.get_active_network(),))
+
+    def _get_network_info(self, ssid: str) -> GLib.Variant:
+        return _info_to_variant(nmcli.get_network_info(ssid))
+
+    def _request_scan(self) -> GLib.Variant:
+        devices = self.scheduler.request_scan()
+        return GLib.Variant("(ub)", (devices, self.scheduler.is_scanning()))
+
+    # Signals
+
+    def _on_network_deltas(self, deltas):
+        self.connection.emit_signal(
+            None,
+            OBJECT_PATH,
+            INTERFACE_NAME,
+            "NetworksChanged",
+            GLib.Variant(
+                "(a(ssyb))",
+                (
+                    [
+                        (delta.kind, delta.ssid, delta.strength, delta.is_active)
+                        for delta in deltas
+                    ],
+                ),
+            ),
+        )
+
+    def _on_scan_result(self, result):
+        self.connection.emit_signal(
+            None,
+            OBJECT_PATH,
+            INTERFACE_NAME,
+            "ScanFinished",
+            GLib.Variant(
+                "(sbdb)",
+                (
+                    result.iface,
+                    result.ok,
+                    result.latency if result.latency is not None else -1.0,
+                    self.scheduler.is_scanning(),
+                ),
+            ),
+        )
+
+
+def main() -> int:
+    """Service entry point, run on the session bus or by D-Bus activation"""
+    setup_logging()
+    logger.debug("Entered service main()")
+    loop = GLib.MainLoop()
+    service = None
+    status = 0
+
+    def on_bus_acquired(connection, name):
+        nonlocal service
+        service = KomodoService(connection)
+
+    def on_name_acquired(connection, name):
+        logger.info("Komodo service owns {}", name)
+
+    def on_name_lost(connection, name):
+        nonlocal status
+        logger.error(f"Could not own {name} on the session bus, is it running?")
+        status = 1
+        loop.quit()
+
+    def on_signal():
+        logger.info("Komodo service stopping")
+        loop.quit()
+        return False
+
+    owner_id = Gio.bus_own_name(
+        Gio.BusType.SESSION,
+        BUS_NAME,
+        Gio.BusNameOwnerFlags.NONE,
+        on_bus_acquired,
+        on_name_acquired,
+        on_name_lost,
+    )
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signum, on_signal)
+
+    try:
+        loop.run()
+        return status
+    except Exception as e:
+        logger.exception(f"Unhandled exception in service: {e}")
+        return 1
+    finally:
+        Gio.bus_unown_name(owner_id)
+        if service is not None:
+            service.close()
+        logger.debug("Exiting service main()")
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,157 @@
 import gi
+from loguru import logger
+
+from ...utils.metrics import (
+    PROBE_INTERVAL_SECONDS,
+    get_main_loop_probe,
+    get_metrics,
+)
+from ...utils.refresh import get_refresh_scheduler
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
-from gi.repository import Gtk  # noqa: E402
+from gi.repository import Gdk, Gtk  # noqa: E402
+
+# How often the metrics table is redrawn while the page is shown
+REFRESH_SECONDS = 2
+
+
+def _format_seconds(seconds):
+    """Format a latency for the metrics table"""
+    if seconds is None:
+        return "-"
+    if seconds < 0.001:
+        return f"{seconds * 1e6:.0f}µs"
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def format_metrics(registry) -> str:
+    """Lay the metrics out as a fixed-width table"""
+    lines = [f"{'metric':<40} {'count':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+    for metric in registry.get_metrics():
+        if metric.kind == "histogram":
+            values = metric.to_dict()
+            lines.append(
+                f"{metric.name:<40} {values['count']:>8} "
+                f"{_format_seconds(values['p50']):>9} "
+                f"{_format_seconds(values['p95']):>9} "
+                f"{_format_seconds(values['p99']):>9} "
+                f"{_format_seconds(values['max']):>9}"
+            )
+        else:
+            lines.append(f"{metric.name:<40} {metric.value:>8}")
+    return "\n".join(lines)
 
 
 class AdvancedPage(Gtk.Box):
-    """Advanced network management page (currently just a placeholder)"""
+    """Diagnostics page showing Komodo's own metrics"""
 
     def __init__(self):
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
         self.setup_layout()
+        self.setup_signals()
 
     def setup_layout(self):
         # Configure base layout
-        self.set_spacing(0)
-        self.set_homogeneous(True)
+        self.set_spacing(5)
+        self.set_margin_top(20)
+        self.set_margin_bottom(20)
+        self.set_margin_start(20)
+        self.set_margin_end(20)
+        self.set_homogeneous(False)
+
+        # Create header box
+        self.header_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        self.header_box.set_spacing(5)
+
+        self.header_label = Gtk.Label()
+        self.header_label.set_markup("<span size='x-large'>Diagnostics</span>")
+        self.header_label.set_halign(Gtk.Align.START)
+        self.header_label.set_hexpand(True)
+        self.header_box.append(self.header_label)
+
+        # Create copy and export buttons
+        self.copy_button = Gtk.Button.new_from_icon_name("edit-copy-symbolic")
+        self.copy_button.set_tooltip_text("Copy Metrics as JSON")
+        self.copy_button.add_css_class("flat")
+        self.header_box.append(self.copy_button)
+
+        self.export_button = Gtk.Button.new_from_icon_name("document-save-symbolic")
+        self.export_button.set_tooltip_text("Export Metrics as JSON")
+        self.export_button.add_css_class("flat")
+        self.header_box.append(self.export_button)
+
+        # Create metrics table
+        self.metrics_label = Gtk.Label()
+        self.metrics_label.set_halign(Gtk.Align.START)
+        self.metrics_label.set_valign(Gtk.Align.START)
+        self.metrics_label.set_selectable(True)
+        self.metrics_label.add_css_class("monospace")
+        self.metrics_label.set_margin_top(10)
+        self.metrics_label.set_margin_bottom(10)
+        self.metrics_label.set_margin_start(10)
+        self.metrics_label.set_margin_end(10)
+
+        self.scrolled_window = Gtk.ScrolledWindow()
+        self.scrolled_window.set_policy(
+            Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC
+        )
+        self.scrolled_window.set_vexpand(True)
+        self.scrolled_window.add_css_class("card")
+        self.scrolled_window.set_child(self.metrics_label)
+
+        # Create status label for exports
+        self.status_label = Gtk.Label()
+        self.status_label.set_halign(Gtk.Align.START)
+        self.status_label.set_selectable(True)
+        self.status_label.add_css_class("dim-label")
+
+        self.append(self.header_box)
+        self.append(self.scrolled_window)
+        self.append(self.status_label)
+
+    def setup_signals(self):
+        """Connect widget signals"""
+        self.copy_button.connect("clicked", self.on_copy_button_clicked)
+        self.export_button.connect("clicked", self.on_export_button_clicked)
+        self.connect("map", self.on_map)
+
+        # Refresh the table only while the page is shown
+        scheduler = get_refresh_scheduler()
+        self.refresh_job = scheduler.add(
+            "advanced.metrics", self.refresh_metrics, REFRESH_SECONDS, backoff=False
+        )
+        scheduler.bind_widget(self.refresh_job, self)
+
+        # Measure the main loop backlog only while its numbers can be seen
+        self.probe_job = scheduler.add(
+            "mainloop.probe",
+            get_main_loop_probe().probe,
+            PROBE_INTERVAL_SECONDS,
+            backoff=False,
+        )
+        scheduler.bind_widget(self.probe_job, self)
+
+    def on_map(self, widget):
+        """Show current metrics as soon as the page is shown"""
+        self.refresh_metrics()
+
+    def refresh_metrics(self):
+        """Redraw the metrics table"""
+        self.metrics_label.set_text(format_metrics(get_metrics()))
+
+    def on_copy_button_clicked(self, button):
+        """Copy the metrics to the clipboard as JSON"""
+        Gdk.Display.get_default().get_clipboard().set(get_metrics().to_json())
+        self.status_label.set_text("Metrics copied to the clipboard")
 
-        # Create placeholder label
-        label = Gtk.Label(label="Use the terminal you moron.")
-        self.append(label)
+    def on_export_button_clicked(self, button):
+        """Write the metrics to a JSON file in the state directory"""
+        try:
+            path = get_metrics().export()
+            self.status_label.set_text(f"Metrics exported to {path}")
+        except OSError as e:
+            logger.exception(f"Error exporting metrics: {e}")
+            self.status_label.set_text(f"Could not export metrics: {e.strerror}")
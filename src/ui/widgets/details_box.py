@@ -1,10 +1,25 @@
+import time
+
 import gi
-import threading
-from ...utils.nmcli import get_network_info, get_device_info
+from ...utils.metrics import get_metrics
+from ...utils.nmcli import get_scan_snapshot
+from ...utils.nmcli_async import get_network_info, get_device_info
+from ...utils.refresh import get_refresh_scheduler
+from ...utils.signal_history import get_signal_history
+from ...utils.tasks import get_tasks
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
-from gi.repository import Gtk, GLib  # noqa: E402
+from gi.repository import GLib, Gtk  # noqa: E402
+
+# Time span shown by the signal sparkline and summarized below it
+HISTORY_WINDOW_SECONDS = 10 * 60
+
+# How often the sparkline and its summary are redrawn while shown
+HISTORY_REFRESH_SECONDS = 2
+
+# Selection must rest this long on a row before its details are fetched
+DETAILS_DEBOUNCE_MS = 120
 
 
 class DetailsBox(Gtk.Box):
@@ -12,6 +27,13 @@ class DetailsBox(Gtk.Box):
 
     def __init__(self):
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
+
+        # Details fetched for the current scan generation, by SSID
+        self.details_cache = {}
+        self.details_generation = None
+        self.debounce_source_id = None
+        self.shown_info = None
+
         self.setup_layout()
         self.create_labels()
 
@@ -58,6 +80,8 @@ class DetailsBox(Gtk.Box):
         self.ssid_label = Gtk.Label()
         self.signal_label = Gtk.Label()
         self.security_label = Gtk.Label()
+        self.bssid_label = Gtk.Label()
+        self.channel_label = Gtk.Label()
         self.ipv4_label = Gtk.Label()
         self.ipv6_label = Gtk.Label()
         self.mac_label = Gtk.Label()
@@ -67,6 +91,8 @@ class DetailsBox(Gtk.Box):
             self.ssid_label,
             self.signal_label,
             self.security_label,
+            self.bssid_label,
+            self.channel_label,
             self.ipv4_label,
             self.ipv6_label,
             self.mac_label,
@@ -78,60 +104,154 @@ class DetailsBox(Gtk.Box):
             label.set_margin_bottom(10)
             self.info_box.append(label)
 
+        # Create signal history summary and sparkline below the strength
+        self.history_bssid = None
+
+        # Redraw the history while a network is shown
+        refresh_scheduler = get_refresh_scheduler()
+        self.history_job = refresh_scheduler.add(
+            "details.history",
+            self.refresh_signal_history,
+            HISTORY_REFRESH_SECONDS,
+            backoff=False,
+        )
+        refresh_scheduler.set_enabled(self.history_job, False)
+        refresh_scheduler.bind_widget(self.history_job, self)
+
+        self.history_label = Gtk.Label()
+        self.history_label.set_halign(Gtk.Align.START)
+        self.history_label.set_margin_start(10)
+        self.history_label.set_margin_end(10)
+        self.history_label.add_css_class("dim-label")
+
+        self.sparkline = Gtk.DrawingArea()
+        self.sparkline.set_content_height(32)
+        self.sparkline.set_margin_start(10)
+        self.sparkline.set_margin_end(10)
+        self.sparkline.set_draw_func(self.draw_sparkline)
+
+        self.history_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self.history_box.set_spacing(5)
+        self.history_box.append(self.sparkline)
+        self.history_box.append(self.history_label)
+        self.info_box.insert_child_after(self.history_box, self.signal_label)
+
     def update_network_info(self, ssid):
-        """Update network information display"""
+        """Update network information display
+
+        Details already fetched for the current scan generation are shown at
+        once. Otherwise the fetch waits DETAILS_DEBOUNCE_MS, so arrowing
+        through the list only fetches the row it stops on, and a newer
+        selection cancels both the wait and any fetch in progress.
+        """
+        if self.debounce_source_id is not None:
+            GLib.source_remove(self.debounce_source_id)
+            self.debounce_source_id = None
+
         if not ssid:
+            get_tasks().cancel("network-details")
             self.clear_info()
             return
 
-        # Start a new thread to fetch network information
-        threading.Thread(
-            target=self._fetch_network_info, args=(ssid,), daemon=True
-        ).start()
-
-    def _fetch_network_info(self, ssid):
-        """Fetch network information in background thread"""
-        try:
-            info = get_network_info(ssid)
-
-            # Update basic information in main thread
-            GLib.idle_add(self.ssid_label.set_markup, f"<b>SSID:</b> {ssid}")
-            GLib.idle_add(
-                self.signal_label.set_markup,
-                f"<b>Signal Strength:</b> {info['signal']}%",
-            )
-            GLib.idle_add(
-                self.security_label.set_markup, f"<b>Security:</b> {info['security']}"
-            )
-
-            # If active connection, get more details
-            if info["is_active"] and info["device"]:
-                self._fetch_device_info(info["device"])
-            else:
-                self._show_disconnected_info()
-
-        except Exception:
-            # Update UI in main thread
-            GLib.idle_add(self.clear_info)
+        generation = get_scan_snapshot().generation
+        if generation != self.details_generation:
+            self.details_generation = generation
+            self.details_cache.clear()
 
-    def _fetch_device_info(self, device):
-        """Fetch and update device-specific information"""
-        info = get_device_info(device)
+        info = self.details_cache.get(ssid)
+        if info is not None:
+            get_metrics().counter("details.cache_hits").inc()
+            get_tasks().cancel("network-details")
+            self._show_network_info(info)
+            return
 
-        # Update UI in main thread
-        GLib.idle_add(
-            self.ipv4_label.set_markup, f"<b>IPv4 Address:</b> {info['ipv4']}"
+        get_metrics().counter("details.cache_misses").inc()
+        self.debounce_source_id = GLib.timeout_add(
+            DETAILS_DEBOUNCE_MS, self._on_debounce_timeout, ssid, generation
         )
-        GLib.idle_add(
-            self.ipv6_label.set_markup, f"<b>IPv6 Address:</b> {info['ipv6']}"
+
+    def _on_debounce_timeout(self, ssid, generation):
+        """Fetch the details of the row the selection settled on"""
+        self.debounce_source_id = None
+        get_tasks().spawn(
+            "network-details",
+            self._fetch_network_info(ssid),
+            callback=lambda info: self._on_network_info_fetched(ssid, generation, info),
         )
-        GLib.idle_add(self.mac_label.set_markup, f"<b>MAC Address:</b> {info['mac']}")
+        return False
+
+    @staticmethod
+    async def _fetch_network_info(ssid):
+        """Fetch network information on the main loop"""
+        info = await get_network_info(ssid)
+        if not info:
+            return None
+
+        # If active connection, get more details
+        if info["is_active"] and info["device"]:
+            info.update(await get_device_info(info["device"]))
+
+        return info
+
+    def _on_network_info_fetched(self, ssid, generation, info):
+        """Remember a fetched result for its scan generation and show it"""
+        if info and generation == self.details_generation:
+            self.details_cache[ssid] = info
+        self._show_network_info(info)
+
+    def _show_network_info(self, info):
+        """Update all labels from a fetched result in one pass"""
+        if not info:
+            self.clear_info()
+            return
 
-    def _show_disconnected_info(self):
-        """Show disconnected state in UI"""
-        GLib.idle_add(self.ipv4_label.set_markup, "<b>IPv4 Address:</b> Not connected")
-        GLib.idle_add(self.ipv6_label.set_markup, "<b>IPv6 Address:</b> Not connected")
-        GLib.idle_add(self.mac_label.set_markup, "<b>MAC Address:</b> N/A")
+        if info == self.shown_info:
+            return
+        self.shown_info = info
+
+        ssid = GLib.markup_escape_text(info["ssid"])
+        markups = [
+            (self.ssid_label, f"<b>SSID:</b> {ssid}"),
+            (self.signal_label, f"<b>Signal Strength:</b> {info['signal']}%"),
+            (self.security_label, f"<b>Security:</b> {info['security']}"),
+            (
+                self.bssid_label,
+                f"<b>BSSID:</b> {info['bssid']} "
+                f"({info['access_points']} access point"
+                f"{'s' if info['access_points'] != 1 else ''})",
+            ),
+            (
+                self.channel_label,
+                f"<b>Channel:</b> {info['channel']} ({info['frequency']} MHz, "
+                f"up to {info['bitrate'] // 1000} Mb/s)",
+            ),
+        ]
+
+        if info["is_active"] and info["device"]:
+            ipv4 = info.get("ipv4", "Not connected")
+            ipv6 = info.get("ipv6", "Not connected")
+            markups += [
+                (self.ipv4_label, f"<b>IPv4 Address:</b> {ipv4}"),
+                (self.ipv6_label, f"<b>IPv6 Address:</b> {ipv6}"),
+                (self.mac_label, f"<b>MAC Address:</b> {info.get('mac', 'N/A')}"),
+            ]
+        else:
+            markups += self._disconnected_markups()
+
+        # Only touch labels whose text changed
+        for label, markup in markups:
+            if label.get_label() != markup:
+                label.set_markup(markup)
+
+        self.show_signal_history(info["bssid"])
+
+    def _disconnected_markups(self):
+        """Label markup for the addresses of a network not connected"""
+        return [
+            (self.ipv4_label, "<b>IPv4 Address:</b> Not connected"),
+            (self.ipv6_label, "<b>IPv6 Address:</b> Not connected"),
+            (self.mac_label, "<b>MAC Address:</b> N/A"),
+        ]
 
     def clear_info(self):
         """Clear all network information labels"""
@@ -139,8 +259,68 @@ class DetailsBox(Gtk.Box):
             self.ssid_label,
             self.signal_label,
             self.security_label,
+            self.bssid_label,
+            self.channel_label,
             self.ipv4_label,
             self.ipv6_label,
             self.mac_label,
         ]:
             label.set_text("")
+
+        self.shown_info = None
+        self.show_signal_history(None)
+
+    def show_signal_history(self, bssid):
+        """Follow the strength history of a BSSID, or stop with None"""
+        self.history_bssid = bssid
+        self.refresh_signal_history()
+        get_refresh_scheduler().set_enabled(self.history_job, bool(bssid))
+
+    def refresh_signal_history(self):
+        """Update the history summary and redraw the sparkline"""
+        self.sparkline.queue_draw()
+
+        if not self.history_bssid:
+            self.history_label.set_text("")
+            return
+
+        stats = get_signal_history().stats(self.history_bssid, HISTORY_WINDOW_SECONDS)
+        if not stats.count:
+            self.history_label.set_text("No signal history yet")
+            return
+
+        self.history_label.set_text(
+            f"Last {HISTORY_WINDOW_SECONDS // 60} min: min {stats.minimum}%, "
+            f"avg {stats.average:.0f}%, max {stats.maximum}%, "
+            f"variance {stats.variance:.1f}"
+        )
+
+    def draw_sparkline(self, area, cr, width, height):
+        """Draw the strength history of the shown BSSID as a line"""
+        if not self.history_bssid:
+            return
+
+        samples = get_signal_history().get_samples(
+            self.history_bssid, HISTORY_WINDOW_SECONDS
+        )
+        if not samples:
+            return
+
+        # Strength is only sampled when it changes, so hold the last reading
+        now = time.monotonic()
+        start = now - HISTORY_WINDOW_SECONDS
+        samples.append((now, samples[-1][1]))
+
+        color = area.get_color()
+        cr.set_source_rgba(color.red, color.green, color.blue, 0.8)
+        cr.set_line_width(1.5)
+
+        for index, (timestamp, strength) in enumerate(samples):
+            x = (timestamp - start) / HISTORY_WINDOW_SECONDS * width
+            y = height - 1 - strength / 100 * (height - 2)
+            if index == 0:
+                cr.move_to(x, y)
+            else:
+                cr.line_to(x, y)
+
+        cr.stroke()
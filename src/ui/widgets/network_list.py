@@ -1,31 +1,108 @@
-import threading
+import os
+import time
 
 import gi
 from loguru import logger
 
+from ...utils.backends import is_client_ready, request_client
+from ...utils.cache import load_cached_networks, save_network_cache
+from ...utils.connect import (
+    OUTCOME_ACTIVATED,
+    OUTCOME_CANCELLED,
+    STAGE_ACTIVATE,
+    STAGE_CONFIG,
+    STAGE_CREDENTIALS,
+    STAGE_IP_CONFIG,
+    STAGE_LOOKUP,
+    STAGE_NEED_AUTH,
+    STAGE_PREPARE,
+)
+from ...utils.connections import get_connection_index
 from ...utils.dialog import show_error_dialog
-from ...utils.nmcli import (
-    connect_to_network,
-    disconnect_from_network,
-    get_active_network,
-    get_network_names,
+from ...utils.log import sampled
+from ...utils.metrics import get_metrics, timed
+from ...utils.network_model import DELTA_CHANGED, DELTA_REMOVED
+from ...utils.nmcli import get_scan_snapshot
+from ...utils.reconcile import (
+    OP_INSERT,
+    OP_MOVE,
+    OP_REMOVE,
+    OP_UPDATE,
+    ListOp,
+    diff_keyed,
+)
+from ...utils.refresh import get_refresh_scheduler
+from ...utils.remote import get_shared_model, get_shared_scheduler, request_service
+from ...utils.search import SearchIndex
+from ...utils.sorting import (
+    SORT_BAND,
+    SORT_KEYS,
+    SORT_KNOWN,
+    SORT_LAST_SEEN,
+    SORT_NAME,
+    SORT_SECURITY,
+    SORT_STRENGTH,
+    NetworkSortInfo,
+    SortedNetworks,
 )
+from ...utils.startup import mark
+from ...utils.nmcli_async import connect_to_network, disconnect_from_network
+from ...utils.tasks import get_tasks
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
-from gi.repository import Gdk, GLib, Gtk  # noqa: E402
+from gi.repository import Gdk, Gtk, Pango  # noqa: E402
+
+from .network_list_box import NetworkListBox  # noqa: E402
+from .network_list_view import NetworkListView  # noqa: E402
+from .network_row import NetworkRow  # noqa: E402
+
+# How often to ask for a fresh scan while the list is shown
+SCAN_INTERVAL_SECONDS = 30
+
+# Row backends selectable through the KOMODO_LIST_BACKEND environment variable
+LIST_BACKENDS = {
+    "listbox": NetworkListBox,
+    "listview": NetworkListView,
+}
+
+# Status shown while a connection attempt is in each stage
+STAGE_DESCRIPTIONS = {
+    STAGE_LOOKUP: "Looking up network",
+    STAGE_CREDENTIALS: "Waiting for password",
+    STAGE_ACTIVATE: "Starting connection",
+    STAGE_PREPARE: "Preparing",
+    STAGE_CONFIG: "Associating",
+    STAGE_NEED_AUTH: "Authenticating",
+    STAGE_IP_CONFIG: "Getting an address",
+}
+
+# Labels of the sort orders offered in the header
+SORT_DESCRIPTIONS = {
+    SORT_STRENGTH: "Signal",
+    SORT_SECURITY: "Security",
+    SORT_BAND: "Band",
+    SORT_LAST_SEEN: "Last Seen",
+    SORT_KNOWN: "Known First",
+    SORT_NAME: "Name",
+}
 
 
 class NetworkList(Gtk.Box):
     """Widget displaying and managing the list of available networks"""
 
-    def __init__(self):
+    def __init__(self, backend=None):
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
         logger.debug("Initializing NetworkList")
+        self.backend = backend or os.environ.get("KOMODO_LIST_BACKEND", "listbox")
         self.setup_layout()
         self.setup_styles()
         self.setup_signals()
-        self.start_network_monitoring()
+
+        # Show the networks from the last run right away, then the live ones
+        # once NetworkManager's state is available
+        self.show_cached_networks()
+        request_client(self.on_client_ready)
 
     def setup_layout(self):
         """Configure base layout and widgets"""
@@ -51,20 +128,42 @@ class NetworkList(Gtk.Box):
         self.header_label.set_hexpand(True)
         self.header_box.append(self.header_label)
 
+        # Create sort order selector
+        self.sort_dropdown = Gtk.DropDown.new_from_strings(
+            [SORT_DESCRIPTIONS[sort_key] for sort_key in SORT_KEYS]
+        )
+        self.sort_dropdown.set_tooltip_text("Sort Networks By")
+        self.sort_dropdown.set_valign(Gtk.Align.CENTER)
+        self.header_box.append(self.sort_dropdown)
+
         # Create reload button
         self.reload_button = Gtk.Button.new_from_icon_name("view-refresh-symbolic")
         self.reload_button.set_tooltip_text("Reload Network List")
         self.reload_button.set_halign(Gtk.Align.END)
         self.reload_button.set_valign(Gtk.Align.CENTER)
         self.reload_button.add_css_class("flat")
+        self.reload_button.set_sensitive(False)
         self.header_box.append(self.reload_button)
 
-        # Create network list box
-        self.list_box = Gtk.ListBox()
-        self.list_box.set_selection_mode(Gtk.SelectionMode.SINGLE)
-        self.list_box.set_activate_on_single_click(False)
-        self.list_box.add_css_class("boxed-list")
-        self.list_box.set_vexpand(True)
+        # Create search entry, which also catches typing anywhere in the list
+        self.search_entry = Gtk.SearchEntry()
+        self.search_entry.set_placeholder_text("Search networks")
+        self.search_entry.set_hexpand(True)
+        self.search_entry.set_key_capture_widget(self)
+
+        # Create network rows using the configured backend
+        if self.backend not in LIST_BACKENDS:
+            logger.warning(f"Unknown list backend {self.backend}, using listbox")
+            self.backend = "listbox"
+        logger.info("Using {} network list backend", self.backend)
+        self.list_box = LIST_BACKENDS[self.backend]()
+
+        # Names of the listed networks, matched against the search
+        self.search_index = SearchIndex()
+        self.list_box.set_filter(self.search_index.is_match)
+
+        # Listed networks in the order picked in the header
+        self.sorted_networks = SortedNetworks(SORT_KEYS[0])
 
         # Create scrolled window
         self.scrolled_window = Gtk.ScrolledWindow()
@@ -75,11 +174,72 @@ class NetworkList(Gtk.Box):
         self.scrolled_window.add_css_class("card")
         self.scrolled_window.set_child(self.list_box)
 
+        # Create loading placeholder shown until the client is ready
+        self.loading_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self.loading_box.set_spacing(10)
+        self.loading_box.set_valign(Gtk.Align.CENTER)
+        self.loading_box.set_vexpand(True)
+        self.loading_box.add_css_class("card")
+
+        self.loading_spinner = Gtk.Spinner()
+        self.loading_spinner.start()
+        self.loading_box.append(self.loading_spinner)
+
+        self.loading_label = Gtk.Label(label="Loading networks…")
+        self.loading_label.add_css_class("dim-label")
+        self.loading_box.append(self.loading_label)
+
+        # Switch between the placeholder and the list
+        self.content_stack = Gtk.Stack()
+        self.content_stack.set_vexpand(True)
+        self.content_stack.add_named(self.loading_box, "loading")
+        self.content_stack.add_named(self.scrolled_window, "list")
+        self.content_stack.set_visible_child_name("loading")
+
+        # Create connection status bar, shown while connecting
+        self.status_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        self.status_box.set_spacing(5)
+        self.status_box.set_visible(False)
+
+        self.status_spinner = Gtk.Spinner()
+        self.status_box.append(self.status_spinner)
+
+        self.status_label = Gtk.Label()
+        self.status_label.set_halign(Gtk.Align.START)
+        self.status_label.set_hexpand(True)
+        self.status_label.set_ellipsize(Pango.EllipsizeMode.END)
+        self.status_label.add_css_class("dim-label")
+        self.status_box.append(self.status_label)
+
+        self.cancel_button = Gtk.Button.new_from_icon_name("process-stop-symbolic")
+        self.cancel_button.set_tooltip_text("Cancel Connection")
+        self.cancel_button.add_css_class("flat")
+        self.status_box.append(self.cancel_button)
+
+        # Set while a disconnect is in flight
         self.connecting = False
+        self.network_model = None
+
+        # SSID -> NetworkRow of every row shown, ordered by sorted_networks
+        self.rows = {}
+        self.active_network = ""
+
+        # Cached networks shown until the first scan confirms or drops them
+        self.stale_networks = set()
+        # SSID -> CachedNetwork, for sorting the stale rows
+        self.cached_networks = {}
+
+        # Access points report last-seen on the boot clock, in seconds
+        self.boot_offset = time.time() - time.clock_gettime(time.CLOCK_BOOTTIME)
+
+        # Scan results already counted in the scan.to_render metric
+        self.rendered_results_at = None
 
         # Add main widgets
         self.append(self.header_box)
-        self.append(self.scrolled_window)
+        self.append(self.search_entry)
+        self.append(self.content_stack)
+        self.append(self.status_box)
 
     def setup_styles(self):
         """Setup custom CSS styles"""
@@ -89,6 +249,9 @@ class NetworkList(Gtk.Box):
                 background: alpha(@accent_bg_color, 0.1);
                 font-weight: bold;
             }
+            .stale-network {
+                opacity: 0.55;
+            }
         """)
         Gtk.StyleContext.add_provider_for_display(
             Gdk.Display.get_default(),
@@ -99,113 +262,423 @@ class NetworkList(Gtk.Box):
     def setup_signals(self):
         """Connect widget signals"""
         self.reload_button.connect("clicked", self.on_reload_button_clicked)
-        self.list_box.connect("row-selected", self.on_network_selected)
-        self.list_box.connect("row-activated", self.on_network_activated)
+        self.cancel_button.connect("clicked", self.on_cancel_button_clicked)
+        self.search_entry.connect("search-changed", self.on_search_changed)
+        self.search_entry.connect("stop-search", self.on_stop_search)
+        self.sort_dropdown.connect("notify::selected", self.on_sort_changed)
+        self.list_box.connect("network-selected", self.on_network_selected)
+        self.list_box.connect("network-activated", self.on_network_activated)
+
+    def show_cached_networks(self):
+        """Render the networks remembered from the last run as stale rows"""
+        cached = load_cached_networks()
+        if not cached:
+            return
+
+        self.stale_networks = {network.ssid for network in cached}
+        self.cached_networks = {network.ssid: network for network in cached}
+        active_network = next(
+            (network.ssid for network in cached if network.is_active), ""
+        )
+        self.update_list_box(self.stale_networks, active_network, self.stale_networks)
+        self.loading_spinner.stop()
+        self.content_stack.set_visible_child_name("list")
+        mark("cached networks shown")
+
+    def on_client_ready(self, client):
+        """Find out whether networks come from the shared service"""
+        if client is None:
+            self.loading_spinner.stop()
+            self.loading_label.set_text("Could not connect to NetworkManager")
+            self.content_stack.set_visible_child_name("loading")
+            return
+        request_service(self.on_service_ready)
+
+    def on_service_ready(self, connection):
+        """Replace the loading placeholder with the network list"""
+        self.start_network_monitoring()
+        self.loading_spinner.stop()
+        self.content_stack.set_visible_child_name("list")
+        self.reload_button.set_sensitive(not self.scan_scheduler.is_scanning())
+        mark("networks shown")
+
+        # A cached row may have been selected before details could be fetched
+        selected_network = self.list_box.get_selected_network()
+        if selected_network:
+            self._update_network_details(selected_network)
 
     def start_network_monitoring(self):
-        """Start network monitoring and auto-refresh"""
-        threading.Thread(target=self.load_networks, daemon=True).start()
-        # Store the timer ID so we can remove it later
-        self.refresh_source_id = GLib.timeout_add_seconds(
-            5, self.on_reload_button_clicked, self.reload_button
+        """Subscribe to network model changes and show the current networks"""
+        self.monitoring_paused = False
+        self.network_model = get_shared_model()
+        self.model_subscription = self.network_model.subscribe(self.on_network_deltas)
+        self.refresh_from_model()
+
+        # Keep the results fresh with periodic, rate-limited scans while the
+        # list is shown
+        self.scan_scheduler = get_shared_scheduler()
+        self.scan_subscription = self.scan_scheduler.subscribe(self.on_scan_result)
+        refresh_scheduler = get_refresh_scheduler()
+        self.scan_job = refresh_scheduler.add(
+            "network-list.scan", self.on_scan_timer, SCAN_INTERVAL_SECONDS
         )
+        refresh_scheduler.bind_widget(self.scan_job, self)
+        self.request_scan()
 
     def pause_monitoring(self):
         """Pause network monitoring"""
-        if self.refresh_source_id:
-            GLib.source_remove(self.refresh_source_id)
-            self.refresh_source_id = None
+        self.monitoring_paused = True
 
     def resume_monitoring(self):
         """Resume network monitoring"""
-        if not self.refresh_source_id:
-            self.refresh_source_id = GLib.timeout_add_seconds(
-                5, self.on_reload_button_clicked, self.reload_button
+        if self.monitoring_paused:
+            self.monitoring_paused = False
+            self.refresh_from_model()
+
+    def on_network_deltas(self, deltas):
+        """Handle a batch of changes published by the network model"""
+        sampled(10).debug("NetworkList received {} network deltas", len(deltas))
+
+        # Networks coming and going keep scans at their base interval, while
+        # signal changes alone let them back off
+        if any(delta.kind != DELTA_CHANGED for delta in deltas):
+            get_refresh_scheduler().note_activity()
+
+        if not self.monitoring_paused:
+            self.apply_deltas(deltas)
+            self._observe_render()
+
+    def refresh_from_model(self):
+        """Reconcile the list with the network model's registry"""
+        live_networks = set(self.network_model.get_network_names())
+        self.update_list_box(
+            live_networks | self.stale_networks,
+            self.network_model.get_active_network(),
+            self.stale_networks - live_networks,
+        )
+        self._observe_render()
+
+    def _observe_render(self):
+        """Record how long fresh scan results took to reach the list"""
+        # Time from fresh scan results to the list showing them
+        results_at = get_shared_scheduler().results_at
+        if results_at is not None and results_at != self.rendered_results_at:
+            self.rendered_results_at = results_at
+            get_metrics().histogram(
+                "scan.to_render", "Fresh scan results to list updated"
+            ).observe(time.monotonic() - results_at)
+
+    def request_scan(self):
+        """Ask for a rescan, results arrive as network deltas"""
+        if self.scan_scheduler.request_scan():
+            self.reload_button.set_sensitive(False)
+
+    def on_scan_timer(self):
+        """Periodic rescan, skipped while a connection is being made"""
+        if not self.monitoring_paused:
+            self.request_scan()
+
+    def on_scan_result(self, result):
+        """Re-enable the reload button once every scan has finished"""
+        if result.latency is not None:
+            logger.info(
+                "Scan on {} {} after {:.2f}s",
+                result.iface,
+                "finished" if result.ok else "failed",
+                result.latency,
             )
 
+        if result.ok:
+            save_network_cache()
+
+        # Cached networks the scans did not find are gone
+        if self.stale_networks and not self.scan_scheduler.is_scanning():
+            logger.info("Dropping {} stale cached networks", len(self.stale_networks))
+            self.stale_networks = set()
+            self.cached_networks = {}
+            if not self.monitoring_paused:
+                self.refresh_from_model()
+
+        if not self.scan_scheduler.is_scanning():
+            self.reload_button.set_sensitive(True)
+
+    @timed("list.search")
+    def on_search_changed(self, entry):
+        """Filter the list, re-checking only the rows whose match changed"""
+        get_refresh_scheduler().wake()
+        shown, hidden = self.search_index.set_query(entry.get_text())
+        self.list_box.refilter(shown, hidden)
+
+    def on_stop_search(self, entry):
+        """Clear the search on Escape"""
+        entry.set_text("")
+
+    def on_sort_changed(self, dropdown, _pspec):
+        """Re-sort the list on the key picked in the header"""
+        sort_key = SORT_KEYS[dropdown.get_selected()]
+        logger.info("Sorting networks by {}", sort_key)
+
+        old_items = [(name, self.rows[name]) for name in self.sorted_networks]
+        self.sorted_networks.set_sort_key(sort_key)
+        self._show_rows(
+            old_items, [(name, self.rows[name]) for name in self.sorted_networks]
+        )
+
     def on_reload_button_clicked(self, button):
         """Handle reload button clicks"""
-        self.list_box.remove_all()
-        threading.Thread(target=self.load_networks, daemon=True).start()
-        threading.Thread(target=self._update_password_box, daemon=True).start()
+        get_refresh_scheduler().wake()
+        self.request_scan()
+        self._update_password_box()
         return True
 
-    def on_network_selected(self, list_box, row):
+    def on_network_selected(self, list_box, ssid):
         """Handle network selection"""
-        if row is not None:
-            ssid = self._get_ssid_from_row(row)
+        get_refresh_scheduler().wake()
+
+        # Cached rows have no details until the client is ready
+        if self.network_model is not None:
             self._update_network_details(ssid)
 
-    def on_network_activated(self, list_box, row):
+    def on_network_activated(self, list_box, ssid):
         """Handle network activation (double-click/Enter)"""
-        if row is not None and not self.connecting:
+        if self.network_model is None or self.connecting:
+            return
+
+        if ssid == self.network_model.get_active_network():
             self.connecting = True
-            self.pause_monitoring()  # Pause monitoring while connecting
-            ssid = self._get_ssid_from_row(row)
-            threading.Thread(
-                target=self._handle_network_activation_with_resume,
-                args=(ssid,),
-                daemon=True,
-            ).start()
-
-    def _handle_network_activation_with_resume(self, ssid):
-        """Wrapper to handle network activation and resume monitoring"""
+            self.pause_monitoring()  # Pause monitoring while disconnecting
+            get_tasks().spawn("network-deactivation", self._disconnect(ssid))
+        else:
+            self.start_connection(ssid)
+
+    def start_connection(self, ssid):
+        """Connect to a network, cancelling any attempt still running"""
+        self.pause_monitoring()  # Pause monitoring while connecting
+        self.status_spinner.start()
+        self.status_box.set_visible(True)
+
+        get_tasks().spawn(
+            "network-activation",
+            connect_to_network(
+                ssid,
+                on_stage=lambda stage: self.on_connection_stage(ssid, stage),
+                parent=self.get_root(),
+            ),
+            callback=lambda result: self.on_connection_finished(ssid, result),
+        )
+
+    def on_connection_stage(self, ssid, stage):
+        """Show how far the connection attempt has got"""
+        description = STAGE_DESCRIPTIONS.get(stage, stage)
+        self.status_label.set_text(f"Connecting to {ssid}: {description}…")
+
+    def on_connection_finished(self, ssid, result):
+        """Report the outcome of the connection attempt"""
+        self._end_connection()
+
+        if result is None:
+            show_error_dialog(self.get_root(), f"Could not connect to {ssid}")
+        elif result.outcome not in (OUTCOME_ACTIVATED, OUTCOME_CANCELLED):
+            show_error_dialog(
+                self.get_root(), f"Failed to connect to {ssid}: {result.reason}"
+            )
+
+    def on_cancel_button_clicked(self, button):
+        """Cancel the running connection attempt"""
+        get_tasks().cancel("network-activation")
+        self._end_connection()
+
+    def _end_connection(self):
+        """Hide the connection status and bring the list back up to date"""
+        self.status_spinner.stop()
+        self.status_box.set_visible(False)
+        self.resume_monitoring()
+        self._refresh_ui()
+
+    async def _disconnect(self, ssid):
+        """Disconnect from the active network and resume monitoring"""
         try:
-            self._handle_network_activation(ssid)
+            await disconnect_from_network(ssid)
+        except Exception as e:
+            show_error_dialog(self.get_root(), str(e))
         finally:
             self.connecting = False
-            GLib.idle_add(self.resume_monitoring)  # Resume monitoring when done
-
-    def load_networks(self):
-        """Load network list in background thread"""
-        network_names = get_network_names()
-        unique_network_names = set(network_names)
-        active_network = get_active_network()
-        GLib.idle_add(self.update_list_box, unique_network_names, active_network)
-
-    def update_list_box(self, unique_network_names, active_network):
-        """Update network list UI"""
-        network_list = list(unique_network_names)
-        if active_network in network_list:
-            network_list.remove(active_network)
-            network_list.insert(0, active_network)
-
-        active_network_row = None
-        for name in network_list:
-            if name:
-                row = self._create_network_row(name, name == active_network)
-                if name == active_network:
-                    active_network_row = row
-
-        if active_network_row:
-            self.list_box.select_row(active_network_row)
-
-    def _create_network_row(self, name, is_active):
-        """Create a network list row"""
-        row = Gtk.ListBoxRow()
-        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
-        box.set_spacing(6)
-
-        label = Gtk.Label(label=name)
-        label.set_halign(Gtk.Align.START)
-        label.set_hexpand(True)
-
-        if is_active:
-            icon = Gtk.Image.new_from_icon_name("emblem-ok-symbolic")
-            icon.set_margin_start(6)
-            box.append(icon)
-            row.add_css_class("active-network")
-
-        box.append(label)
-        row.set_child(box)
-        self.list_box.append(row)
-        return row
-
-    def _get_ssid_from_row(self, row):
-        """Extract SSID from list box row"""
-        box = row.get_child()
-        label = box.get_last_child()
-        return label.get_text()
+            self.resume_monitoring()
+            self._refresh_ui()
+
+    @timed("list.update_list_box")
+    def update_list_box(
+        self, unique_network_names, active_network, stale_networks=frozenset()
+    ):
+        """Reconcile the whole list with a set of networks
+
+        Used when the list may have drifted from the model, such as when
+        monitoring resumes. Single changes go through apply_deltas() instead.
+        """
+        new_names = {name for name in unique_network_names if name}
+        old_items = [(name, self.rows[name]) for name in self.sorted_networks]
+
+        # Keep the search index in step before rows are inserted and filtered
+        for name in self.rows.keys() - new_names:
+            self.search_index.remove(name)
+            self.sorted_networks.remove(name)
+        for name in new_names - self.rows.keys():
+            self.search_index.add(name)
+
+        # Active network first, then the rest in the chosen order
+        strengths = {}
+        if self.network_model is not None:
+            strengths = {
+                entry.ssid: entry.strength
+                for entry in self.network_model.get_networks()
+            }
+        infos = self._get_sort_infos(new_names, active_network, strengths)
+        for name, info in infos.items():
+            self.sorted_networks.update(name, info)
+
+        self.rows = {
+            name: NetworkRow(name == active_network, name in stale_networks)
+            for name in self.sorted_networks
+        }
+        self._show_rows(old_items, list(self.rows.items()))
+        self._follow_active(active_network)
+
+    @timed("list.apply_deltas")
+    def apply_deltas(self, deltas):
+        """Update only the rows of the networks a batch of deltas touched
+
+        Sort info is looked up for those networks and the previous and new
+        active network, and each one whose place changed is moved on its
+        own, so a strength change costs a few lookups and at most one row op.
+        """
+        active_network = self.network_model.get_active_network()
+
+        # The latest delta for each network wins
+        latest = {delta.ssid: delta for delta in deltas if delta.ssid}
+        names = set(latest)
+        names.update(name for name in (self.active_network, active_network) if name)
+
+        strengths = {
+            ssid: delta.strength
+            for ssid, delta in latest.items()
+            if delta.kind != DELTA_REMOVED
+        }
+        infos = self._get_sort_infos(names, active_network, strengths)
+
+        ops = []
+        for name in names:
+            delta = latest.get(name)
+            if delta is None:
+                # An active network with no change of its own keeps its row
+                keep = name in self.rows
+                is_stale = keep and self.rows[name].is_stale
+            else:
+                # A removed network stays while its cached row is still shown
+                is_stale = delta.kind == DELTA_REMOVED and name in self.stale_networks
+                keep = delta.kind != DELTA_REMOVED or is_stale
+
+            if not keep:
+                if name in self.rows:
+                    ops.append(
+                        ListOp(OP_REMOVE, name, self.sorted_networks.index(name), None)
+                    )
+                    self.sorted_networks.remove(name)
+                    self.search_index.remove(name)
+                    del self.rows[name]
+                continue
+
+            row = NetworkRow(name == active_network, is_stale)
+            moved = self.sorted_networks.update(name, infos[name])
+            position = self.sorted_networks.index(name)
+            old_row = self.rows.get(name)
+            self.rows[name] = row
+
+            if old_row is None:
+                self.search_index.add(name)
+                ops.append(ListOp(OP_INSERT, name, position, row))
+                continue
+            if moved:
+                ops.append(ListOp(OP_MOVE, name, position, row))
+            if row != old_row:
+                ops.append(ListOp(OP_UPDATE, name, None, row))
+
+        self.list_box.apply_ops(ops)
+        sampled(10).debug("NetworkList applied {} row changes", len(ops))
+        self._follow_active(active_network)
+
+    def _follow_active(self, active_network):
+        """Select and remember the active network"""
+        # Follow the active network when it changes or nothing is selected
+        if active_network and (
+            active_network != self.active_network
+            or self.list_box.get_selected_network() is None
+        ):
+            self.list_box.select_network(active_network)
+
+        # Remember a new active network right away rather than at the next scan
+        if self.network_model is not None and active_network != self.active_network:
+            save_network_cache()
+
+        self.active_network = active_network
+
+    def _show_rows(self, old_items, new_items):
+        """Turn the shown rows into new_items with as few row changes as possible"""
+        ops = diff_keyed(old_items, new_items)
+        self.list_box.apply_ops(ops)
+        sampled(10).debug("NetworkList applied {} row changes", len(ops))
+
+    def _get_sort_infos(self, names, active_network, strengths):
+        """Look up what each network is sorted on
+
+        Strengths are passed in from the network model, which follows signal
+        changes between scans; a network without one keeps the strength it is
+        sorted on. Everything else comes from the scan snapshot and saved
+        profiles, and networks only known from the cache use cached values.
+        """
+        snapshot = connection_index = None
+        if is_client_ready():
+            snapshot = get_scan_snapshot()
+            connection_index = get_connection_index()
+
+        infos = {}
+        for name in names:
+            is_active = name == active_network
+            if name not in strengths:
+                previous = self.sorted_networks.get_info(name)
+                if previous is not None:
+                    strengths[name] = previous.strength
+            record = snapshot.get_access_point(name) if snapshot else None
+            if record is not None:
+                infos[name] = NetworkSortInfo(
+                    strengths.get(name, record.strength),
+                    record.security,
+                    record.frequency,
+                    (
+                        int(record.last_seen + self.boot_offset)
+                        if record.last_seen >= 0
+                        else 0
+                    ),
+                    bool(connection_index.get_by_ssid(record.ssid_bytes)),
+                    is_active,
+                )
+                continue
+
+            cached = self.cached_networks.get(name)
+            if cached is not None:
+                infos[name] = NetworkSortInfo(
+                    strengths.get(name, cached.strength),
+                    cached.security,
+                    0,
+                    cached.last_seen,
+                    False,
+                    is_active,
+                )
+            else:
+                infos[name] = NetworkSortInfo(
+                    strengths.get(name, 0), None, 0, 0, False, is_active
+                )
+
+        return infos
 
     def _update_network_details(self, ssid):
         """Update network details panel"""
@@ -233,22 +706,6 @@ class NetworkList(Gtk.Box):
             password_box = basic_page.password_entry
             password_box.refresh_password()
 
-    def _handle_network_activation(self, ssid):
-        """Handle network activation/deactivation"""
-        try:
-            active_network = get_active_network()
-
-            if ssid == active_network:
-                if not disconnect_from_network(ssid):
-                    return
-            else:
-                if not connect_to_network(ssid):
-                    return
-        except Exception as e:
-            GLib.idle_add(show_error_dialog, self.get_root(), str(e))
-        finally:
-            GLib.idle_add(self._refresh_ui)
-
     def _refresh_ui(self):
         """Refresh network list and password box"""
         self.on_reload_button_clicked(self.reload_button)
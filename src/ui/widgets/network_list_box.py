@@ -0,0 +1,147 @@
+import gi
+
+from ...utils.reconcile import OP_INSERT, OP_MOVE, OP_REMOVE, OP_UPDATE
+
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+from gi.repository import GObject, Gtk  # noqa: E402
+
+from .network_row import NetworkRow  # noqa: E402
+
+
+class NetworkListBox(Gtk.ListBox):
+    """Network rows backed by a Gtk.ListBox, one widget tree per network"""
+
+    __gsignals__ = {
+        "network-selected": (GObject.SignalFlags.RUN_FIRST, None, (str,)),
+        "network-activated": (GObject.SignalFlags.RUN_FIRST, None, (str,)),
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.set_selection_mode(Gtk.SelectionMode.SINGLE)
+        self.set_activate_on_single_click(False)
+        self.add_css_class("boxed-list")
+        self.set_vexpand(True)
+
+        # Rows currently shown, keyed by SSID
+        self.rows = {}
+
+        # Decides which networks are shown, None to show them all
+        self.is_match = None
+        self.set_filter_func(self._filter_row)
+
+        self.row_selected_handler = self.connect("row-selected", self.on_row_selected)
+        self.connect("row-activated", self.on_row_activated)
+
+    def on_row_selected(self, list_box, row):
+        """Forward row selection as a network-selected signal"""
+        if row is not None:
+            self.emit("network-selected", self._get_ssid_from_row(row))
+
+    def on_row_activated(self, list_box, row):
+        """Forward row activation as a network-activated signal"""
+        if row is not None:
+            self.emit("network-activated", self._get_ssid_from_row(row))
+
+    def apply_ops(self, ops):
+        """Apply reconciliation ops, keeping the selection where it was"""
+        selected_ssid = self.get_selected_network()
+
+        # Moving a row out and back in drops the selection, so keep the
+        # details panel quiet while the edits are applied
+        self.handler_block(self.row_selected_handler)
+        try:
+            for op in ops:
+                self._apply_row_op(op)
+
+            selected_row = self.rows.get(selected_ssid)
+            if selected_row and self.get_selected_row() is not selected_row:
+                self.select_row(selected_row)
+        finally:
+            self.handler_unblock(self.row_selected_handler)
+
+    def set_filter(self, is_match):
+        """Show only the networks is_match(ssid) accepts"""
+        self.is_match = is_match
+        self.invalidate_filter()
+
+    def refilter(self, shown, hidden):
+        """Re-check only the rows of networks whose match changed"""
+        for ssid in (*shown, *hidden):
+            row = self.rows.get(ssid)
+            if row is not None:
+                row.changed()
+
+    def select_network(self, ssid):
+        """Select the row of a network, emitting network-selected"""
+        row = self.rows.get(ssid)
+        if row:
+            self.select_row(row)
+
+    def get_selected_network(self):
+        """Get the SSID of the selected row, or None"""
+        row = self.get_selected_row()
+        return self._get_ssid_from_row(row) if row else None
+
+    def _apply_row_op(self, op):
+        """Apply a single reconciliation op to the list box"""
+        if op.kind == OP_REMOVE:
+            self.remove(self.rows.pop(op.key))
+
+        elif op.kind == OP_INSERT:
+            row = self._create_network_row(op.key, op.value)
+            self.rows[op.key] = row
+            self.insert(row, op.position)
+
+        elif op.kind == OP_MOVE:
+            row = self.rows[op.key]
+            self.remove(row)
+            self.insert(row, op.position)
+
+        elif op.kind == OP_UPDATE:
+            self._style_network_row(self.rows[op.key], op.value)
+
+    def _create_network_row(self, name, state: NetworkRow):
+        """Create a network list row"""
+        row = Gtk.ListBoxRow()
+        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        box.set_spacing(6)
+
+        label = Gtk.Label(label=name)
+        label.set_halign(Gtk.Align.START)
+        label.set_hexpand(True)
+
+        # The icon is always present so restyling never rebuilds the row
+        icon = Gtk.Image.new_from_icon_name("emblem-ok-symbolic")
+        icon.set_margin_start(6)
+        box.append(icon)
+
+        box.append(label)
+        row.set_child(box)
+        self._style_network_row(row, state)
+        return row
+
+    def _style_network_row(self, row, state: NetworkRow):
+        """Show or hide the active marker and stale styling on a network row"""
+        icon = row.get_child().get_first_child()
+        icon.set_visible(state.is_active)
+
+        if state.is_active:
+            row.add_css_class("active-network")
+        else:
+            row.remove_css_class("active-network")
+
+        if state.is_stale:
+            row.add_css_class("stale-network")
+        else:
+            row.remove_css_class("stale-network")
+
+    def _filter_row(self, row):
+        return self.is_match is None or self.is_match(self._get_ssid_from_row(row))
+
+    def _get_ssid_from_row(self, row):
+        """Extract SSID from list box row"""
+        box = row.get_child()
+        label = box.get_last_child()
+        return label.get_text()
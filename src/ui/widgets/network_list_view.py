@@ -0,0 +1,240 @@
+import gi
+
+from ...utils.reconcile import OP_INSERT, OP_MOVE, OP_REMOVE, OP_UPDATE
+
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+from gi.repository import Gio, GObject, Gtk  # noqa: E402
+
+from .network_row import NetworkRow  # noqa: E402
+
+
+class NetworkItem(GObject.Object):
+    """A network held in the NetworkListView store"""
+
+    __gtype_name__ = "KomodoNetworkItem"
+
+    ssid = GObject.Property(type=str, default="")
+    is_active = GObject.Property(type=bool, default=False)
+    is_stale = GObject.Property(type=bool, default=False)
+
+    def __init__(self, ssid, state: NetworkRow):
+        super().__init__(ssid=ssid, is_active=state.is_active, is_stale=state.is_stale)
+
+    def get_state(self) -> NetworkRow:
+        """Get the row state the item holds"""
+        return NetworkRow(self.props.is_active, self.props.is_stale)
+
+    def set_state(self, state: NetworkRow):
+        """Update the item, notifying bound rows of what changed"""
+        if self.props.is_active != state.is_active:
+            self.props.is_active = state.is_active
+        if self.props.is_stale != state.is_stale:
+            self.props.is_stale = state.is_stale
+
+
+class NetworkListView(Gtk.ListView):
+    """Network rows backed by a virtualized Gtk.ListView
+
+    Networks live in a Gio.ListStore of NetworkItem objects and only the rows
+    on screen get widgets, which the factory recycles while scrolling, so the
+    cost of a refresh follows the visible rows rather than the scan size. A
+    Gtk.FilterListModel between the store and the selection hides the
+    networks the search does not match.
+    """
+
+    __gsignals__ = {
+        "network-selected": (GObject.SignalFlags.RUN_FIRST, None, (str,)),
+        "network-activated": (GObject.SignalFlags.RUN_FIRST, None, (str,)),
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.set_single_click_activate(False)
+        self.set_vexpand(True)
+
+        # Create the backing store, search filter and selection model
+        self.store = Gio.ListStore.new(NetworkItem)
+        self.is_match = None
+        self.filter = Gtk.CustomFilter.new(self._filter_item)
+        self.filter_model = Gtk.FilterListModel.new(self.store, self.filter)
+        self.selection = Gtk.SingleSelection.new(self.filter_model)
+        self.selection.set_autoselect(False)
+        self.selection.set_can_unselect(True)
+
+        # Create the recycling row factory
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_factory_setup)
+        factory.connect("bind", self.on_factory_bind)
+        factory.connect("unbind", self.on_factory_unbind)
+
+        self.set_model(self.selection)
+        self.set_factory(factory)
+
+        # Items currently shown keyed by SSID, and the bound rows' handlers
+        self.items = {}
+        self.bindings = {}
+
+        self.selection_handler = self.selection.connect(
+            "selection-changed", self.on_selection_changed
+        )
+        self.connect("activate", self.on_item_activated)
+
+    def on_factory_setup(self, factory, list_item):
+        """Create the widgets for a recyclable row"""
+        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        box.set_spacing(6)
+
+        icon = Gtk.Image.new_from_icon_name("emblem-ok-symbolic")
+        icon.set_margin_start(6)
+        box.append(icon)
+
+        label = Gtk.Label()
+        label.set_halign(Gtk.Align.START)
+        label.set_hexpand(True)
+        box.append(label)
+
+        list_item.set_child(box)
+
+    def on_factory_bind(self, factory, list_item):
+        """Fill a recycled row with a network and follow its state"""
+        item = list_item.get_item()
+        box = list_item.get_child()
+        box.get_last_child().set_text(item.props.ssid)
+        self._style_network_row(box, item.get_state())
+
+        handler_ids = [
+            item.connect(
+                signal,
+                lambda item, pspec: self._style_network_row(box, item.get_state()),
+            )
+            for signal in ("notify::is-active", "notify::is-stale")
+        ]
+        self.bindings[list_item] = (item, handler_ids)
+
+    def on_factory_unbind(self, factory, list_item):
+        """Release a row before it is recycled"""
+        item, handler_ids = self.bindings.pop(list_item)
+        for handler_id in handler_ids:
+            item.disconnect(handler_id)
+
+    def on_selection_changed(self, selection, position, n_items):
+        """Forward selection changes as a network-selected signal"""
+        item = selection.get_selected_item()
+        if item is not None:
+            self.emit("network-selected", item.props.ssid)
+
+    def on_item_activated(self, list_view, position):
+        """Forward row activation as a network-activated signal"""
+        item = self.get_model().get_item(position)
+        if item is not None:
+            self.emit("network-activated", item.props.ssid)
+
+    def apply_ops(self, ops):
+        """Apply reconciliation ops to the store, keeping the selection"""
+        selected_ssid = self.get_selected_network()
+
+        self.selection.handler_block(self.selection_handler)
+        try:
+            if self.store.get_n_items() == 0 and all(
+                op.kind == OP_INSERT and op.position == 0 for op in ops
+            ):
+                # Fill an empty store with one items-changed emission. Inserts
+                # into an empty list come back to front, each at position 0.
+                items = [NetworkItem(op.key, op.value) for op in reversed(ops)]
+                self.items = {item.props.ssid: item for item in items}
+                self.store.splice(0, 0, items)
+            else:
+                for op in ops:
+                    self._apply_item_op(op)
+
+            selected_item = self.items.get(selected_ssid)
+            if (
+                selected_item
+                and self.selection.get_selected_item() is not selected_item
+            ):
+                position = self._find_shown(selected_item)
+                if position is not None:
+                    self.selection.set_selected(position)
+        finally:
+            self.selection.handler_unblock(self.selection_handler)
+
+    def select_network(self, ssid):
+        """Select the item of a network, emitting network-selected"""
+        item = self.items.get(ssid)
+        if item:
+            position = self._find_shown(item)
+            if position is not None:
+                self.selection.set_selected(position)
+
+    def set_filter(self, is_match):
+        """Show only the networks is_match(ssid) accepts"""
+        self.is_match = is_match
+        self.filter.changed(Gtk.FilterChange.DIFFERENT)
+
+    def refilter(self, shown, hidden):
+        """Re-filter after the match of some networks changed
+
+        Tells the filter model which way the change went, so a narrowing
+        search only re-checks the items still shown and a widening one only
+        those hidden.
+        """
+        if shown and hidden:
+            self.filter.changed(Gtk.FilterChange.DIFFERENT)
+        elif hidden:
+            self.filter.changed(Gtk.FilterChange.MORE_STRICT)
+        elif shown:
+            self.filter.changed(Gtk.FilterChange.LESS_STRICT)
+
+    def get_selected_network(self):
+        """Get the SSID of the selected item, or None"""
+        item = self.selection.get_selected_item()
+        return item.props.ssid if item else None
+
+    def _filter_item(self, item):
+        return self.is_match is None or self.is_match(item.props.ssid)
+
+    def _find_shown(self, item):
+        """Get the position of an item among the shown ones, or None"""
+        if self.filter_model.get_n_items() == self.store.get_n_items():
+            found, position = self.store.find(item)
+            return position if found else None
+
+        for position in range(self.filter_model.get_n_items()):
+            if self.filter_model.get_item(position) is item:
+                return position
+        return None
+
+    def _apply_item_op(self, op):
+        """Apply a single reconciliation op to the store"""
+        if op.kind == OP_REMOVE:
+            del self.items[op.key]
+            self.store.remove(op.position)
+
+        elif op.kind == OP_INSERT:
+            item = NetworkItem(op.key, op.value)
+            self.items[op.key] = item
+            self.store.insert(op.position, item)
+
+        elif op.kind == OP_MOVE:
+            item = self.items[op.key]
+            found, position = self.store.find(item)
+            self.store.remove(position)
+            self.store.insert(op.position, item)
+
+        elif op.kind == OP_UPDATE:
+            self.items[op.key].set_state(op.value)
+
+    def _style_network_row(self, box, state: NetworkRow):
+        """Show or hide the active marker and stale styling on a row"""
+        box.get_first_child().set_visible(state.is_active)
+
+        if state.is_active:
+            box.add_css_class("active-network")
+        else:
+            box.remove_css_class("active-network")
+
+        if state.is_stale:
+            box.add_css_class("stale-network")
+        else:
+            box.remove_css_class("stale-network")
@@ -0,0 +1,5 @@
+from collections import namedtuple
+
+# What a network row shows besides its SSID. Stale rows come from the on-disk
+# cache and have not been confirmed by a scan yet.
+NetworkRow = namedtuple("NetworkRow", ["is_active", "is_stale"])
@@ -1,12 +1,18 @@
 import gi
-import threading
 import subprocess
 
-from ...utils.nmcli import get_active_password
+from ...utils.backends import request_client
+from ...utils.nmcli_async import get_active_password
+from ...utils.refresh import get_refresh_scheduler
+from ...utils.remote import get_shared_model, request_service
+from ...utils.tasks import get_tasks
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
-from gi.repository import Gtk, GLib  # noqa: E402
+from gi.repository import Gtk  # noqa: E402
+
+# How often the password is reloaded while shown
+REFRESH_SECONDS = 15
 
 
 class PasswordBox(Gtk.Box):
@@ -16,12 +22,10 @@ class PasswordBox(Gtk.Box):
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
         self.setup_layout()
         self.setup_password_entry()
+        self.active_ssid = None
 
-        # Start a thread to load the password
-        threading.Thread(target=self.load_password, daemon=True).start()
-
-        # Auto-refresh every 15 seconds
-        GLib.timeout_add_seconds(15, self.refresh_password)
+        # Load the password once NetworkManager's state is available
+        request_client(self.on_client_ready)
 
     def setup_layout(self):
         """Configure base layout and containers"""
@@ -56,6 +60,7 @@ class PasswordBox(Gtk.Box):
         self.password_entry.set_visibility(False)
         self.password_entry.set_hexpand(True)
         self.password_entry.set_editable(False)
+        self.password_entry.set_placeholder_text("Loading…")
         self.entry_box.append(self.password_entry)
 
         # Create visibility toggle button
@@ -72,6 +77,40 @@ class PasswordBox(Gtk.Box):
         self.visibility_button.connect("toggled", self.on_visibility_button_toggled)
         self.entry_box.append(self.visibility_button)
 
+    def on_client_ready(self, client):
+        """Load the password in the background"""
+        if client is None:
+            self.password_entry.set_placeholder_text("Unavailable")
+            return
+        self.password_entry.set_placeholder_text("")
+        self.refresh_password()
+
+        # Auto-refresh every 15 seconds while shown, served from the secret
+        # cache unless the profile changed
+        scheduler = get_refresh_scheduler()
+        self.refresh_job = scheduler.add(
+            "password-box.refresh", self.on_refresh_timeout, REFRESH_SECONDS
+        )
+        scheduler.bind_widget(self.refresh_job, self)
+
+        request_service(self.on_service_ready)
+
+    def on_service_ready(self, connection):
+        """Reload as soon as the active network changes"""
+        model = get_shared_model()
+        self.active_ssid = model.get_active_network()
+        model.subscribe(self.on_network_deltas)
+
+    def on_network_deltas(self, deltas):
+        """Refresh the password when the active network changes"""
+        active_ssid = get_shared_model().get_active_network()
+        if active_ssid != self.active_ssid:
+            self.active_ssid = active_ssid
+            self.refresh_password()
+
+    def on_refresh_timeout(self):
+        self.refresh_password()
+
     def on_visibility_button_toggled(self, button):
         """Handle password visibility toggle button clicks"""
         if button.get_active():
@@ -104,11 +143,6 @@ class PasswordBox(Gtk.Box):
             self.visibility_button_icon.set_from_icon_name("view-reveal-symbolic")
             self.visibility_button.set_tooltip_text("Show Password")
 
-    def load_password(self):
-        """Load password in background thread"""
-        password = get_active_password()
-        GLib.idle_add(self.update_password, password)
-
     def update_password(self, password):
         """Update password entry text and state"""
         if password and password.strip():
@@ -122,4 +156,6 @@ class PasswordBox(Gtk.Box):
 
     def refresh_password(self):
         """Manually trigger password refresh"""
-        threading.Thread(target=self.load_password, daemon=True).start()
+        get_tasks().spawn(
+            "active-password", get_active_password(), callback=self.update_password
+        )
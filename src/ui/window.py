@@ -1,9 +1,13 @@
 import gi
+from loguru import logger
+
+from ..utils.refresh import get_refresh_scheduler
+from ..utils.startup import mark
 from .header import Header
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
-from gi.repository import Adw, Gtk  # noqa: E402
+from gi.repository import Adw, Gdk, Gtk  # noqa: E402
 
 
 class Window(Adw.ApplicationWindow):
@@ -13,6 +17,7 @@ class Window(Adw.ApplicationWindow):
         super().__init__(application=app)
         self.setup_window()
         self.setup_layout()
+        self.setup_signals()
 
     def setup_window(self):
         """Configure basic window properties"""
@@ -34,3 +39,44 @@ class Window(Adw.ApplicationWindow):
 
         # Set window content
         self.set_content(main_container)
+
+    def setup_signals(self):
+        """Connect window signals"""
+        self.first_frame_handler = None
+        self.connect("realize", self.on_realize)
+
+        # Periodic work follows whether the window can be seen
+        self.connect("map", self.update_refresh_state)
+        self.connect("unmap", self.update_refresh_state)
+        self.connect("notify::is-active", self.update_refresh_state)
+
+    def on_realize(self, window):
+        """Watch the frame clock for the first frame drawn"""
+        self.get_surface().connect("notify::state", self.update_refresh_state)
+
+        frame_clock = self.get_frame_clock()
+        if frame_clock is None:
+            logger.warning("Window has no frame clock, not timing first frame")
+            return
+        self.first_frame_handler = frame_clock.connect(
+            "after-paint", self.on_first_frame
+        )
+
+    def on_first_frame(self, frame_clock):
+        """Record time-to-first-frame and stop watching"""
+        frame_clock.disconnect(self.first_frame_handler)
+        self.first_frame_handler = None
+        mark("first frame")
+
+    def update_refresh_state(self, *args):
+        """Tell the refresh scheduler whether anyone can see the window"""
+        surface = self.get_surface()
+        state = surface.get_state() if surface is not None else 0
+        # SUSPENDED, for windows fully covered or on another workspace, is
+        # only reported since GTK 4.12
+        hidden = Gdk.ToplevelState.MINIMIZED | getattr(
+            Gdk.ToplevelState, "SUSPENDED", 0
+        )
+        get_refresh_scheduler().set_window_state(
+            self.get_mapped() and not state & hidden, self.is_active()
+        )
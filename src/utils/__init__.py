@@ -1,22 +1,73 @@
-from .dialog import show_error_dialog, show_password_dialog
-from .nmcli import (
-    get_network_names,
-    get_active_network,
-    connect_to_network,
-    disconnect_from_network,
-    get_network_info,
-    get_device_info,
-    get_active_password,
-)
-
-__all__ = [
-    "show_error_dialog",
-    "show_password_dialog",
-    "get_network_names",
-    "get_active_network",
-    "connect_to_network",
-    "disconnect_from_network",
-    "get_network_info",
-    "get_device_info",
-    "get_active_password",
-]
+"""Komodo's NetworkManager core, shared by the GUI and the command line
+
+Names are imported from their modules on first access, so importing one
+module, such as nmcli from komodo-cli, does not pull in the others. In
+particular GTK is only loaded when a dialog helper is used.
+"""
+
+import importlib
+
+# Exported name -> module defining it
+_EXPORTS = {
+    "get_backend": "backends",
+    "get_client": "backends",
+    "is_client_ready": "backends",
+    "request_client": "backends",
+    "set_backend": "backends",
+    "ConnectAttempt": "connect",
+    "ConnectResult": "connect",
+    "get_recent_results": "connect",
+    "ConnectionIndex": "connections",
+    "get_connection_index": "connections",
+    "request_password": "dialog",
+    "show_error_dialog": "dialog",
+    "show_password_dialog": "dialog",
+    "get_network_names": "nmcli",
+    "request_network_scan": "nmcli",
+    "get_active_network": "nmcli",
+    "connect_to_network": "nmcli",
+    "disconnect_from_network": "nmcli",
+    "get_network_info": "nmcli",
+    "get_device_info": "nmcli",
+    "get_access_points": "nmcli",
+    "get_active_password": "nmcli",
+    "AccessPointRecord": "access_point",
+    "NetworkDelta": "network_model",
+    "NetworkEntry": "network_model",
+    "NetworkModel": "network_model",
+    "get_network_model": "network_model",
+    "ScanResult": "scan",
+    "ScanScheduler": "scan",
+    "get_scan_scheduler": "scan",
+    "SignalHistory": "signal_history",
+    "SignalStats": "signal_history",
+    "get_signal_history": "signal_history",
+    "KeyedTasks": "tasks",
+    "get_tasks": "tasks",
+    "install_event_loop": "tasks",
+    "MetricsRegistry": "metrics",
+    "get_metrics": "metrics",
+    "timed": "metrics",
+    "SecretCache": "secrets",
+    "get_secret_cache": "secrets",
+    "RemoteNetworkModel": "remote",
+    "RemoteScanScheduler": "remote",
+    "get_shared_model": "remote",
+    "get_shared_scheduler": "remote",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,130 @@
+from typing import Optional
+
+import gi
+
+gi.require_version("NM", "1.0")
+
+from gi.repository import NM  # noqa: E402
+
+NM_80211ApFlags = getattr(NM, "80211ApFlags")
+NM_80211ApSecurityFlags = getattr(NM, "80211ApSecurityFlags")
+
+
+def ssid_to_str(ssid: bytes) -> str:
+    """Turn raw SSID bytes into a display name
+
+    SSIDs are arbitrary bytes. Invalid UTF-8 is kept visible as \\x escapes
+    rather than dropped, so every network still gets a distinct name.
+    """
+    return ssid.decode("utf-8", "backslashreplace")
+
+
+def decode_ssid(ap) -> Optional[str]:
+    """Get the display name of an access point's SSID, or None if hidden"""
+    ssid_gbytes = ap.get_ssid()
+    if ssid_gbytes is None:
+        return None
+
+    ssid = ssid_gbytes.get_data()
+    return ssid_to_str(ssid) if ssid else None
+
+
+def security_type(flags, wpa_flags, rsn_flags) -> str:
+    """Name the security of an access point from its capability flags"""
+    if not flags & NM_80211ApFlags.PRIVACY:
+        return "Open"
+    if rsn_flags != NM_80211ApSecurityFlags.NONE:
+        return "WPA2"
+    if wpa_flags != NM_80211ApSecurityFlags.NONE:
+        return "WPA"
+    return "WEP"
+
+
+def channel_from_frequency(frequency: int) -> int:
+    """Get the Wi-Fi channel number for a centre frequency in MHz, or 0"""
+    if frequency == 2484:
+        return 14
+    if 2412 <= frequency < 2484:
+        return (frequency - 2407) // 5
+    if 5150 <= frequency <= 5895:
+        return (frequency - 5000) // 5
+    if 5955 <= frequency <= 7115:
+        return (frequency - 5950) // 5
+    return 0
+
+
+class AccessPointRecord:
+    """Everything Komodo shows about one BSSID, read from libnm in one go
+
+    Records are plain values copied when a scan snapshot is built, so they
+    can be passed around and compared without going back to libnm. Slots
+    keep them small, and records of the same network share their SSID
+    objects.
+    """
+
+    __slots__ = (
+        "ssid",
+        "ssid_bytes",
+        "bssid",
+        "frequency",
+        "strength",
+        "max_bitrate",
+        "last_seen",
+        "security",
+        "path",
+        "iface",
+    )
+
+    def __init__(
+        self,
+        ssid: str,
+        ssid_bytes: bytes,
+        bssid: str,
+        frequency: int,
+        strength: int,
+        max_bitrate: int,
+        last_seen: int,
+        security: str,
+        path: str,
+        iface: str,
+    ):
+        self.ssid = ssid
+        self.ssid_bytes = ssid_bytes
+        self.bssid = bssid
+        self.frequency = frequency
+        self.strength = strength
+        self.max_bitrate = max_bitrate
+        self.last_seen = last_seen
+        self.security = security
+        self.path = path
+        self.iface = iface
+
+    @classmethod
+    def from_access_point(cls, ap, iface: str, ssid: str, ssid_bytes: bytes):
+        """Copy the fields of a libnm access point seen by device iface"""
+        return cls(
+            ssid,
+            ssid_bytes,
+            ap.get_bssid(),
+            ap.get_frequency(),
+            ap.get_strength(),
+            ap.get_max_bitrate(),
+            ap.get_last_seen(),
+            security_type(ap.get_flags(), ap.get_wpa_flags(), ap.get_rsn_flags()),
+            ap.get_path(),
+            iface,
+        )
+
+    @property
+    def channel(self) -> int:
+        return channel_from_frequency(self.frequency)
+
+    @property
+    def is_secured(self) -> bool:
+        return self.security != "Open"
+
+    def __repr__(self):
+        return (
+            f"AccessPointRecord({self.ssid!r}, {self.bssid}, {self.strength}%, "
+            f"{self.frequency} MHz, {self.security}, {self.iface})"
+        )
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Protocol
+
+import gi
+from loguru import logger
+
+gi.require_version("NM", "1.0")
+
+from gi.repository import NM  # noqa: E402
+
+
+class Backend(Protocol):
+    """Source of the NetworkManager client behind every nmcli query
+
+    create_client() returns an object with the subset of the NM.Client API
+    Komodo uses: get_devices(), get_device_by_iface(), get_connections(),
+    get_active_connections(), add_connection_async()/add_connection_finish(),
+    activate_connection_async(), deactivate_connection() and the device,
+    access point and connection objects reachable from them, along with
+    their signals.
+    """
+
+    name: str
+
+    def create_client(self):
+        """Create the client object"""
+        ...
+
+    def create_client_async(self, callback: Callable):
+        """Create the client without blocking, then call callback(client, error)
+
+        The callback runs on the main loop with either the client or a
+        GLib.Error.
+        """
+        ...
+
+
+def is_wifi_device(dev) -> bool:
+    """Whether a device is a Wi-Fi device, for any backend"""
+    return dev.get_device_type() == NM.DeviceType.WIFI
+
+
+def backend_from_environment() -> Backend:
+    """Pick the backend named by KOMODO_BACKEND, defaulting to libnm"""
+    name = os.environ.get("KOMODO_BACKEND", "libnm")
+
+    if name == "simulated":
+        from .simulated import SimulatedBackend
+
+        return SimulatedBackend.from_environment()
+
+    if name != "libnm":
+        logger.warning(f"Unknown backend {name}, using libnm")
+
+    from .libnm import LibnmBackend
+
+    return LibnmBackend()
+
+
+_lock = threading.Lock()
+_backend: Optional[Backend] = None
+_client = None
+
+# Callbacks waiting for the client being created asynchronously, or None when
+# no asynchronous creation is in progress
+_pending: Optional[List[Callable]] = None
+
+
+def set_backend(backend: Backend):
+    """Use a different backend, dropping any client already created"""
+    global _backend, _client, _pending
+
+    with _lock:
+        logger.info("Using {} backend", backend.name)
+        _backend = backend
+        _client = None
+        _pending = None
+
+
+def get_backend() -> Backend:
+    """Get the backend in use, picking it from the environment on first use"""
+    global _backend
+
+    with _lock:
+        if _backend is None:
+            _backend = backend_from_environment()
+            logger.info("Using {} backend", _backend.name)
+        return _backend
+
+
+def get_client():
+    """Get the shared client, creating it through the backend on first use
+
+    Creating it here blocks until the backend has fetched all of its state, so
+    the UI waits for it with request_client() instead.
+    """
+    global _client
+
+    backend = get_backend()
+    with _lock:
+        if _client is None:
+            _client = backend.create_client()
+        return _client
+
+
+def is_client_ready() -> bool:
+    """Whether the shared client has been created"""
+    with _lock:
+        return _client is not None
+
+
+def request_client(callback: Callable):
+    """Call callback(client) once the shared client exists
+
+    The first request starts creating the client asynchronously, so the
+    window can be built while libnm fetches NetworkManager's state. If the
+    client already exists the callback is called right away. If it cannot be
+    created at all, the callback gets None, so the UI can show the failure.
+    Must be called from the main thread.
+    """
+    global _pending
+
+    with _lock:
+        client = _client
+        start = False
+        if client is None:
+            start = _pending is None
+            if start:
+                _pending = []
+            _pending.append(callback)
+
+    if client is not None:
+        callback(client)
+        return
+
+    if start:
+        backend = get_backend()
+        started = time.monotonic()
+        backend.create_client_async(
+            lambda client, error: _on_client_created(backend, client, error, started)
+        )
+
+
+def _on_client_created(backend: Backend, client, error, started: float):
+    """Publish an asynchronously created client to everyone waiting for it"""
+    global _client, _pending
+
+    if error is not None:
+        logger.error(f"Asynchronous {backend.name} client creation failed: {error}")
+        try:
+            client = backend.create_client()
+        except Exception as e:
+            logger.exception(f"Error creating {backend.name} client: {e}")
+            client = None
+
+    with _lock:
+        if _backend is not backend:
+            return
+        # get_client() may have created one synchronously in the meantime
+        if _client is None:
+            _client = client
+        client = _client
+        callbacks = _pending or []
+        _pending = None
+
+    if client is not None:
+        logger.info(
+            "{} client ready after {:.3f}s", backend.name, time.monotonic() - started
+        )
+    for callback in callbacks:
+        try:
+            callback(client)
+        except Exception as e:
+            logger.exception(f"Error in client ready callback: {e}")
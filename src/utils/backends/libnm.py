@@ -0,0 +1,30 @@
+import gi
+from loguru import logger
+
+gi.require_version("NM", "1.0")
+
+from gi.repository import NM, GLib  # noqa: E402
+
+
+class LibnmBackend:
+    """Backend talking to the running NetworkManager daemon through libnm"""
+
+    name = "libnm"
+
+    def create_client(self):
+        """Create an NM.Client, fetching NetworkManager's state over D-Bus"""
+        logger.info("Connecting to NetworkManager")
+        return NM.Client.new(None)
+
+    def create_client_async(self, callback):
+        """Start creating an NM.Client without blocking the main loop"""
+        logger.info("Connecting to NetworkManager asynchronously")
+        NM.Client.new_async(None, self._on_client_created, callback)
+
+    def _on_client_created(self, source, result, callback):
+        try:
+            client = NM.Client.new_finish(result)
+        except GLib.Error as e:
+            callback(None, e)
+            return
+        callback(client, None)
@@ -0,0 +1,782 @@
+import os
+import random
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import gi
+from loguru import logger
+
+gi.require_version("NM", "1.0")
+
+from gi.repository import NM, GLib  # noqa: E402
+
+NM_80211ApFlags = getattr(NM, "80211ApFlags")
+NM_80211ApSecurityFlags = getattr(NM, "80211ApSecurityFlags")
+NM_80211Mode = getattr(NM, "80211Mode")
+
+# Channel centre frequencies handed out to simulated access points
+FREQUENCIES = [2412 + 5 * channel for channel in range(13)] + [
+    5180,
+    5200,
+    5220,
+    5240,
+    5745,
+    5765,
+    5785,
+    5805,
+]
+
+# Beacons weaker than this on a device are not reported by it
+VISIBILITY_THRESHOLD = 5
+
+
+class _SignalSource:
+    """Minimal GObject-style signals for the simulated objects
+
+    Handlers are called as handler(source, *args, *user_data), like PyGObject
+    does, and property changes emit "notify::<property>" with a None pspec.
+    """
+
+    def __init__(self):
+        self._handlers = {}
+        self._next_handler_id = 1
+
+    def connect(self, signal, callback, *user_data):
+        handler_id = self._next_handler_id
+        self._next_handler_id += 1
+        self._handlers[handler_id] = (signal, callback, user_data)
+        return handler_id
+
+    def disconnect(self, handler_id):
+        self._handlers.pop(handler_id, None)
+
+    def emit(self, signal, *args):
+        for handler_id, (name, callback, user_data) in list(self._handlers.items()):
+            if name == signal and handler_id in self._handlers:
+                callback(self, *args, *user_data)
+
+    def _notify(self, prop):
+        self.emit(f"notify::{prop}", None)
+
+
+class _Result:
+    """Stand-in for the GAsyncResult handed to *_finish() methods"""
+
+    def __init__(self, value=None, error: Optional[GLib.Error] = None):
+        self.value = value
+        self.error = error
+
+    def finish(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def _complete(source, callback, result, user_data):
+    """Call an async callback from the main loop, like libnm does"""
+    if callback is not None:
+        GLib.idle_add(lambda: callback(source, result, *user_data) and False)
+
+
+class _Address:
+    def __init__(self, address):
+        self._address = address
+
+    def get_address(self):
+        return self._address
+
+
+class _IPConfig:
+    def __init__(self, addresses):
+        self._addresses = [_Address(address) for address in addresses]
+
+    def get_addresses(self):
+        return list(self._addresses)
+
+
+class _Beacon:
+    """A radio source in the simulated world, seen by zero or more devices"""
+
+    __slots__ = ("ssid", "bssid", "frequency", "strength", "secured", "max_bitrate")
+
+    def __init__(self, ssid, bssid, frequency, strength, secured, max_bitrate):
+        self.ssid = ssid
+        self.bssid = bssid
+        self.frequency = frequency
+        self.strength = strength
+        self.secured = secured
+        self.max_bitrate = max_bitrate
+
+
+class SimulatedAccessPoint(_SignalSource):
+    """A device's view of a beacon, mirroring NM.AccessPoint"""
+
+    def __init__(self, path: str, beacon: _Beacon, strength: int):
+        super().__init__()
+        self._path = path
+        self._beacon = beacon
+        self._strength = strength
+        self._last_seen = int(time.clock_gettime(time.CLOCK_BOOTTIME))
+
+    def get_path(self):
+        return self._path
+
+    def get_ssid(self):
+        ssid = self._beacon.ssid
+        return GLib.Bytes.new(ssid) if ssid is not None else None
+
+    def get_bssid(self):
+        return self._beacon.bssid
+
+    def get_frequency(self):
+        return self._beacon.frequency
+
+    def get_strength(self):
+        return self._strength
+
+    def get_max_bitrate(self):
+        return self._beacon.max_bitrate
+
+    def get_mode(self):
+        return NM_80211Mode.INFRA
+
+    def get_last_seen(self):
+        return self._last_seen
+
+    def get_flags(self):
+        if self._beacon.secured:
+            return NM_80211ApFlags.PRIVACY
+        return NM_80211ApFlags.NONE
+
+    def get_wpa_flags(self):
+        return NM_80211ApSecurityFlags.NONE
+
+    def get_rsn_flags(self):
+        if self._beacon.secured:
+            return NM_80211ApSecurityFlags.KEY_MGMT_PSK
+        return NM_80211ApSecurityFlags.NONE
+
+    def _update(self, strength: int):
+        self._last_seen = int(time.clock_gettime(time.CLOCK_BOOTTIME))
+        if strength != self._strength:
+            self._strength = strength
+            self._notify("strength")
+
+
+class SimulatedConnection(_SignalSource):
+    """A saved profile, mirroring NM.RemoteConnection"""
+
+    def __init__(self, client, path: str, connection):
+        super().__init__()
+        self._client = client
+        self._path = path
+        self._connection = connection
+
+        # NetworkManager fills in a UUID when a profile lacks one
+        s_con = connection.get_setting_connection()
+        if not s_con.get_uuid():
+            s_con.set_property(NM.SETTING_CONNECTION_UUID, str(uuid.uuid4()))
+
+    def get_path(self):
+        return self._path
+
+    def get_id(self):
+        return self._connection.get_id()
+
+    def get_uuid(self):
+        return self._connection.get_uuid()
+
+    def get_connection_type(self):
+        return self._connection.get_connection_type()
+
+    def get_setting_connection(self):
+        return self._connection.get_setting_connection()
+
+    def get_setting_wireless(self):
+        return self._connection.get_setting_wireless()
+
+    def get_setting_wireless_security(self):
+        return self._connection.get_setting_wireless_security()
+
+    def get_secrets(self, setting_name, cancellable=None):
+        s_wsec = self._connection.get_setting_wireless_security()
+        secrets = {}
+        if setting_name == NM.SETTING_WIRELESS_SECURITY_SETTING_NAME and s_wsec:
+            psk = s_wsec.get_psk()
+            if psk:
+                secrets[NM.SETTING_WIRELESS_SECURITY_PSK] = GLib.Variant("s", psk)
+        return GLib.Variant("a{sa{sv}}", {setting_name: secrets})
+
+    def get_secrets_async(self, setting_name, cancellable, callback, *user_data):
+        secrets = self.get_secrets(setting_name, cancellable)
+        _complete(self, callback, _Result(secrets), user_data)
+
+    def get_secrets_finish(self, result):
+        return result.finish()
+
+    def get_psk(self) -> Optional[str]:
+        s_wsec = self._connection.get_setting_wireless_security()
+        return s_wsec.get_psk() if s_wsec else None
+
+    def delete_async(self, cancellable, callback, *user_data):
+        self._client._remove_connection(self)
+        _complete(self, callback, _Result(True), user_data)
+
+    def delete_finish(self, result):
+        return result.finish()
+
+
+class SimulatedActiveConnection(_SignalSource):
+    """An activation in progress or done, mirroring NM.ActiveConnection"""
+
+    def __init__(self, path: str, connection, device, specific_object: str):
+        super().__init__()
+        self._path = path
+        self._connection = connection
+        self._device = device
+        self._specific_object = specific_object
+        self._state = NM.ActiveConnectionState.ACTIVATING
+
+    def get_path(self):
+        return self._path
+
+    def get_id(self):
+        return self._connection.get_id()
+
+    def get_uuid(self):
+        return self._connection.get_uuid()
+
+    def get_connection(self):
+        return self._connection
+
+    def get_connection_type(self):
+        return self._connection.get_connection_type()
+
+    def get_devices(self):
+        return [self._device]
+
+    def get_specific_object_path(self):
+        return self._specific_object
+
+    def get_state(self):
+        return self._state
+
+    def _set_state(self, state, reason=NM.ActiveConnectionStateReason.NONE):
+        if state != self._state:
+            self._state = state
+            self.emit("state-changed", int(state), int(reason))
+            self._notify("state")
+
+
+class SimulatedDevice(_SignalSource):
+    """A Wi-Fi radio, mirroring NM.DeviceWifi"""
+
+    def __init__(self, client, index: int):
+        super().__init__()
+        self._client = client
+        self._index = index
+        self._path = f"/org/freedesktop/NetworkManager/Devices/{index + 1}"
+        self._iface = f"wlsim{index}"
+        self._hw_address = f"02:00:00:00:00:{index + 1:02x}"
+        self._access_points: Dict[str, SimulatedAccessPoint] = {}  # BSSID -> AP
+        self._active_ap: Optional[SimulatedAccessPoint] = None
+        self._active_connection: Optional[SimulatedActiveConnection] = None
+        self._state = NM.DeviceState.DISCONNECTED
+        self._last_scan = -1
+        self._scanning = False
+
+    def get_path(self):
+        return self._path
+
+    def get_iface(self):
+        return self._iface
+
+    def get_device_type(self):
+        return NM.DeviceType.WIFI
+
+    def get_state(self):
+        return self._state
+
+    def get_hw_address(self):
+        return self._hw_address
+
+    def get_permanent_hw_address(self):
+        return self._hw_address
+
+    def get_access_points(self):
+        return list(self._access_points.values())
+
+    def get_access_point_by_path(self, path):
+        for ap in self._access_points.values():
+            if ap.get_path() == path:
+                return ap
+        return None
+
+    def get_active_access_point(self):
+        return self._active_ap
+
+    def get_active_connection(self):
+        return self._active_connection
+
+    def get_last_scan(self):
+        return self._last_scan
+
+    def get_ip4_config(self):
+        if self._state != NM.DeviceState.ACTIVATED:
+            return None
+        return _IPConfig([f"192.168.{self._index}.{100 + self._index}"])
+
+    def get_ip6_config(self):
+        if self._state != NM.DeviceState.ACTIVATED:
+            return None
+        return _IPConfig([f"fd00::{self._index + 1:x}:100"])
+
+    def request_scan(self, cancellable=None):
+        self._finish_scan()
+        return True
+
+    def request_scan_async(self, cancellable, callback, *user_data):
+        if self._scanning:
+            error = GLib.Error(
+                "Scanning not allowed while already scanning",
+                "nm-device-error-quark",
+                int(NM.DeviceError.NOTALLOWED),
+            )
+            _complete(self, callback, _Result(error=error), user_data)
+            return
+
+        self._scanning = True
+        _complete(self, callback, _Result(True), user_data)
+        GLib.timeout_add(self._client.config.scan_latency_ms, self._finish_scan)
+
+    def request_scan_finish(self, result):
+        return result.finish()
+
+    def _finish_scan(self):
+        self._scanning = False
+        self._client.step()
+        self._last_scan = int(time.clock_gettime(time.CLOCK_BOOTTIME) * 1000)
+        self._notify("last-scan")
+        return False
+
+    def _sync(self, beacons: List[_Beacon], offsets: Dict[str, int]):
+        """Update the reported access points from the world's beacons"""
+        visible = {}
+        for beacon in beacons:
+            strength = max(0, min(100, beacon.strength + offsets.get(beacon.bssid, 0)))
+            if strength >= VISIBILITY_THRESHOLD:
+                visible[beacon.bssid] = (beacon, strength)
+
+        for bssid in list(self._access_points):
+            if (
+                bssid not in visible
+                and self._access_points[bssid] is not self._active_ap
+            ):
+                ap = self._access_points.pop(bssid)
+                self.emit("access-point-removed", ap)
+
+        for bssid, (beacon, strength) in visible.items():
+            ap = self._access_points.get(bssid)
+            if ap is None:
+                ap = SimulatedAccessPoint(
+                    self._client._next_path("AccessPoint"), beacon, strength
+                )
+                self._access_points[bssid] = ap
+                self.emit("access-point-added", ap)
+            else:
+                ap._update(strength)
+
+    def _set_state(self, state, reason=NM.DeviceStateReason.NONE):
+        if state != self._state:
+            old, self._state = self._state, state
+            self.emit("state-changed", int(state), int(old), int(reason))
+            self._notify("state")
+
+    def _set_active(self, ap, active_connection):
+        self._active_connection = active_connection
+        if ap is not self._active_ap:
+            self._active_ap = ap
+            self._notify("active-access-point")
+
+
+class SimulatedConfig:
+    """Knobs for the simulated world"""
+
+    def __init__(
+        self,
+        access_points: int = 50,
+        devices: int = 1,
+        bssids_per_ssid: int = 3,
+        churn: float = 0.05,
+        drift: float = 3.0,
+        hidden_ratio: float = 0.05,
+        non_utf8_ratio: float = 0.02,
+        secured_ratio: float = 0.7,
+        saved_connections: int = 5,
+        scan_latency: float = 1.5,
+        connect_latency: float = 2.0,
+        disconnect_latency: float = 0.3,
+        password: str = "password",
+        seed: int = 0,
+    ):
+        self.access_points = access_points
+        self.devices = devices
+        self.bssids_per_ssid = bssids_per_ssid
+        self.churn = churn
+        self.drift = drift
+        self.hidden_ratio = hidden_ratio
+        self.non_utf8_ratio = non_utf8_ratio
+        self.secured_ratio = secured_ratio
+        self.saved_connections = saved_connections
+        self.scan_latency_ms = int(scan_latency * 1000)
+        self.connect_latency_ms = int(connect_latency * 1000)
+        self.disconnect_latency_ms = int(disconnect_latency * 1000)
+        self.password = password
+        self.seed = seed
+
+
+class SimulatedClient(_SignalSource):
+    """In-memory NetworkManager, mirroring the NM.Client API Komodo uses
+
+    The world is a set of beacons grouped under SSIDs. Every step() lets
+    their strength drift and replaces a `churn` fraction of them, and each
+    simulated device reports the beacons it can hear as access points. All
+    randomness comes from one seeded generator, so a run is reproducible.
+    Activation walks the device through its states over `connect_latency`
+    and fails with missing secrets when a secured network gets the wrong
+    password.
+    """
+
+    def __init__(self, config: SimulatedConfig):
+        super().__init__()
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._paths = {}
+        self._ssid_count = max(1, config.access_points // config.bssids_per_ssid)
+        self._next_bssid = 1
+        self._beacons: Dict[str, _Beacon] = {}
+        self._offsets: List[Dict[str, int]] = [{} for _ in range(config.devices)]
+        self._connections: List[SimulatedConnection] = []
+        self._active_connections: List[SimulatedActiveConnection] = []
+        self._churn_source_id = None
+
+        logger.info(
+            "Simulating {} access points on {} device(s) (seed {})",
+            config.access_points,
+            config.devices,
+            config.seed,
+        )
+
+        for _ in range(config.access_points):
+            self._add_beacon()
+
+        self._devices = [
+            SimulatedDevice(self, index) for index in range(config.devices)
+        ]
+        for index, dev in enumerate(self._devices):
+            dev._sync(list(self._beacons.values()), self._offsets[index])
+            dev._last_scan = int(time.clock_gettime(time.CLOCK_BOOTTIME) * 1000)
+
+        self._create_saved_connections()
+
+    # NM.Client API
+
+    def get_devices(self):
+        return list(self._devices)
+
+    def get_all_devices(self):
+        return list(self._devices)
+
+    def get_device_by_iface(self, iface):
+        return next((dev for dev in self._devices if dev.get_iface() == iface), None)
+
+    def get_device_by_path(self, path):
+        return next((dev for dev in self._devices if dev.get_path() == path), None)
+
+    def get_connections(self):
+        return list(self._connections)
+
+    def get_connection_by_uuid(self, connection_uuid):
+        return next(
+            (conn for conn in self._connections if conn.get_uuid() == connection_uuid),
+            None,
+        )
+
+    def get_active_connections(self):
+        return list(self._active_connections)
+
+    def add_connection_async(
+        self, connection, save_to_disk, cancellable, callback, *user_data
+    ):
+        conn = SimulatedConnection(self, self._next_path("Settings"), connection)
+        self._connections.append(conn)
+        self.emit("connection-added", conn)
+        _complete(self, callback, _Result(conn), user_data)
+
+    def add_connection_finish(self, result):
+        return result.finish()
+
+    def activate_connection_async(
+        self, connection, device, specific_object, cancellable, callback, *user_data
+    ):
+        device = device or self._devices[0]
+        active = SimulatedActiveConnection(
+            self._next_path("ActiveConnection"), connection, device, specific_object
+        )
+
+        # Replace whatever the device was doing
+        previous = device.get_active_connection()
+        if previous is not None:
+            self._drop_active(
+                previous, NM.ActiveConnectionStateReason.USER_DISCONNECTED
+            )
+
+        self._active_connections.append(active)
+        device._set_active(None, active)
+        self.emit("active-connection-added", active)
+        _complete(self, callback, _Result(active), user_data)
+
+        self._schedule_activation(active, device, specific_object)
+
+    def activate_connection_finish(self, result):
+        return result.finish()
+
+    def deactivate_connection(self, active, cancellable=None):
+        active._set_state(NM.ActiveConnectionState.DEACTIVATING)
+        GLib.timeout_add(
+            self.config.disconnect_latency_ms,
+            lambda: (
+                self._drop_active(
+                    active, NM.ActiveConnectionStateReason.USER_DISCONNECTED
+                )
+                and False
+            ),
+        )
+        return True
+
+    def deactivate_connection_async(self, active, cancellable, callback, *user_data):
+        self.deactivate_connection(active, cancellable)
+        _complete(self, callback, _Result(True), user_data)
+
+    def deactivate_connection_finish(self, result):
+        return result.finish()
+
+    # Simulation control
+
+    def step(self):
+        """Advance the world by one tick of drift and churn"""
+        config = self.config
+
+        for beacon in self._beacons.values():
+            drift = self._rng.gauss(0, config.drift)
+            beacon.strength = max(0, min(100, int(round(beacon.strength + drift))))
+
+        churned = int(len(self._beacons) * config.churn)
+        active_bssids = {
+            dev.get_active_access_point().get_bssid()
+            for dev in self._devices
+            if dev.get_active_access_point()
+        }
+        candidates = [bssid for bssid in self._beacons if bssid not in active_bssids]
+        for bssid in self._rng.sample(candidates, min(churned, len(candidates))):
+            del self._beacons[bssid]
+            for offsets in self._offsets:
+                offsets.pop(bssid, None)
+        for _ in range(churned):
+            self._add_beacon()
+
+        for index, dev in enumerate(self._devices):
+            dev._sync(list(self._beacons.values()), self._offsets[index])
+
+        return True
+
+    def start(self, interval_ms: int = 1000):
+        """Step the world on a timer, as if the radios kept listening"""
+        if self._churn_source_id is None:
+            self._churn_source_id = GLib.timeout_add(interval_ms, self.step)
+
+    def stop(self):
+        """Stop the timer started by start()"""
+        if self._churn_source_id is not None:
+            GLib.source_remove(self._churn_source_id)
+            self._churn_source_id = None
+
+    # Internals
+
+    def _next_path(self, kind: str) -> str:
+        self._paths[kind] = self._paths.get(kind, 0) + 1
+        return f"/org/freedesktop/NetworkManager/{kind}/{self._paths[kind]}"
+
+    def _make_ssid(self) -> Optional[bytes]:
+        """Pick an SSID, sometimes hidden or not valid UTF-8"""
+        roll = self._rng.random()
+        if roll < self.config.hidden_ratio:
+            return None
+
+        index = self._rng.randrange(self._ssid_count)
+        if roll < self.config.hidden_ratio + self.config.non_utf8_ratio:
+            return b"caf\xe9-" + str(index).encode()
+        return f"Network-{index:04d}".encode()
+
+    def _add_beacon(self):
+        """Create a new beacon and how strongly each device hears it"""
+        bssid_number = self._next_bssid
+        self._next_bssid += 1
+        bssid = ":".join(
+            f"{byte:02X}" for byte in (0x02, 0x10, *bssid_number.to_bytes(4, "big"))
+        )
+
+        ssid = self._make_ssid()
+        # Profiles are keyed by SSID, so an SSID is secured or open everywhere
+        secured = ssid is not None and (
+            random.Random(ssid).random() < self.config.secured_ratio
+        )
+        self._beacons[bssid] = _Beacon(
+            ssid,
+            bssid,
+            self._rng.choice(FREQUENCIES),
+            self._rng.randint(5, 100),
+            secured,
+            self._rng.choice([54000, 144000, 300000, 866000, 1201000]),
+        )
+
+        # The first device hears everything as-is, others see a spread
+        for index, offsets in enumerate(self._offsets):
+            if index:
+                offsets[bssid] = self._rng.randint(-30, 10)
+
+    def _create_saved_connections(self):
+        """Save profiles for a few networks and activate the strongest one"""
+        aps = sorted(
+            (ap for ap in self._devices[0].get_access_points() if ap.get_ssid()),
+            key=lambda ap: ap.get_strength(),
+            reverse=True,
+        )
+
+        saved_ssids = []
+        for ap in aps:
+            ssid = ap.get_ssid().get_data()
+            if len(saved_ssids) >= self.config.saved_connections:
+                break
+            if ssid in saved_ssids:
+                continue
+            saved_ssids.append(ssid)
+
+            connection = NM.SimpleConnection.new()
+            s_con = NM.SettingConnection.new()
+            s_con.set_property(
+                NM.SETTING_CONNECTION_ID, ssid.decode("utf-8", "replace")
+            )
+            s_con.set_property(NM.SETTING_CONNECTION_TYPE, "802-11-wireless")
+            s_wifi = NM.SettingWireless.new()
+            s_wifi.set_property(NM.SETTING_WIRELESS_SSID, GLib.Bytes.new(ssid))
+            connection.add_setting(s_con)
+            connection.add_setting(s_wifi)
+
+            if ap.get_flags() & NM_80211ApFlags.PRIVACY:
+                s_wsec = NM.SettingWirelessSecurity.new()
+                s_wsec.set_property(NM.SETTING_WIRELESS_SECURITY_KEY_MGMT, "wpa-psk")
+                s_wsec.set_property(
+                    NM.SETTING_WIRELESS_SECURITY_PSK, self.config.password
+                )
+                connection.add_setting(s_wsec)
+
+            conn = SimulatedConnection(self, self._next_path("Settings"), connection)
+            self._connections.append(conn)
+
+            if len(saved_ssids) == 1:
+                dev = self._devices[0]
+                active = SimulatedActiveConnection(
+                    self._next_path("ActiveConnection"), conn, dev, ap.get_path()
+                )
+                active._state = NM.ActiveConnectionState.ACTIVATED
+                self._active_connections.append(active)
+                dev._state = NM.DeviceState.ACTIVATED
+                dev._active_ap = ap
+                dev._active_connection = active
+
+    def _schedule_activation(self, active, device, specific_object):
+        """Walk a device through activation over the connect latency"""
+        ap = device.get_access_point_by_path(specific_object)
+        latency = self.config.connect_latency_ms
+        stages = [
+            (0.1, NM.DeviceState.PREPARE),
+            (0.3, NM.DeviceState.CONFIG),
+            (0.6, NM.DeviceState.IP_CONFIG),
+            (1.0, NM.DeviceState.ACTIVATED),
+        ]
+
+        def advance(state):
+            if device.get_active_connection() is not active:
+                return False
+
+            if state == NM.DeviceState.IP_CONFIG and not self._secrets_ok(active, ap):
+                device._set_state(NM.DeviceState.NEED_AUTH)
+                self._drop_active(active, NM.ActiveConnectionStateReason.NO_SECRETS)
+                return False
+
+            device._set_state(state)
+            if state == NM.DeviceState.ACTIVATED:
+                device._set_active(ap, active)
+                active._set_state(NM.ActiveConnectionState.ACTIVATED)
+            return False
+
+        for fraction, state in stages:
+            GLib.timeout_add(int(latency * fraction), advance, state)
+
+    def _secrets_ok(self, active, ap) -> bool:
+        if ap is None:
+            return False
+        if not ap.get_flags() & NM_80211ApFlags.PRIVACY:
+            return True
+        return active.get_connection().get_psk() == self.config.password
+
+    def _remove_connection(self, conn):
+        if conn in self._connections:
+            self._connections.remove(conn)
+            self.emit("connection-removed", conn)
+
+    def _drop_active(self, active, reason):
+        """Tear down an active connection and reset its device"""
+        if active not in self._active_connections:
+            return False
+
+        self._active_connections.remove(active)
+        device = active.get_devices()[0]
+        if device.get_active_connection() is active:
+            device._set_active(None, None)
+            device._set_state(NM.DeviceState.DISCONNECTED, NM.DeviceStateReason.NONE)
+
+        active._set_state(NM.ActiveConnectionState.DEACTIVATED, reason)
+        self.emit("active-connection-removed", active)
+        return False
+
+
+class SimulatedBackend:
+    """Backend serving a deterministic, in-memory NetworkManager"""
+
+    name = "simulated"
+
+    def __init__(self, config: Optional[SimulatedConfig] = None):
+        self.config = config or SimulatedConfig()
+
+    @classmethod
+    def from_environment(cls) -> "SimulatedBackend":
+        """Configure from KOMODO_SIM_APS, _DEVICES, _CHURN and _SEED"""
+        return cls(
+            SimulatedConfig(
+                access_points=int(os.environ.get("KOMODO_SIM_APS", 50)),
+                devices=int(os.environ.get("KOMODO_SIM_DEVICES", 1)),
+                churn=float(os.environ.get("KOMODO_SIM_CHURN", 0.05)),
+                seed=int(os.environ.get("KOMODO_SIM_SEED", 0)),
+            )
+        )
+
+    def create_client(self):
+        """Create a fresh simulated client"""
+        return SimulatedClient(self.config)
+
+    def create_client_async(self, callback):
+        """Create a fresh simulated client from the main loop"""
+        GLib.idle_add(lambda: callback(self.create_client(), None) and False)
@@ -0,0 +1,156 @@
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+from typing import List, Optional
+
+from gi.repository import GLib
+from loguru import logger
+
+from .executor import get_executor
+
+# Bump when the on-disk layout changes; other versions are ignored
+CACHE_VERSION = 1
+
+# Cached networks last seen longer ago than this are not shown at all
+MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+# A network as remembered from the last scan. last_seen is a Unix timestamp.
+CachedNetwork = namedtuple(
+    "CachedNetwork",
+    ["ssid", "bssid", "strength", "security", "last_seen", "is_active"],
+)
+
+
+def get_cache_path() -> str:
+    """Get the path of the network cache in the XDG cache directory"""
+    return os.path.join(GLib.get_user_cache_dir(), "komodo", "networks.json")
+
+
+def _parse_row(row) -> Optional[CachedNetwork]:
+    """Read one cached row, or None if it is not a well-formed network"""
+    if not isinstance(row, list) or len(row) != len(CachedNetwork._fields):
+        return None
+
+    network = CachedNetwork(*row)
+    if not (
+        isinstance(network.ssid, str)
+        and isinstance(network.bssid, str)
+        and isinstance(network.security, str)
+        and isinstance(network.is_active, bool)
+    ):
+        return None
+    for number in (network.strength, network.last_seen):
+        if isinstance(number, bool) or not isinstance(number, (int, float)):
+            return None
+    return network
+
+
+def load_cached_networks(max_age: float = MAX_AGE_SECONDS) -> List[CachedNetwork]:
+    """Load the networks remembered from the last run, newest first
+
+    Returns an empty list if there is no usable cache. Small enough to read
+    on the main thread before the first frame.
+    """
+    logger.debug("Entered load_cached_networks()")
+    path = get_cache_path()
+
+    try:
+        with open(path, "rb") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        logger.info("No network cache yet")
+        return []
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable network cache {path}: {e}")
+        return []
+
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        logger.info("Ignoring network cache from another version")
+        return []
+
+    rows = data.get("networks")
+    if not isinstance(rows, list):
+        logger.warning(f"Ignoring network cache {path} without a list of networks")
+        return []
+
+    now = time.time()
+    networks = []
+    skipped = 0
+    for row in rows:
+        network = _parse_row(row)
+        if network is None:
+            skipped += 1
+        elif now - network.last_seen <= max_age:
+            networks.append(network)
+    if skipped:
+        logger.warning(f"Skipped {skipped} malformed rows in network cache {path}")
+
+    networks.sort(key=lambda network: network.last_seen, reverse=True)
+    logger.info("Loaded {} cached networks", len(networks))
+    return networks
+
+
+def write_cached_networks(networks: List[CachedNetwork]):
+    """Write the cache atomically, so a crash never leaves a torn file"""
+    path = get_cache_path()
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    # Rows instead of objects keep the file compact
+    data = {"version": CACHE_VERSION, "networks": [list(n) for n in networks]}
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".networks-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    logger.debug("Wrote {} networks to {}", len(networks), path)
+
+
+def networks_from_snapshot(snapshot) -> List[CachedNetwork]:
+    """Describe the strongest access point of every network in a snapshot"""
+    # Access points report last-seen on the boot clock, in seconds
+    boot_offset = time.time() - time.clock_gettime(time.CLOCK_BOOTTIME)
+    now = time.time()
+
+    networks = []
+    for ssid, records in snapshot.by_ssid.items():
+        record = records[0]
+        networks.append(
+            CachedNetwork(
+                ssid,
+                record.bssid,
+                record.strength,
+                record.security,
+                int(record.last_seen + boot_offset if record.last_seen >= 0 else now),
+                snapshot.is_active(ssid),
+            )
+        )
+    return networks
+
+
+def save_network_cache():
+    """Remember the current scan results, writing them off the main thread
+
+    The rows are read from the snapshot here, as libnm objects belong to the
+    main context, and only the file write goes to a worker. A newer save
+    supersedes one that has not run yet. Must be called from the main thread.
+    """
+    from .nmcli import get_scan_snapshot
+
+    networks = networks_from_snapshot(get_scan_snapshot())
+    get_executor().submit("network-cache", _save_network_cache, networks)
+
+
+def _save_network_cache(networks: List[CachedNetwork]):
+    try:
+        write_cached_networks(networks)
+    except OSError as e:
+        logger.warning(f"Could not write network cache: {e}")
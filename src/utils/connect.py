@@ -0,0 +1,405 @@
+import time
+from collections import deque, namedtuple
+from typing import Callable, List, Optional, Tuple
+
+import gi
+from loguru import logger
+
+gi.require_version("NM", "1.0")
+
+from gi.repository import NM, GLib  # noqa: E402
+
+from .backends import get_client  # noqa: E402
+from .connections import get_connection_index  # noqa: E402
+from .metrics import get_metrics  # noqa: E402
+from .snapshot import get_snapshot  # noqa: E402
+
+# Give up on an activation that has not finished after this long. The clock
+# starts once credentials are in, so time spent typing a password is not
+# counted.
+CONNECT_TIMEOUT_SECONDS = 90
+
+# Stages of a connection attempt, in the order they normally happen
+STAGE_LOOKUP = "lookup"
+STAGE_CREDENTIALS = "credentials"
+STAGE_ACTIVATE = "activate"
+STAGE_PREPARE = "prepare"
+STAGE_CONFIG = "config"
+STAGE_NEED_AUTH = "need-auth"
+STAGE_IP_CONFIG = "ip-config"
+
+# How an attempt ended
+OUTCOME_ACTIVATED = "activated"
+OUTCOME_FAILED = "failed"
+OUTCOME_CANCELLED = "cancelled"
+OUTCOME_TIMEOUT = "timeout"
+
+# Device states that mark the start of a stage. Association happens during
+# config, DHCP during ip-config.
+DEVICE_STAGES = {
+    NM.DeviceState.PREPARE: STAGE_PREPARE,
+    NM.DeviceState.CONFIG: STAGE_CONFIG,
+    NM.DeviceState.NEED_AUTH: STAGE_NEED_AUTH,
+    NM.DeviceState.IP_CONFIG: STAGE_IP_CONFIG,
+}
+
+# Outcome of an attempt. stages holds (stage, seconds) pairs in the order the
+# stages were entered, and total the seconds from start to finish.
+ConnectResult = namedtuple(
+    "ConnectResult", ["ssid", "outcome", "reason", "stages", "total"]
+)
+
+# Credentials providers are called as provider(ssid, callback) and must call
+# callback(password), or callback(None) to cancel, from the main thread
+CredentialsProvider = Callable[[str, Callable[[Optional[str]], None]], None]
+
+# Results of the latest attempts, newest last
+RECENT_RESULTS = 50
+_recent_results: deque = deque(maxlen=RECENT_RESULTS)
+
+
+def _nick(enum_type, value) -> str:
+    """Name an NM enum value for logs and error messages"""
+    try:
+        member = enum_type(value)
+    except ValueError:
+        return str(value)
+    return getattr(member, "value_nick", None) or getattr(member, "name", str(value))
+
+
+class ConnectAttempt:
+    """Asynchronous state machine connecting to one network
+
+    Goes through profile lookup, credentials (for new profiles of secured
+    networks), add/activate and then follows the device through prepare,
+    config, need-auth and ip-config until the active connection reports
+    activated or deactivated. Nothing blocks: every step continues from a
+    libnm callback or signal on the main loop. The time spent in each stage
+    is recorded, and the attempt can be cancelled or time out.
+
+    Must be used from the main thread.
+    """
+
+    def __init__(
+        self,
+        ssid: str,
+        credentials: CredentialsProvider,
+        on_finished: Optional[Callable[[ConnectResult], None]] = None,
+        on_stage: Optional[Callable[[str], None]] = None,
+        timeout: float = CONNECT_TIMEOUT_SECONDS,
+    ):
+        self.ssid = ssid
+        self.credentials = credentials
+        self.on_finished = on_finished
+        self.on_stage = on_stage
+        self.timeout = timeout
+
+        self.client = get_client()
+        self.stage: Optional[str] = None
+        self.result: Optional[ConnectResult] = None
+
+        self._started = 0.0
+        self._stage_started = 0.0
+        self._stages: List[Tuple[str, float]] = []
+        self._timeout_source_id = None
+        self._record = None
+        self._device = None
+        self._device_handler = None
+        self._active_conn = None
+        self._active_handler = None
+        self._new_profile = None
+
+    # Public API
+
+    def start(self):
+        """Begin connecting"""
+        logger.info("Connecting to {}", self.ssid)
+        self._started = time.monotonic()
+        self._enter(STAGE_LOOKUP)
+
+        try:
+            snapshot = get_snapshot(self.client)
+            record = snapshot.get_access_point(self.ssid)
+            if record is None:
+                self._finish(OUTCOME_FAILED, f"Network {self.ssid} not found")
+                return
+
+            # The strongest record comes from the device hearing it best
+            self._record = record
+            self._device = snapshot.get_device(record)
+            if len(snapshot.wifi_devices) > 1:
+                logger.info(
+                    "Connecting to {} on {}, seen at {}",
+                    self.ssid,
+                    record.iface,
+                    snapshot.get_radios(self.ssid),
+                )
+            profile = get_connection_index().find_for_network(
+                record.ssid_bytes, record.bssid
+            )
+        except Exception as e:
+            logger.exception(f"Error looking up {self.ssid}: {e}")
+            self._finish(OUTCOME_FAILED, str(e))
+            return
+
+        if profile is not None:
+            logger.info("Using existing connection for {}", self.ssid)
+            self._activate(profile)
+        elif record.is_secured:
+            self._enter(STAGE_CREDENTIALS)
+            self.credentials(self.ssid, self._on_credentials)
+        else:
+            self._add_profile(None)
+
+    def cancel(self):
+        """Stop the attempt, deactivating anything already started"""
+        if self.result is None:
+            logger.info("Cancelling connection to {}", self.ssid)
+            self._abort(OUTCOME_CANCELLED, "Cancelled")
+
+    def is_finished(self) -> bool:
+        return self.result is not None
+
+    # Steps
+
+    def _on_credentials(self, password: Optional[str]):
+        if self.result is not None:
+            return
+        if not password:
+            logger.info("Password entry cancelled")
+            self._finish(OUTCOME_CANCELLED, "Password entry cancelled")
+            return
+        self._add_profile(password)
+
+    def _add_profile(self, password: Optional[str]):
+        """Create and save a new profile for the network"""
+        connection = NM.SimpleConnection.new()
+        s_con = NM.SettingConnection.new()
+        s_con.set_property(NM.SETTING_CONNECTION_ID, self.ssid)
+        s_con.set_property(NM.SETTING_CONNECTION_TYPE, "802-11-wireless")
+
+        s_wifi = NM.SettingWireless.new()
+        s_wifi.set_property(
+            NM.SETTING_WIRELESS_SSID, GLib.Bytes.new(self._record.ssid_bytes)
+        )
+        s_wifi.set_property(NM.SETTING_WIRELESS_MODE, "infrastructure")
+
+        connection.add_setting(s_con)
+        connection.add_setting(s_wifi)
+
+        if password:
+            s_wsec = NM.SettingWirelessSecurity.new()
+            s_wsec.set_property(NM.SETTING_WIRELESS_SECURITY_KEY_MGMT, "wpa-psk")
+            s_wsec.set_property(NM.SETTING_WIRELESS_SECURITY_PSK, password)
+            connection.add_setting(s_wsec)
+
+        self._enter(STAGE_ACTIVATE)
+        self._start_timeout()
+        # Not cancellable: NetworkManager saves the profile either way, and
+        # only the result tells us what to delete if the attempt ended
+        self.client.add_connection_async(
+            connection, True, None, self._on_profile_added, None
+        )
+
+    def _on_profile_added(self, client, result, user_data):
+        try:
+            profile = client.add_connection_finish(result)
+        except GLib.Error as e:
+            if self.result is None:
+                logger.error(f"Failed to add connection: {e.message}")
+                self._finish(OUTCOME_FAILED, e.message)
+            return
+
+        if self.result is not None:
+            # Cancelled or timed out while the profile was being saved
+            logger.info("Deleting connection for {} added too late", self.ssid)
+            profile.delete_async(None, None, None)
+            return
+
+        self._new_profile = profile
+        self._activate(profile)
+
+    def _activate(self, profile):
+        """Ask NetworkManager to activate a profile on the chosen device"""
+        if self.stage != STAGE_ACTIVATE:
+            self._enter(STAGE_ACTIVATE)
+            self._start_timeout()
+
+        if self._device is not None:
+            self._device_handler = self._device.connect(
+                "state-changed", self._on_device_state_changed
+            )
+
+        self.client.activate_connection_async(
+            profile,
+            self._device,
+            self._record.path,
+            None,
+            self._on_activation_started,
+            None,
+        )
+
+    def _on_activation_started(self, client, result, user_data):
+        try:
+            active_conn = client.activate_connection_finish(result)
+        except GLib.Error as e:
+            if self.result is None:
+                logger.error(f"Failed to activate connection: {e.message}")
+                self._forget_new_profile()
+                self._finish(OUTCOME_FAILED, e.message)
+            return
+
+        if self.result is not None:
+            # Cancelled or timed out while the activation was being started
+            logger.info("Deactivating connection to {} started too late", self.ssid)
+            self._deactivate(active_conn)
+            return
+
+        self._active_conn = active_conn
+        self._active_handler = self._active_conn.connect(
+            "state-changed", self._on_active_state_changed
+        )
+        # It may have finished before we were listening
+        self._on_active_state_changed(self._active_conn, None, None)
+
+    # Signals
+
+    def _on_device_state_changed(self, device, new_state, old_state, reason):
+        stage = DEVICE_STAGES.get(new_state)
+        if stage is not None and self.result is None:
+            self._enter(stage)
+
+    def _on_active_state_changed(self, active_conn, state, reason):
+        if self.result is not None:
+            return
+
+        state = active_conn.get_state()
+        if state == NM.ActiveConnectionState.ACTIVATED:
+            self._finish(OUTCOME_ACTIVATED, None)
+
+        elif state == NM.ActiveConnectionState.DEACTIVATED:
+            nick = _nick(NM.ActiveConnectionStateReason, reason) if reason else ""
+            message = f"Activation failed ({nick})" if nick else "Activation failed"
+            if reason == NM.ActiveConnectionStateReason.NO_SECRETS:
+                message = "Invalid password"
+                self._forget_new_profile()
+            self._finish(OUTCOME_FAILED, message)
+
+    def _on_timeout(self):
+        self._timeout_source_id = None
+        if self.result is None:
+            logger.warning(f"Connecting to {self.ssid} timed out in {self.stage}")
+            self._abort(OUTCOME_TIMEOUT, f"Timed out during {self.stage}")
+        return False
+
+    # Bookkeeping
+
+    def _enter(self, stage: str):
+        """Close the current stage and start timing the next"""
+        now = time.monotonic()
+        if self.stage is not None:
+            self._stages.append((self.stage, now - self._stage_started))
+        self.stage = stage
+        self._stage_started = now
+        logger.debug("Connection to {} entered stage {}", self.ssid, stage)
+
+        if self.on_stage is not None:
+            try:
+                self.on_stage(stage)
+            except Exception as e:
+                logger.exception(f"Error in connection stage callback: {e}")
+
+    def _start_timeout(self):
+        if self._timeout_source_id is None:
+            self._timeout_source_id = GLib.timeout_add_seconds(
+                int(self.timeout), self._on_timeout
+            )
+
+    def _abort(self, outcome: str, reason: str):
+        """Undo a started activation and the profile this attempt created
+
+        A profile or activation still in flight is undone by its callback
+        once it arrives.
+        """
+        if self._active_conn is not None:
+            self._deactivate(self._active_conn)
+        self._forget_new_profile()
+        self._finish(outcome, reason)
+
+    def _deactivate(self, active_conn):
+        self.client.deactivate_connection_async(
+            active_conn, None, self._on_deactivated, None
+        )
+
+    def _on_deactivated(self, client, result, user_data):
+        try:
+            client.deactivate_connection_finish(result)
+        except GLib.Error as e:
+            logger.warning(f"Failed to deactivate connection: {e.message}")
+
+    def _forget_new_profile(self):
+        """Delete a profile this attempt created, so a retry asks again"""
+        if self._new_profile is not None:
+            self._new_profile.delete_async(None, None, None)
+            self._new_profile = None
+
+    def _finish(self, outcome: str, reason: Optional[str]):
+        now = time.monotonic()
+        if self.stage is not None:
+            self._stages.append((self.stage, now - self._stage_started))
+
+        self.result = ConnectResult(
+            self.ssid, outcome, reason, list(self._stages), now - self._started
+        )
+        _recent_results.append(self.result)
+
+        metrics = get_metrics()
+        metrics.counter(f"connect.{outcome}").inc()
+        metrics.histogram("connect.total", "Connect request to outcome").observe(
+            self.result.total
+        )
+        for stage, seconds in self._stages:
+            metrics.histogram(f"connect.stage.{stage}").observe(seconds)
+
+        if self._timeout_source_id is not None:
+            GLib.source_remove(self._timeout_source_id)
+            self._timeout_source_id = None
+        if self._device_handler is not None:
+            self._device.disconnect(self._device_handler)
+            self._device_handler = None
+        if self._active_handler is not None:
+            self._active_conn.disconnect(self._active_handler)
+            self._active_handler = None
+
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self._stages)
+        logger.info(
+            "Connection to {} {} after {:.2f}s{}: {}",
+            self.ssid,
+            outcome,
+            self.result.total,
+            f" ({reason})" if reason else "",
+            stages,
+        )
+
+        if self.on_finished is not None:
+            try:
+                self.on_finished(self.result)
+            except Exception as e:
+                logger.exception(f"Error in connection finished callback: {e}")
+
+
+def start_connection(
+    ssid: str,
+    credentials: CredentialsProvider,
+    on_finished: Optional[Callable[[ConnectResult], None]] = None,
+    on_stage: Optional[Callable[[str], None]] = None,
+) -> ConnectAttempt:
+    """Start connecting to a network and return the attempt"""
+    attempt = ConnectAttempt(ssid, credentials, on_finished, on_stage)
+    attempt.start()
+    return attempt
+
+
+def get_recent_results() -> List[ConnectResult]:
+    """Get the results of the latest connection attempts, newest last"""
+    return list(_recent_results)
@@ -0,0 +1,191 @@
+from typing import Dict, List, Optional
+
+import gi
+from loguru import logger
+
+gi.require_version("NM", "1.0")
+
+from gi.repository import NM  # noqa: E402
+
+from .backends import get_client  # noqa: E402
+
+
+def _wireless_keys(conn):
+    """Get (SSID bytes, locked BSSID) of a Wi-Fi profile, either may be None"""
+    if conn.get_connection_type() != NM.SETTING_WIRELESS_SETTING_NAME:
+        return None, None
+
+    s_wifi = conn.get_setting_wireless()
+    if s_wifi is None:
+        return None, None
+
+    ssid_gbytes = s_wifi.get_ssid()
+    ssid = ssid_gbytes.get_data() if ssid_gbytes else None
+    bssid = s_wifi.get_bssid()
+    return ssid or None, bssid.upper() if bssid else None
+
+
+class ConnectionIndex:
+    """Saved profiles indexed by SSID bytes, UUID and BSSID lock
+
+    Built once from client.get_connections() and kept current from the
+    client's connection-added and connection-removed signals and each
+    profile's changed signal, so finding the profile for a network is a
+    dictionary hit instead of a decode of every saved profile.
+
+    Must be used from the main thread, where its signals arrive.
+    """
+
+    def __init__(self, client):
+        logger.debug("Initializing ConnectionIndex")
+        self.client = client
+
+        # Object path -> (profile, changed handler id, indexed keys)
+        self._connections: Dict[str, tuple] = {}
+        # SSID bytes -> [profiles]
+        self._by_ssid: Dict[bytes, List] = {}
+        # UUID -> profile
+        self._by_uuid: Dict[str, object] = {}
+        # Locked BSSID -> [profiles]
+        self._by_bssid: Dict[str, List] = {}
+
+        self._client_handlers = [
+            client.connect("connection-added", self._on_connection_added),
+            client.connect("connection-removed", self._on_connection_removed),
+        ]
+
+        for conn in client.get_connections():
+            self._add(conn)
+
+        logger.info("ConnectionIndex tracking {} profiles", len(self._connections))
+
+    # Public API
+
+    def find_for_network(self, ssid: bytes, bssid: Optional[str] = None):
+        """Get the profile to use for a network, or None
+
+        A profile locked to the access point's BSSID wins, then one without a
+        BSSID lock. Profiles locked to another BSSID are never chosen.
+        """
+        candidates = self._by_ssid.get(ssid, ())
+        unlocked = None
+        for conn in candidates:
+            locked = self._connections[conn.get_path()][2][1]
+            if locked is None:
+                unlocked = unlocked or conn
+            elif bssid and locked == bssid.upper():
+                return conn
+        return unlocked
+
+    def get_by_ssid(self, ssid: bytes) -> List:
+        """Get every Wi-Fi profile for an SSID"""
+        return list(self._by_ssid.get(ssid, ()))
+
+    def get_by_uuid(self, uuid: str):
+        """Get the profile with a UUID, or None"""
+        return self._by_uuid.get(uuid)
+
+    def get_by_bssid(self, bssid: str) -> List:
+        """Get the profiles locked to a BSSID"""
+        return list(self._by_bssid.get(bssid.upper(), ()))
+
+    def __len__(self):
+        return len(self._connections)
+
+    def close(self):
+        """Disconnect from every libnm signal"""
+        for handler_id in self._client_handlers:
+            self.client.disconnect(handler_id)
+        self._client_handlers = []
+
+        for conn, handler_id, _keys in self._connections.values():
+            conn.disconnect(handler_id)
+        self._connections.clear()
+        self._by_ssid.clear()
+        self._by_uuid.clear()
+        self._by_bssid.clear()
+
+    # Index maintenance
+
+    def _add(self, conn):
+        path = conn.get_path()
+        handler_id = conn.connect("changed", self._on_connection_changed)
+        if path in self._connections:
+            conn.disconnect(handler_id)
+            return
+        keys = self._index(conn)
+        self._connections[path] = (conn, handler_id, keys)
+
+    def _remove(self, conn):
+        entry = self._connections.pop(conn.get_path(), None)
+        if entry is None:
+            return
+        conn, handler_id, keys = entry
+        self._unindex(conn, keys)
+        conn.disconnect(handler_id)
+
+    def _index(self, conn):
+        """Add a profile to the lookup tables and return its keys"""
+        ssid, bssid = _wireless_keys(conn)
+        uuid = conn.get_uuid()
+
+        if ssid:
+            self._by_ssid.setdefault(ssid, []).append(conn)
+        if bssid:
+            self._by_bssid.setdefault(bssid, []).append(conn)
+        if uuid:
+            self._by_uuid[uuid] = conn
+
+        return ssid, bssid, uuid
+
+    def _unindex(self, conn, keys):
+        """Remove a profile from the lookup tables under its old keys"""
+        ssid, bssid, uuid = keys
+
+        for table, key in ((self._by_ssid, ssid), (self._by_bssid, bssid)):
+            profiles = table.get(key)
+            if profiles and conn in profiles:
+                profiles.remove(conn)
+                if not profiles:
+                    del table[key]
+
+        if uuid and self._by_uuid.get(uuid) is conn:
+            del self._by_uuid[uuid]
+
+    def _on_connection_added(self, client, conn):
+        logger.debug("ConnectionIndex adding profile {}", conn.get_id())
+        self._add(conn)
+
+    def _on_connection_removed(self, client, conn):
+        logger.debug("ConnectionIndex removing profile {}", conn.get_id())
+        self._remove(conn)
+
+    def _on_connection_changed(self, conn):
+        """Reindex a profile whose settings changed"""
+        entry = self._connections.get(conn.get_path())
+        if entry is None:
+            return
+        _conn, handler_id, keys = entry
+        self._unindex(conn, keys)
+        self._connections[conn.get_path()] = (
+            conn,
+            handler_id,
+            self._index(conn),
+        )
+
+
+_index: Optional[ConnectionIndex] = None
+
+
+def get_connection_index() -> ConnectionIndex:
+    """Get the shared connection index, creating it on first use
+
+    Must be called from the main thread. Best created once the client is
+    ready, so the first connection attempt finds it built.
+    """
+    global _index
+
+    if _index is None:
+        _index = ConnectionIndex(get_client())
+
+    return _index
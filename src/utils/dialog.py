@@ -35,8 +35,63 @@ def show_error_dialog_with_callback(parent, message, completed_event):
     return False
 
 
+def request_password(parent, ssid, callback):
+    """Ask for a network password without blocking
+
+    Must be called from the main thread. callback is called with the
+    password entered, or None if the dialog was cancelled.
+
+    Args:
+        parent: Parent window
+        ssid: Network SSID to connect to
+        callback: Called with the password or None
+    """
+    dialog = Adw.MessageDialog.new(
+        parent,
+        f"Enter Password for {ssid}",
+        "Please enter the network password to connect.",
+    )
+
+    # Add buttons
+    dialog.add_response("cancel", "Cancel")
+    dialog.add_response("connect", "Connect")
+    dialog.set_close_response("cancel")
+    dialog.set_default_response("connect")
+
+    # Create password entry
+    password_entry = Gtk.Entry()
+    password_entry.set_visibility(False)
+    password_entry.set_input_purpose(Gtk.InputPurpose.PASSWORD)
+    password_entry.set_hexpand(True)
+
+    # Create show/hide password toggle
+    show_password = Gtk.CheckButton(label="Show Password")
+    show_password.connect(
+        "toggled", lambda btn: password_entry.set_visibility(btn.get_active())
+    )
+
+    # Create container for entry and checkbox
+    content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+    content_box.set_spacing(10)
+    content_box.append(password_entry)
+    content_box.append(show_password)
+
+    # Set custom widget
+    dialog.set_extra_child(content_box)
+
+    def on_response(dialog, response):
+        password = password_entry.get_text() if response == "connect" else None
+        dialog.destroy()
+        callback(password)
+
+    dialog.connect("response", on_response)
+    dialog.present()
+
+
 def show_password_dialog(parent, ssid):
-    """Show a password dialog for network connection
+    """Show a password dialog for network connection and wait for it
+
+    Blocks the calling thread, so it must not be called from the main thread.
 
     Args:
         parent: Parent window
@@ -48,48 +103,8 @@ def show_password_dialog(parent, ssid):
     result_queue = queue.Queue()
 
     def create_dialog():
-        dialog = Adw.MessageDialog.new(
-            parent,
-            f"Enter Password for {ssid}",
-            "Please enter the network password to connect.",
-        )
-
-        # Add buttons
-        dialog.add_response("cancel", "Cancel")
-        dialog.add_response("connect", "Connect")
-        dialog.set_close_response("cancel")
-        dialog.set_default_response("connect")
-
-        # Create password entry
-        password_entry = Gtk.Entry()
-        password_entry.set_visibility(False)
-        password_entry.set_input_purpose(Gtk.InputPurpose.PASSWORD)
-        password_entry.set_hexpand(True)
-
-        # Create show/hide password toggle
-        show_password = Gtk.CheckButton(label="Show Password")
-        show_password.connect(
-            "toggled", lambda btn: password_entry.set_visibility(btn.get_active())
-        )
-
-        # Create container for entry and checkbox
-        content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        content_box.set_spacing(10)
-        content_box.append(password_entry)
-        content_box.append(show_password)
-
-        # Set custom widget
-        dialog.set_extra_child(content_box)
-
-        def on_response(dialog, response):
-            if response == "connect":
-                result_queue.put(password_entry.get_text())
-            else:
-                result_queue.put(None)
-            dialog.destroy()
-
-        dialog.connect("response", on_response)
-        dialog.present()
+        request_password(parent, ssid, result_queue.put)
+        return False
 
     def dialog_thread():
         GLib.idle_add(create_dialog)
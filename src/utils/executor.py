@@ -0,0 +1,144 @@
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from gi.repository import GLib
+from loguru import logger
+
+# Upper bound on worker threads shared by all widgets
+MAX_WORKERS = 4
+
+
+class KeyedExecutor:
+    """Bounded worker pool with single-flight requests per key
+
+    Every request is submitted under a key, such as "network-details". A newer
+    request for the same key supersedes the older one: if the older one has
+    not started it is cancelled, and if it is already running its result is
+    dropped instead of being handed to the main thread. Results of current
+    requests are delivered to their callback on the main loop.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        logger.debug("Initializing KeyedExecutor with {} workers", max_workers)
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="komodo-worker"
+        )
+        self._lock = threading.Lock()
+        self._tokens = itertools.count(1)
+        self._latest: Dict[Hashable, int] = {}
+        self._futures: Dict[Hashable, Future] = {}
+        self._stats = {"submitted": 0, "cancelled": 0, "dropped": 0, "completed": 0}
+
+    def submit(
+        self,
+        key: Hashable,
+        fn: Callable,
+        *args,
+        callback: Optional[Callable[[Any], None]] = None,
+    ) -> Future:
+        """Run fn(*args) on a worker, superseding earlier requests for key"""
+        with self._lock:
+            token = next(self._tokens)
+            self._latest[key] = token
+            self._stats["submitted"] += 1
+
+            previous = self._futures.get(key)
+            if previous is not None and previous.cancel():
+                self._stats["cancelled"] += 1
+                logger.debug("Cancelled queued request for {}", key)
+
+            future = self._pool.submit(self._run, key, token, fn, args, callback)
+            self._futures[key] = future
+
+        return future
+
+    def cancel(self, key: Hashable):
+        """Supersede any request for key without starting a new one"""
+        with self._lock:
+            self._latest.pop(key, None)
+            future = self._futures.pop(key, None)
+            if future is not None and future.cancel():
+                self._stats["cancelled"] += 1
+
+    def is_current(self, key: Hashable, token: int) -> bool:
+        """Whether token belongs to the latest request for key"""
+        with self._lock:
+            return self._latest.get(key) == token
+
+    def get_stats(self) -> dict:
+        """Get request counters and the number of live worker threads"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["threads"] = sum(
+            thread.name.startswith("komodo-worker") for thread in threading.enumerate()
+        )
+        return stats
+
+    def shutdown(self):
+        """Stop accepting work and drop queued requests"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, key, token, fn, args, callback):
+        """Worker side: skip superseded work and drop superseded results"""
+        if not self.is_current(key, token):
+            with self._lock:
+                self._stats["cancelled"] += 1
+            return None
+
+        try:
+            result = fn(*args)
+        except Exception as e:
+            logger.exception(f"Error in background request for {key}: {e}")
+            self._finish(key, token)
+            return None
+
+        if callback is None:
+            self._finish(key, token)
+        elif self.is_current(key, token):
+            GLib.idle_add(self._deliver, key, token, callback, result)
+        else:
+            self._drop(key)
+
+        return result
+
+    def _deliver(self, key, token, callback, result):
+        """Main loop side: hand over the result unless superseded meanwhile"""
+        if self.is_current(key, token):
+            self._finish(key, token)
+            try:
+                callback(result)
+            except Exception as e:
+                logger.exception(f"Error delivering result for {key}: {e}")
+        else:
+            self._drop(key)
+
+        return False
+
+    def _finish(self, key, token):
+        with self._lock:
+            self._stats["completed"] += 1
+            if self._latest.get(key) == token:
+                del self._latest[key]
+                self._futures.pop(key, None)
+
+    def _drop(self, key):
+        with self._lock:
+            self._stats["dropped"] += 1
+        logger.debug("Dropped stale result for {}", key)
+
+
+_executor: Optional[KeyedExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> KeyedExecutor:
+    """Get the executor shared by all widgets"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = KeyedExecutor()
+
+    return _executor
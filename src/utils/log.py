@@ -0,0 +1,287 @@
+import os
+import queue
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from gi.repository import GLib
+from loguru import logger
+
+# Lowest level written anywhere, overridden by KOMODO_LOG_LEVEL
+DEFAULT_LEVEL = "INFO"
+
+# Log file size at which it is rotated to komodo.log.1
+MAX_LOG_BYTES = 10 * 1024 * 1024
+
+# Formatted messages waiting for the writer thread; more are dropped
+QUEUE_SIZE = 4096
+
+# The writer flushes at most this often, batching writes to disk
+FLUSH_INTERVAL_SECONDS = 2.0
+
+# Messages below WARNING allowed per call site per RATE_WINDOW_SECONDS
+RATE_LIMIT = 20
+RATE_WINDOW_SECONDS = 10.0
+
+LOG_FORMAT = (
+    "{time:YYYY-MM-DD HH:mm:ss} | {level} | {module}:{function}:{line} | {message}"
+)
+
+
+def get_log_path() -> str:
+    """Get the log file path under the XDG state directory"""
+    return os.path.join(GLib.get_user_state_dir(), "komodo", "komodo.log")
+
+
+class RateLimiter:
+    """Sampling and rate limiting of log records, per call site
+
+    Records at WARNING and above always pass. Below that, a call site sampled
+    with N is kept once every N times it is reached, and each call site may
+    pass at most RATE_LIMIT records per window. The next record to pass says
+    how many were suppressed.
+
+    Calls made through sampled(N) are checked before loguru builds the record,
+    so a dropped call costs no formatting. The limiter is also installed as
+    the log file's filter, where it checks every other record; by then loguru
+    has already formatted the message, so there it only saves sink I/O.
+    """
+
+    def __init__(self, limit: int = RATE_LIMIT, window: float = RATE_WINDOW_SECONDS):
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        # Call site -> [window start, passed in window, suppressed, seen]
+        self._sites: Dict[Tuple[str, str, int], list] = {}
+        self.suppressed = 0
+
+    def check(self, site: Tuple[str, str, int], sample: int = 1) -> Optional[int]:
+        """Count a call at a site, returns None to drop it
+
+        Otherwise returns how many records from the site were suppressed
+        since the last one that passed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None:
+                state = self._sites[site] = [now, 0, 0, 0]
+
+            state[3] += 1
+            if state[3] % sample:
+                return None
+
+            if now - state[0] >= self.window:
+                state[0], state[1] = now, 0
+            if state[1] >= self.limit:
+                state[2] += 1
+                self.suppressed += 1
+                return None
+
+            state[1] += 1
+            suppressed, state[2] = state[2], 0
+        return suppressed
+
+    def __call__(self, record) -> bool:
+        if record["level"].no >= 30 or record["extra"].get("rate_checked"):
+            return True
+
+        site = (record["name"], record["function"], record["line"])
+        suppressed = self.check(site)
+        if suppressed is None:
+            return False
+        if suppressed:
+            record["message"] += f" ({suppressed} similar messages suppressed)"
+        return True
+
+
+class SampledLogger:
+    """Logger for hot paths that drops records before loguru formats them
+
+    Trace, debug and info calls are sampled and rate limited per call site by
+    the RateLimiter set up by setup_logging(), ahead of the loguru call.
+    Warnings and errors always go through.
+    """
+
+    def __init__(self, every: int):
+        self.every = every
+        self._logger = logger.bind(rate_checked=True).opt(depth=1)
+
+    def _check(self, message: str) -> Optional[str]:
+        """The message to log for the caller's caller, or None to drop it"""
+        if _limiter is None:
+            return message
+
+        frame = sys._getframe(2)
+        site = (frame.f_globals["__name__"], frame.f_code.co_name, frame.f_lineno)
+        suppressed = _limiter.check(site, self.every)
+        if suppressed is None:
+            return None
+        if suppressed:
+            message += f" ({suppressed} similar messages suppressed)"
+        return message
+
+    def trace(self, message: str, *args, **kwargs):
+        message = self._check(message)
+        if message is not None:
+            self._logger.trace(message, *args, **kwargs)
+
+    def debug(self, message: str, *args, **kwargs):
+        message = self._check(message)
+        if message is not None:
+            self._logger.debug(message, *args, **kwargs)
+
+    def info(self, message: str, *args, **kwargs):
+        message = self._check(message)
+        if message is not None:
+            self._logger.info(message, *args, **kwargs)
+
+    def warning(self, message: str, *args, **kwargs):
+        self._logger.warning(message, *args, **kwargs)
+
+    def error(self, message: str, *args, **kwargs):
+        self._logger.error(message, *args, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def sampled(every: int) -> SampledLogger:
+    """Get a logger whose records below WARNING are kept once every N calls
+
+    Meant for messages logged on every scan or model update, e.g.
+    sampled(10).debug("Publishing {} network deltas", len(deltas)). Dropped
+    calls return before loguru builds a record or formats the message.
+    """
+    return SampledLogger(every)
+
+
+class QueueSink:
+    """Log sink that hands messages to a writer thread
+
+    The calling thread only puts the formatted message on a bounded queue and
+    never waits: if the writer falls behind, messages are dropped and
+    counted. The writer appends to the log file in batches, flushes at most
+    every FLUSH_INTERVAL_SECONDS and rotates the file at MAX_LOG_BYTES.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = MAX_LOG_BYTES,
+        queue_size: int = QUEUE_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(queue_size)
+        self._file = None
+        self._thread = threading.Thread(
+            target=self._run, name="komodo-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message: str):
+        """Queue a formatted message, dropping it if the queue is full"""
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Write out what is queued and end the writer thread"""
+        try:
+            self._queue.put(None, timeout=1)
+        except queue.Full:
+            return
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                message = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                message = ""
+
+            if message is None:
+                self._close()
+                return
+
+            try:
+                if message:
+                    self._write(message)
+                    # Drain whatever else is waiting in one go
+                    while True:
+                        try:
+                            message = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if message is None:
+                            self._close()
+                            return
+                        self._write(message)
+
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    if self._file is not None:
+                        self._file.flush()
+                    last_flush = time.monotonic()
+            except OSError as e:
+                print(f"Komodo log writer failed: {e}", file=sys.stderr)
+                self._file = None
+
+    def _write(self, message: str):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+
+        self._file.write(message)
+        if self._file.tell() >= self.max_bytes:
+            self._file.close()
+            os.replace(self.path, f"{self.path}.1")
+            self._file = None
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_sink: Optional[QueueSink] = None
+_limiter: Optional[RateLimiter] = None
+
+
+def setup_logging(level: Optional[str] = None):
+    """Send log records to stderr and, through a QueueSink, to the log file
+
+    Records below level are discarded by loguru before their message is
+    formatted, so debug calls cost almost nothing unless KOMODO_LOG_LEVEL
+    asks for them.
+    """
+    global _sink, _limiter
+
+    level = (level or os.environ.get("KOMODO_LOG_LEVEL") or DEFAULT_LEVEL).upper()
+
+    logger.remove()
+    _limiter = RateLimiter()
+    _sink = QueueSink(get_log_path())
+    logger.add(sys.stderr, level="WARNING")
+    logger.add(_sink.write, level=level, format=LOG_FORMAT, filter=_limiter)
+    logger.info("Logging at {} to {}", level, _sink.path)
+
+
+def shutdown_logging():
+    """Flush the log file and stop the writer thread"""
+    if _sink is not None:
+        logger.remove()
+        _sink.stop()
+
+
+def get_logging_stats() -> dict:
+    """Get the number of records suppressed and messages dropped"""
+    return {
+        "suppressed": _limiter.suppressed if _limiter else 0,
+        "dropped": _sink.dropped if _sink else 0,
+    }
@@ -0,0 +1,373 @@
+import asyncio
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+from gi.repository import GLib
+from loguru import logger
+
+from .executor import get_executor
+from .log import get_logging_stats
+from .tasks import get_tasks
+
+# Upper bounds of the latency histogram buckets, in seconds, roughly three per
+# decade from 50 µs to a minute; slower observations land in a last bucket
+LATENCY_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+# How often the main loop probe measures the idle backlog
+PROBE_INTERVAL_SECONDS = 1
+
+
+class Counter:
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+    def to_dict(self) -> dict:
+        return {"value": self.value}
+
+
+class Gauge:
+    """Value that goes up and down, set directly or read from a function"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        read: Optional[Callable[[], float]] = None,
+    ):
+        self.name = name
+        self.description = description
+        self.read = read
+        self._value = 0
+
+    def set(self, value: float):
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        if self.read is None:
+            return self._value
+        try:
+            return self.read()
+        except Exception as e:
+            logger.warning(f"Error reading gauge {self.name}: {e}")
+            return 0
+
+    def to_dict(self) -> dict:
+        return {"value": self.value}
+
+
+class Histogram:
+    """Latency distribution in fixed buckets
+
+    Observing is a bisect and a few additions, with memory fixed by the
+    bucket count. Percentiles are estimated as the upper bound of the bucket
+    they fall in, capped at the largest observation.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str = "", buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if self.minimum is None or seconds < self.minimum:
+                self.minimum = seconds
+            if self.maximum is None or seconds > self.maximum:
+                self.maximum = seconds
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Estimate the value below which fraction of observations fall"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = fraction * self.count
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    if index < len(self.buckets):
+                        return min(self.buckets[index], self.maximum)
+                    return self.maximum
+            return self.maximum
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            count, total = self.count, self.total
+            minimum, maximum = self.minimum, self.maximum
+            buckets = {
+                str(bound): n for bound, n in zip(self.buckets, self.counts) if n
+            }
+            if self.counts[-1]:
+                buckets["+Inf"] = self.counts[-1]
+
+        return {
+            "count": count,
+            "sum": total,
+            "min": minimum,
+            "max": maximum,
+            "mean": total / count if count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and latency histograms, by name
+
+    Metrics are created on first use, so instrumenting code is a single
+    call. Names are dotted, such as "nmcli.get_network_info"; the
+    diagnostics page and the JSON export list them sorted by name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+        self.started = time.time()
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get(Counter, name, description)
+
+    def gauge(
+        self,
+        name: str,
+        description: str = "",
+        read: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        gauge = self._get(Gauge, name, description)
+        if read is not None:
+            gauge.read = read
+        return gauge
+
+    def histogram(self, name: str, description: str = "") -> Histogram:
+        return self._get(Histogram, name, description)
+
+    def get_metrics(self) -> List[Metric]:
+        """Get every metric, sorted by name"""
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def to_dict(self) -> dict:
+        """Get the current value of every metric"""
+        return {
+            "started": self.started,
+            "exported": time.time(),
+            "metrics": {
+                metric.name: {"type": metric.kind, **metric.to_dict()}
+                for metric in self.get_metrics()
+            },
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def export(self, path: Optional[str] = None) -> str:
+        """Write the metrics as JSON and return the file path"""
+        if path is None:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(
+                GLib.get_user_state_dir(), "komodo", f"metrics-{stamp}.json"
+            )
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+        logger.info("Exported metrics to {}", path)
+        return path
+
+    def _get(self, kind, name: str, description: str):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = kind(name, description)
+            elif not isinstance(metric, kind):
+                raise TypeError(f"Metric {name} is a {metric.kind}, not a {kind.kind}")
+            return metric
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the metrics registry shared by the whole application"""
+    global _registry
+
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+
+    return _registry
+
+
+def timed(name: str):
+    """Decorator recording the latency and errors of a function
+
+    Observes the duration of every call in the "<name>" histogram and counts
+    raised exceptions in "<name>.errors". Works on plain functions and on
+    coroutine functions, where the time awaited counts.
+    """
+
+    def decorate(fn):
+        registry = get_metrics()
+        histogram = registry.histogram(name)
+        errors = registry.counter(f"{name}.errors")
+
+        if asyncio.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+
+        else:
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+class MainLoopProbe:
+    """Measures how long idle callbacks wait to run on the main loop
+
+    Each probe() queues an idle callback and the delay until it runs is
+    observed in "mainloop.idle_latency". A long delay means a backlog of
+    idle_add work, or a handler blocking the loop. The probe owns no timer:
+    the Advanced page runs it every PROBE_INTERVAL_SECONDS as a
+    RefreshScheduler job, so it only wakes the process while that page is
+    shown.
+    """
+
+    def __init__(self):
+        registry = get_metrics()
+        self.latency = registry.histogram(
+            "mainloop.idle_latency", "Delay before an idle callback runs"
+        )
+        self.pending = registry.gauge(
+            "mainloop.idle_pending", "Probe callbacks queued but not yet run"
+        )
+        self._pending = 0
+
+    def probe(self):
+        """Queue one idle callback and observe its delay when it runs"""
+        self._pending += 1
+        self.pending.set(self._pending)
+        GLib.idle_add(self._on_idle, time.perf_counter())
+
+    def _on_idle(self, queued: float):
+        self.latency.observe(time.perf_counter() - queued)
+        self._pending -= 1
+        self.pending.set(self._pending)
+        return False
+
+
+_probe: Optional[MainLoopProbe] = None
+
+
+def get_main_loop_probe() -> MainLoopProbe:
+    """Get the main loop probe, registering it and the thread and task gauges
+
+    Must be called from the main thread.
+    """
+    global _probe
+
+    if _probe is not None:
+        return _probe
+
+    registry = get_metrics()
+    registry.gauge("threads.total", "Live Python threads", threading.active_count)
+    registry.gauge(
+        "threads.workers",
+        "Live executor worker threads",
+        lambda: get_executor().get_stats()["threads"],
+    )
+    registry.gauge(
+        "tasks.running",
+        "Running asyncio tasks",
+        lambda: get_tasks().get_stats()["running"],
+    )
+    registry.gauge(
+        "log.dropped",
+        "Log messages dropped by a full queue",
+        lambda: get_logging_stats()["dropped"],
+    )
+    registry.gauge(
+        "log.suppressed",
+        "Log records suppressed by rate limiting",
+        lambda: get_logging_stats()["suppressed"],
+    )
+    _probe = MainLoopProbe()
+    return _probe
@@ -0,0 +1,336 @@
+from collections import deque, namedtuple
+from typing import Callable, Dict, Iterator, List, Optional
+
+import gi
+from loguru import logger
+
+gi.require_version("NM", "1.0")
+
+from gi.repository import GLib  # noqa: E402
+
+from .backends import get_client, is_wifi_device  # noqa: E402
+from .access_point import decode_ssid  # noqa: E402
+from .log import sampled  # noqa: E402
+from .metrics import get_metrics  # noqa: E402
+from .signal_history import get_signal_history  # noqa: E402
+from .snapshot import invalidate_snapshot  # noqa: E402
+
+# Kinds of change published to subscribers
+DELTA_ADDED = "added"
+DELTA_REMOVED = "removed"
+DELTA_CHANGED = "changed"
+
+# A visible network as seen by the model
+NetworkEntry = namedtuple("NetworkEntry", ["ssid", "strength", "is_active"])
+
+# A single change to the set of visible networks
+NetworkDelta = namedtuple("NetworkDelta", ["kind", "ssid", "strength", "is_active"])
+
+
+class NetworkModel:
+    """Registry of visible networks kept current from libnm signals
+
+    The model walks the Wi-Fi devices once on construction and from then on
+    only reacts to NetworkManager signals. Changes are collected per SSID and
+    published to subscribers as a single batch of deltas once the main loop
+    is idle, so a burst of strength updates results in one notification.
+    """
+
+    def __init__(self, client):
+        logger.debug("Initializing NetworkModel")
+        self.client = client
+
+        # AP object path -> (ssid, access point, strength handler id, device path)
+        self._access_points = {}
+        # SSID -> {AP object path: strength}
+        self._networks: Dict[str, Dict[str, int]] = {}
+        # Device object path -> (device, [handler ids])
+        self._devices = {}
+
+        self._active_ssid = ""
+        self._subscribers: Dict[int, Callable[[List[NetworkDelta]], None]] = {}
+        self._next_subscriber_id = 1
+        self._pending: Dict[str, str] = {}
+        self._flush_source_id = None
+
+        # Every strength reading also goes into the per-BSSID history
+        self._signal_history = get_signal_history()
+
+        # Follow devices and active connections coming and going
+        self._client_handlers = [
+            client.connect("device-added", self._on_device_added),
+            client.connect("device-removed", self._on_device_removed),
+            client.connect("active-connection-added", self._on_active_changed),
+            client.connect("active-connection-removed", self._on_active_changed),
+        ]
+
+        for dev in client.get_devices():
+            self._add_device(dev)
+
+        self._update_active()
+
+        # The initial walk is the current state, not a change
+        self._pending.clear()
+        logger.info("NetworkModel tracking {} networks", len(self._networks))
+
+    # Public API
+
+    def get_networks(self) -> List[NetworkEntry]:
+        """Get the current registry contents"""
+        return [
+            NetworkEntry(ssid, max(strengths.values()), ssid == self._active_ssid)
+            for ssid, strengths in self._networks.items()
+        ]
+
+    def get_network_names(self) -> List[str]:
+        """Get the SSIDs of all visible networks"""
+        return list(self._networks)
+
+    def get_active_network(self) -> str:
+        """Get the SSID of the active network, or an empty string"""
+        return self._active_ssid
+
+    def subscribe(self, callback: Callable[[List[NetworkDelta]], None]) -> int:
+        """Register a callback receiving batches of deltas, returns its id"""
+        subscriber_id = self._next_subscriber_id
+        self._next_subscriber_id += 1
+        self._subscribers[subscriber_id] = callback
+        logger.debug("NetworkModel subscriber {} added", subscriber_id)
+        return subscriber_id
+
+    def unsubscribe(self, subscriber_id: int):
+        """Remove a callback registered with subscribe()"""
+        self._subscribers.pop(subscriber_id, None)
+        logger.debug("NetworkModel subscriber {} removed", subscriber_id)
+
+    def watch(
+        self, context: Optional[GLib.MainContext] = None
+    ) -> Iterator[NetworkDelta]:
+        """Yield the current networks as additions, then every later delta
+
+        The generator iterates the given (or default) main context while it
+        waits, so it can drive a plain loop without a running GLib.MainLoop.
+        """
+        context = context or GLib.MainContext.default()
+        pending = deque()
+        subscriber_id = self.subscribe(pending.extend)
+
+        try:
+            for entry in self.get_networks():
+                yield NetworkDelta(DELTA_ADDED, *entry)
+
+            while True:
+                while not pending:
+                    context.iteration(True)
+                yield pending.popleft()
+
+        finally:
+            self.unsubscribe(subscriber_id)
+
+    def close(self):
+        """Disconnect from every libnm signal"""
+        logger.debug("Closing NetworkModel")
+        for handler_id in self._client_handlers:
+            self.client.disconnect(handler_id)
+        self._client_handlers = []
+
+        for path in list(self._devices):
+            self._remove_device_path(path)
+
+        if self._flush_source_id:
+            GLib.source_remove(self._flush_source_id)
+            self._flush_source_id = None
+
+        self._subscribers.clear()
+
+    # Device tracking
+
+    def _add_device(self, dev):
+        """Start following a device if it is a Wi-Fi device"""
+        if not is_wifi_device(dev) or dev.get_path() in self._devices:
+            return
+
+        logger.debug("NetworkModel following device: {}", dev.get_iface())
+        handlers = [
+            dev.connect("access-point-added", self._on_access_point_added),
+            dev.connect("access-point-removed", self._on_access_point_removed),
+            dev.connect("notify::active-access-point", self._on_active_changed),
+        ]
+        self._devices[dev.get_path()] = (dev, handlers)
+
+        for ap in dev.get_access_points():
+            self._add_access_point(ap, dev.get_path())
+
+    def _remove_device_path(self, path: str):
+        """Stop following a device and drop its access points"""
+        dev, handlers = self._devices.pop(path)
+        for handler_id in handlers:
+            dev.disconnect(handler_id)
+
+        for _ap_path, entry in list(self._access_points.items()):
+            if entry[3] == path:
+                self._remove_access_point(entry[1])
+
+    def _on_device_added(self, client, dev):
+        self._add_device(dev)
+        self._update_active()
+
+    def _on_device_removed(self, client, dev):
+        if dev.get_path() in self._devices:
+            logger.debug("NetworkModel dropping device: {}", dev.get_iface())
+            self._remove_device_path(dev.get_path())
+            self._update_active()
+
+    # Access point tracking
+
+    def _add_access_point(self, ap, device_path: str):
+        """Record an access point and watch its signal strength"""
+        path = ap.get_path()
+        if path in self._access_points:
+            return
+
+        ssid = decode_ssid(ap)
+        if not ssid:
+            return
+
+        handler_id = ap.connect("notify::strength", self._on_strength_changed)
+        self._access_points[path] = (ssid, ap, handler_id, device_path)
+        self._signal_history.record(ap.get_bssid(), ap.get_strength())
+
+        strengths = self._networks.get(ssid)
+        if strengths is None:
+            self._networks[ssid] = {path: ap.get_strength()}
+            self._queue(DELTA_ADDED, ssid)
+        else:
+            previous = max(strengths.values())
+            strengths[path] = ap.get_strength()
+            if strengths[path] > previous:
+                self._queue(DELTA_CHANGED, ssid)
+
+    def _remove_access_point(self, ap):
+        """Forget an access point, removing its network if it was the last"""
+        entry = self._access_points.pop(ap.get_path(), None)
+        if entry is None:
+            return
+
+        ssid, ap, handler_id, _device_path = entry
+        ap.disconnect(handler_id)
+
+        strengths = self._networks[ssid]
+        previous = max(strengths.values())
+        del strengths[ap.get_path()]
+
+        if not strengths:
+            del self._networks[ssid]
+            self._queue(DELTA_REMOVED, ssid)
+        elif max(strengths.values()) != previous:
+            self._queue(DELTA_CHANGED, ssid)
+
+    def _on_access_point_added(self, dev, ap):
+        invalidate_snapshot()
+        self._add_access_point(ap, dev.get_path())
+
+    def _on_access_point_removed(self, dev, ap):
+        invalidate_snapshot()
+        self._remove_access_point(ap)
+
+    def _on_strength_changed(self, ap, pspec):
+        entry = self._access_points.get(ap.get_path())
+        if entry is None:
+            return
+
+        strengths = self._networks[entry[0]]
+        previous = max(strengths.values())
+        strengths[ap.get_path()] = ap.get_strength()
+        self._signal_history.record(ap.get_bssid(), ap.get_strength())
+
+        if max(strengths.values()) != previous:
+            self._queue(DELTA_CHANGED, entry[0])
+
+    # Active network tracking
+
+    def _on_active_changed(self, *args):
+        invalidate_snapshot()
+        self._update_active()
+
+    def _update_active(self):
+        """Recompute the active SSID from the devices' active access points"""
+        active_ssid = ""
+        for dev, _handlers in self._devices.values():
+            ap = dev.get_active_access_point()
+            if ap:
+                active_ssid = decode_ssid(ap) or ""
+                if active_ssid:
+                    break
+
+        if active_ssid == self._active_ssid:
+            return
+
+        logger.info("Active network changed to: {}", active_ssid or "none")
+        previous, self._active_ssid = self._active_ssid, active_ssid
+        for ssid in (previous, active_ssid):
+            if ssid in self._networks:
+                self._queue(DELTA_CHANGED, ssid)
+
+    # Delta publishing
+
+    def _queue(self, kind: str, ssid: str):
+        """Merge a change into the pending batch and schedule a flush"""
+        previous = self._pending.get(ssid)
+
+        if previous == DELTA_ADDED and kind == DELTA_REMOVED:
+            # Appeared and vanished within one batch
+            del self._pending[ssid]
+            return
+        elif previous == DELTA_ADDED:
+            kind = DELTA_ADDED
+        elif previous == DELTA_REMOVED and kind == DELTA_ADDED:
+            kind = DELTA_CHANGED
+
+        self._pending[ssid] = kind
+
+        if self._flush_source_id is None:
+            self._flush_source_id = GLib.idle_add(self._flush)
+
+    def _flush(self):
+        """Publish the pending batch of deltas to every subscriber"""
+        self._flush_source_id = None
+        pending, self._pending = self._pending, {}
+
+        deltas = []
+        for ssid, kind in pending.items():
+            if kind == DELTA_REMOVED:
+                deltas.append(NetworkDelta(kind, ssid, 0, False))
+            else:
+                strength = max(self._networks[ssid].values())
+                deltas.append(
+                    NetworkDelta(kind, ssid, strength, ssid == self._active_ssid)
+                )
+
+        if deltas:
+            sampled(10).debug("Publishing {} network deltas", len(deltas))
+            get_metrics().counter("model.deltas").inc(len(deltas))
+            for callback in list(self._subscribers.values()):
+                try:
+                    callback(deltas)
+                except Exception as e:
+                    logger.exception(f"Error in NetworkModel subscriber: {e}")
+
+        return False
+
+
+_model: Optional[NetworkModel] = None
+
+
+def get_network_model() -> NetworkModel:
+    """Get the shared network model, creating it on first use
+
+    Must be called from the main thread, since libnm delivers its signals on
+    the main context.
+    """
+    global _model
+
+    if _model is None:
+        _model = NetworkModel(get_client())
+
+    return _model
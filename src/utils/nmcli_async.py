@@ -0,0 +1,164 @@
+import asyncio
+from typing import Callable, List, Optional
+
+from loguru import logger
+
+from . import nmcli
+from .access_point import AccessPointRecord
+from .backends import get_client
+from .connect import ConnectResult, CredentialsProvider
+from .metrics import timed
+from .scan import ScanResult, get_scan_scheduler
+from .secrets import get_secret_cache
+from .tasks import gio_call
+
+
+@timed("nmcli_async.get_network_names")
+async def get_network_names() -> List[str]:
+    """Get the names of the visible networks"""
+    return nmcli.get_network_names()
+
+
+@timed("nmcli_async.get_active_network")
+async def get_active_network() -> str:
+    """Get currently active network SSID"""
+    return nmcli.get_active_network()
+
+
+@timed("nmcli_async.get_access_points")
+async def get_access_points(ssid: str) -> List[AccessPointRecord]:
+    """Get every access point of a network, strongest first"""
+    return nmcli.get_access_points(ssid)
+
+
+@timed("nmcli_async.get_network_info")
+async def get_network_info(ssid: str) -> dict:
+    """Get details of a network"""
+    return nmcli.get_network_info(ssid)
+
+
+@timed("nmcli_async.get_device_info")
+async def get_device_info(device_name: str) -> dict:
+    """Get the addresses of a device"""
+    return nmcli.get_device_info(device_name)
+
+
+@timed("nmcli_async.request_network_scan")
+async def request_network_scan() -> bool:
+    """Scan on every Wi-Fi device and wait for the results
+
+    Returns True if at least one device finished a scan. A request inside
+    the scheduler's minimum interval waits for the deferred scan, and one
+    made while a scan is running waits for that scan. Returns False at once
+    only when there is no Wi-Fi device to scan.
+    """
+    logger.debug("Entered request_network_scan()")
+    scheduler = get_scan_scheduler()
+    done = asyncio.get_event_loop().create_future()
+    results: List[ScanResult] = []
+
+    def on_scan_result(result: ScanResult):
+        results.append(result)
+        if not scheduler.is_scanning() and not done.done():
+            done.set_result(None)
+
+    subscription = scheduler.subscribe(on_scan_result)
+    try:
+        if scheduler.request_scan() == 0:
+            logger.debug("No scan started")
+            return False
+
+        await done
+        return any(result.ok for result in results)
+
+    finally:
+        scheduler.unsubscribe(subscription)
+        logger.debug("Exiting request_network_scan()")
+
+
+@timed("nmcli_async.connect_to_network")
+async def connect_to_network(
+    ssid: str,
+    on_stage: Optional[Callable[[str], None]] = None,
+    parent=None,
+    ask_password: Optional[CredentialsProvider] = None,
+) -> Optional[ConnectResult]:
+    """Connect to a network and wait until it is up or the attempt ends
+
+    Returns the ConnectResult, or None if the attempt could not be started.
+    Cancelling the task cancels the attempt. The password is asked for as
+    in nmcli.connect_to_network().
+    """
+    done = asyncio.get_event_loop().create_future()
+
+    def on_finished(result: ConnectResult):
+        if not done.done():
+            done.set_result(result)
+
+    attempt = nmcli.connect_to_network(
+        ssid, on_finished, on_stage, parent, ask_password
+    )
+    if attempt is None:
+        return None
+
+    try:
+        return await done
+    except asyncio.CancelledError:
+        attempt.cancel()
+        raise
+
+
+@timed("nmcli_async.disconnect_from_network")
+async def disconnect_from_network(ssid: str) -> bool:
+    """Deactivate the connection to a network and wait for NetworkManager"""
+    logger.debug("Entered disconnect_from_network() with SSID: {}", ssid)
+
+    try:
+        active = nmcli.get_scan_snapshot().active_by_ssid.get(ssid)
+        if active is None:
+            logger.error(f"Network {ssid} is not connected")
+            return False
+
+        client = get_client()
+        active_conn, _dev = active
+        await gio_call(
+            client.deactivate_connection_async,
+            client.deactivate_connection_finish,
+            active_conn,
+        )
+        logger.info("Successfully disconnected from {}", ssid)
+        return True
+
+    # Handle exceptions
+    except Exception as e:
+        logger.exception(f"Error disconnecting from network {ssid}: {e}")
+        return False
+
+    # Cleanup
+    finally:
+        logger.debug("Exiting disconnect_from_network()")
+
+
+@timed("nmcli_async.get_active_password")
+async def get_active_password() -> str:
+    """Get password for currently active network connection"""
+    logger.debug("Entered get_active_password()")
+
+    try:
+        # Secrets are fetched once per profile and then served from the cache
+        secrets = get_secret_cache()
+        for settings_connection in nmcli._active_wifi_profiles():
+            password = await secrets.get_psk(settings_connection)
+            if password:
+                logger.info("Successfully retrieved network password")
+                return password
+
+        logger.info("No active Wi-Fi network with password found")
+        return ""
+
+    except Exception as e:
+        logger.exception(f"Error getting network password: {e}")
+        return ""
+
+    finally:
+        logger.debug("Exiting get_active_password()")
@@ -0,0 +1,95 @@
+from collections import namedtuple
+from typing import Any, Hashable, List, Sequence, Tuple
+
+# Kinds of operation produced by diff_keyed()
+OP_REMOVE = "remove"
+OP_INSERT = "insert"
+OP_MOVE = "move"
+OP_UPDATE = "update"
+
+# A single list edit. Positions are valid at the time the op is applied, with
+# the ops applied in order; a move's position is taken after removing the key.
+# Updates only carry the new value and are located by key.
+ListOp = namedtuple("ListOp", ["kind", "key", "position", "value"])
+
+
+def _longest_increasing_run(indices: Sequence[int]) -> set:
+    """Return the positions (into indices) of a longest increasing subsequence"""
+    tails = []  # tails[k] = position of the smallest tail of a run of length k+1
+    previous = [-1] * len(indices)
+
+    for position, value in enumerate(indices):
+        # Binary search for the run this value extends
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if indices[tails[middle]] < value:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low > 0:
+            previous[position] = tails[low - 1]
+        if low == len(tails):
+            tails.append(position)
+        else:
+            tails[low] = position
+
+    # Walk back from the end of the longest run
+    result = set()
+    position = tails[-1] if tails else -1
+    while position != -1:
+        result.add(position)
+        position = previous[position]
+
+    return result
+
+
+def diff_keyed(
+    old: Sequence[Tuple[Hashable, Any]], new: Sequence[Tuple[Hashable, Any]]
+) -> List[ListOp]:
+    """Compute the edits turning one ordered keyed list into another
+
+    Both lists hold (key, value) pairs with unique keys. Keys missing from new
+    are removed, keys missing from old are inserted, and the keys outside the
+    longest run that is already in order are moved, so a single changed row
+    costs a single op. Keys present in both whose value differs get an update.
+    """
+    old_index = {key: index for index, (key, _value) in enumerate(old)}
+    new_keys = {key for key, _value in new}
+    old_values = dict(old)
+    ops = []
+
+    # Removals first, from the end so earlier positions stay valid
+    current = [key for key, _value in old]
+    for index in range(len(current) - 1, -1, -1):
+        if current[index] not in new_keys:
+            ops.append(ListOp(OP_REMOVE, current[index], index, None))
+            del current[index]
+
+    # Keys already in the right relative order stay where they are
+    kept = [key for key, _value in new if key in old_index]
+    stable_positions = _longest_increasing_run([old_index[key] for key in kept])
+    stable = {kept[position] for position in stable_positions}
+
+    # Place everything else in front of its successor, working backwards so
+    # the successor is always already in its final relative position
+    anchor = None
+    for key, value in reversed(new):
+        if key not in old_index or key not in stable:
+            if key in old_index:
+                current.remove(key)
+                kind = OP_MOVE
+            else:
+                kind = OP_INSERT
+
+            position = len(current) if anchor is None else current.index(anchor)
+            current.insert(position, key)
+            ops.append(ListOp(kind, key, position, value))
+
+        if key in old_index and old_values[key] != value:
+            ops.append(ListOp(OP_UPDATE, key, None, value))
+
+        anchor = key
+
+    return ops
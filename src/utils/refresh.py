@@ -0,0 +1,309 @@
+import time
+from typing import Callable, Dict, Optional
+
+from gi.repository import Gio, GLib
+from loguru import logger
+
+from .metrics import get_metrics
+
+# Each stretch this long without a change doubles the interval of jobs that
+# back off, up to MAX_BACKOFF times
+BACKOFF_AFTER_SECONDS = 120
+MAX_BACKOFF = 8
+
+# Interval stretch while the window is shown but not focused
+UNFOCUSED_FACTOR = 2
+
+# Interval stretch on battery, and in power-saver mode or on low battery
+BATTERY_FACTOR = 2
+POWER_SAVER_FACTOR = 4
+
+# No job's interval is ever stretched further than this
+MAX_FACTOR = 16
+
+# Jobs due within this long of each other run together, saving a wakeup
+SLACK_SECONDS = 1
+
+# The battery as UPower reports it, combined over every power source
+UPOWER_NAME = "org.freedesktop.UPower"
+UPOWER_DISPLAY_DEVICE = "/org/freedesktop/UPower/devices/DisplayDevice"
+UPOWER_DEVICE_INTERFACE = "org.freedesktop.UPower.Device"
+
+# UPower device states meaning the battery is draining
+UPOWER_DISCHARGING_STATES = (2, 6)
+
+# UPower warning level from which the battery counts as low
+UPOWER_WARNING_LOW = 3
+
+
+class _Job:
+    """A periodic callback and when it last ran"""
+
+    def __init__(self, name: str, callback: Callable, interval: float, backoff: bool):
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.backoff = backoff
+        # Runs once the interval has passed since it was added
+        self.last_run = time.monotonic()
+        # Switched off by the owner, or by the widget it is bound to unmapping
+        self.enabled = True
+        self.mapped = True
+
+    @property
+    def runnable(self) -> bool:
+        return self.enabled and self.mapped
+
+
+class RefreshScheduler:
+    """Runs all of the UI's periodic work from one timer
+
+    Jobs register a callback and a base interval. A single GLib timeout is
+    armed for the earliest due job, so nothing wakes the process while no job
+    is due, and jobs due at about the same time share a wakeup. No job runs
+    while the window is hidden or while the widget it is bound to is not
+    shown. Intervals are stretched while the window is unfocused, on
+    battery, in power-saver mode or on low battery, and, for jobs that back
+    off, the longer nothing has changed. wake() snaps back: the backoff is
+    dropped and any job that has become due runs right away.
+
+    Every periodic wakeup of the UI, the main loop probe included, is a job
+    here. The only other timers are one-shot: debounces, scan deferrals and
+    connection timeouts.
+
+    Must be used from the main thread.
+    """
+
+    def __init__(self):
+        logger.debug("Initializing RefreshScheduler")
+        self._jobs: Dict[int, _Job] = {}
+        self._next_job_id = 1
+        self._source_id: Optional[int] = None
+
+        self.visible = True
+        self.focused = True
+        self.on_battery = False
+        self.low_battery = False
+        self.power_saver = False
+        self.last_activity = time.monotonic()
+
+        self._power_monitor = None
+        self._upower = None
+        self._watch_power()
+
+    # Jobs
+
+    def add(
+        self, name: str, callback: Callable, interval: float, backoff: bool = True
+    ) -> int:
+        """Run callback every interval seconds, returns the job id
+
+        Jobs that back off run less often the longer note_activity() has not
+        been called. The callback's return value is ignored.
+        """
+        job_id = self._next_job_id
+        self._next_job_id += 1
+        self._jobs[job_id] = _Job(name, callback, interval, backoff)
+        logger.debug("Scheduled {} every {}s", name, interval)
+        self._reschedule()
+        return job_id
+
+    def remove(self, job_id: int):
+        """Stop running a job"""
+        if self._jobs.pop(job_id, None) is not None:
+            self._reschedule()
+
+    def set_enabled(self, job_id: int, enabled: bool):
+        """Pause or resume a job; a resumed job that is due runs right away"""
+        job = self._jobs.get(job_id)
+        if job is not None and job.enabled != enabled:
+            job.enabled = enabled
+            self._reschedule()
+
+    def bind_widget(self, job_id: int, widget):
+        """Only run a job while a widget is shown
+
+        Follows the widget's map and unmap signals, so the job stops while
+        its page or the window is hidden and, if due, runs as soon as it is
+        shown again.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+
+        job.mapped = widget.get_mapped()
+        widget.connect("map", lambda _widget: self._set_mapped(job_id, True))
+        widget.connect("unmap", lambda _widget: self._set_mapped(job_id, False))
+        self._reschedule()
+
+    def _set_mapped(self, job_id: int, mapped: bool):
+        job = self._jobs.get(job_id)
+        if job is not None and job.mapped != mapped:
+            job.mapped = mapped
+            self._reschedule()
+
+    # State
+
+    def set_window_state(self, visible: bool, focused: bool):
+        """Follow whether the window can be seen and has the focus"""
+        if (visible, focused) == (self.visible, self.focused):
+            return
+
+        logger.info(
+            "Window {}, {}",
+            "visible" if visible else "hidden",
+            "focused" if focused else "unfocused",
+        )
+        gained = (visible and not self.visible) or (focused and not self.focused)
+        self.visible = visible
+        self.focused = focused
+
+        if gained:
+            self.wake()
+        else:
+            self._reschedule()
+
+    def note_activity(self):
+        """Something changed, so jobs go back to their base interval"""
+        self.last_activity = time.monotonic()
+        self._reschedule()
+
+    def wake(self):
+        """Snap back to the base intervals after focus or a user action"""
+        self.note_activity()
+
+    def get_factor(self, job: _Job, now: Optional[float] = None) -> float:
+        """How much a job's interval is currently stretched"""
+        factor = 1
+        if not self.focused:
+            factor *= UNFOCUSED_FACTOR
+        if self.power_saver or self.low_battery:
+            factor *= POWER_SAVER_FACTOR
+        elif self.on_battery:
+            factor *= BATTERY_FACTOR
+
+        if job.backoff:
+            quiet = (now or time.monotonic()) - self.last_activity
+            factor *= min(MAX_BACKOFF, 2 ** int(quiet // BACKOFF_AFTER_SECONDS))
+
+        return min(factor, MAX_FACTOR)
+
+    def get_due(self, job: _Job, now: Optional[float] = None) -> float:
+        """When a job is next due, on the monotonic clock"""
+        return job.last_run + job.interval * self.get_factor(job, now)
+
+    # Timer
+
+    def _reschedule(self):
+        """Arm the timer for the earliest due job, or not at all"""
+        if self._source_id is not None:
+            GLib.source_remove(self._source_id)
+            self._source_id = None
+
+        if not self.visible:
+            return
+
+        now = time.monotonic()
+        due = min(
+            (self.get_due(job, now) for job in self._jobs.values() if job.runnable),
+            default=None,
+        )
+        if due is None:
+            return
+
+        delay = max(0.0, due - now)
+        if delay >= SLACK_SECONDS:
+            # Second timers are batched with other wakeups on the system
+            self._source_id = GLib.timeout_add_seconds(int(delay), self._on_timer)
+        else:
+            self._source_id = GLib.timeout_add(int(delay * 1000), self._on_timer)
+
+    def _on_timer(self):
+        self._source_id = None
+        now = time.monotonic()
+
+        for job in list(self._jobs.values()):
+            if not job.runnable or self.get_due(job, now) - now > SLACK_SECONDS:
+                continue
+
+            job.last_run = now
+            get_metrics().counter(f"refresh.runs.{job.name}").inc()
+            try:
+                job.callback()
+            except Exception as e:
+                logger.exception(f"Error in periodic job {job.name}: {e}")
+
+        self._reschedule()
+        return False
+
+    # Power
+
+    def _watch_power(self):
+        """Follow power-saver mode and the battery, where available"""
+        monitor_type = getattr(Gio, "PowerProfileMonitor", None)
+        if monitor_type is not None:
+            self._power_monitor = monitor_type.dup_default()
+            self._power_monitor.connect(
+                "notify::power-saver-enabled", self._on_power_saver_changed
+            )
+            self.power_saver = self._power_monitor.get_power_saver_enabled()
+
+        Gio.DBusProxy.new_for_bus(
+            Gio.BusType.SYSTEM,
+            Gio.DBusProxyFlags.DO_NOT_AUTO_START,
+            None,
+            UPOWER_NAME,
+            UPOWER_DISPLAY_DEVICE,
+            UPOWER_DEVICE_INTERFACE,
+            None,
+            self._on_upower_proxy,
+            None,
+        )
+
+    def _on_power_saver_changed(self, monitor, pspec):
+        self.power_saver = monitor.get_power_saver_enabled()
+        logger.info("Power saver {}", "on" if self.power_saver else "off")
+        self._reschedule()
+
+    def _on_upower_proxy(self, source, result, user_data):
+        try:
+            self._upower = Gio.DBusProxy.new_for_bus_finish(result)
+        except GLib.Error as e:
+            logger.info("UPower unavailable, assuming mains power: {}", e.message)
+            return
+
+        self._upower.connect("g-properties-changed", self._on_upower_changed)
+        self._read_battery()
+
+    def _on_upower_changed(self, proxy, changed, invalidated):
+        self._read_battery()
+
+    def _read_battery(self):
+        """Update the battery state from UPower's cached properties"""
+        state = self._upower.get_cached_property("State")
+        level = self._upower.get_cached_property("WarningLevel")
+        on_battery = state is not None and state.unpack() in UPOWER_DISCHARGING_STATES
+        low_battery = level is not None and level.unpack() >= UPOWER_WARNING_LOW
+
+        if (on_battery, low_battery) != (self.on_battery, self.low_battery):
+            self.on_battery = on_battery
+            self.low_battery = low_battery
+            logger.info(
+                "On {}{}",
+                "battery" if on_battery else "mains power",
+                ", battery low" if low_battery else "",
+            )
+            self._reschedule()
+
+
+_scheduler: Optional[RefreshScheduler] = None
+
+
+def get_refresh_scheduler() -> RefreshScheduler:
+    """Get the shared refresh scheduler, creating it on first use"""
+    global _scheduler
+
+    if _scheduler is None:
+        _scheduler = RefreshScheduler()
+
+    return _scheduler
@@ -0,0 +1,548 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from gi.repository import Gio, GLib
+from loguru import logger
+
+from .network_model import (
+    DELTA_ADDED,
+    DELTA_CHANGED,
+    DELTA_REMOVED,
+    NetworkDelta,
+    NetworkEntry,
+    get_network_model,
+)
+from .scan import ScanResult, get_scan_scheduler
+
+# Where the komodo service (src/service.py) is found on the session bus
+BUS_NAME = "dev.furthestdrop.Komodo1"
+OBJECT_PATH = "/dev/furthestdrop/Komodo1"
+INTERFACE_NAME = "dev.furthestdrop.Komodo1.Networks"
+
+# Prefix of the D-Bus errors returned by the service
+ERROR_PREFIX = "dev.furthestdrop.Komodo1.Error"
+
+# How long a client waits for a reply, including D-Bus activation
+CALL_TIMEOUT_MS = 10000
+
+INTERFACE_XML = f"""
+<node>
+  <interface name="{INTERFACE_NAME}">
+    <method name="GetNetworks">
+      <arg direction="out" name="networks" type="a(syb)"/>
+    </method>
+    <method name="GetActiveNetwork">
+      <arg direction="out" name="ssid" type="s"/>
+    </method>
+    <method name="GetNetworkInfo">
+      <arg direction="in" name="ssid" type="s"/>
+      <arg direction="out" name="info" type="a{{sv}}"/>
+    </method>
+    <method name="RequestScan">
+      <arg direction="out" name="devices" type="u"/>
+      <arg direction="out" name="scanning" type="b"/>
+    </method>
+    <signal name="NetworksChanged">
+      <arg name="deltas" type="a(ssyb)"/>
+    </signal>
+    <signal name="ScanFinished">
+      <arg name="iface" type="s"/>
+      <arg name="ok" type="b"/>
+      <arg name="latency" type="d"/>
+      <arg name="scanning" type="b"/>
+    </signal>
+  </interface>
+</node>
+"""
+
+
+def get_interface_info() -> Gio.DBusInterfaceInfo:
+    """Parse the service's interface description"""
+    return Gio.DBusNodeInfo.new_for_xml(INTERFACE_XML).interfaces[0]
+
+
+def _watch_service(
+    connection: Gio.DBusConnection, auto_start: bool, on_appeared, on_vanished
+) -> int:
+    """Follow the owner of the service's bus name, returns the watch id
+
+    on_appeared is called whenever the name gets an owner, so also after the
+    service was restarted, and on_vanished whenever it loses it. With
+    auto_start the bus is asked to start the service through D-Bus
+    activation first.
+    """
+    flags = Gio.BusNameWatcherFlags.NONE
+    if auto_start:
+        flags = Gio.BusNameWatcherFlags.AUTO_START
+    return Gio.bus_watch_name_on_connection(
+        connection, BUS_NAME, flags, on_appeared, on_vanished
+    )
+
+
+class RemoteNetworkModel:
+    """NetworkModel look-alike kept current by the komodo service
+
+    Offers the subscriber side of NetworkModel, but the registry is filled
+    from the service's GetNetworks reply and NetworksChanged signals instead
+    of from libnm, so any number of front-ends share one model. The contents
+    arrive asynchronously and are published as deltas against what the
+    subscribers already have.
+
+    The service's bus name is watched. While it has no owner, because the
+    service crashed or is restarting, the model follows the in-process
+    NetworkModel instead, and it fetches GetNetworks again as soon as a new
+    owner appears.
+    """
+
+    def __init__(self, connection: Gio.DBusConnection, auto_start: bool = False):
+        logger.debug("Initializing RemoteNetworkModel")
+        self.connection = connection
+        self._networks: Dict[str, NetworkEntry] = {}
+        self._subscribers: Dict[int, Callable[[List[NetworkDelta]], None]] = {}
+        self._next_subscriber_id = 1
+        # Subscription to the in-process model while the service is away
+        self._local_id: Optional[int] = None
+
+        # Subscribe first so no change is missed while GetNetworks is in flight
+        self._signal_id = connection.signal_subscribe(
+            BUS_NAME,
+            INTERFACE_NAME,
+            "NetworksChanged",
+            OBJECT_PATH,
+            None,
+            Gio.DBusSignalFlags.NONE,
+            self._on_networks_changed,
+            None,
+        )
+        self._watch_id = _watch_service(
+            connection, auto_start, self._on_name_appeared, self._on_name_vanished
+        )
+
+    # Public API
+
+    def get_networks(self) -> List[NetworkEntry]:
+        return list(self._networks.values())
+
+    def get_network_names(self) -> List[str]:
+        return list(self._networks)
+
+    def get_active_network(self) -> str:
+        for entry in self._networks.values():
+            if entry.is_active:
+                return entry.ssid
+        return ""
+
+    def subscribe(self, callback: Callable[[List[NetworkDelta]], None]) -> int:
+        subscriber_id = self._next_subscriber_id
+        self._next_subscriber_id += 1
+        self._subscribers[subscriber_id] = callback
+        return subscriber_id
+
+    def unsubscribe(self, subscriber_id: int):
+        self._subscribers.pop(subscriber_id, None)
+
+    def close(self):
+        """Stop following the service"""
+        if self._signal_id:
+            self.connection.signal_unsubscribe(self._signal_id)
+            self._signal_id = 0
+        if self._watch_id:
+            Gio.bus_unwatch_name(self._watch_id)
+            self._watch_id = 0
+        self._stop_local()
+        self._subscribers.clear()
+
+    # Service updates
+
+    def _on_name_appeared(self, connection, name, owner):
+        logger.info("Following the komodo service at {} ({})", name, owner)
+        self._stop_local()
+        connection.call(
+            BUS_NAME,
+            OBJECT_PATH,
+            INTERFACE_NAME,
+            "GetNetworks",
+            None,
+            GLib.VariantType("(a(syb))"),
+            Gio.DBusCallFlags.NONE,
+            CALL_TIMEOUT_MS,
+            None,
+            self._on_get_networks,
+            None,
+        )
+
+    def _on_name_vanished(self, connection, name):
+        if self._local_id is not None:
+            return
+        logger.warning(f"The komodo service at {name} is gone, using the local model")
+        local = get_network_model()
+        self._local_id = local.subscribe(self._apply)
+        self._replace(local.get_networks())
+
+    def _stop_local(self):
+        if self._local_id is not None:
+            get_network_model().unsubscribe(self._local_id)
+            self._local_id = None
+
+    def _on_get_networks(self, connection, result, user_data):
+        try:
+            (networks,) = connection.call_finish(result).unpack()
+        except GLib.Error as e:
+            logger.error(f"Could not get networks from the komodo service: {e.message}")
+            return
+        if self._local_id is not None:
+            # The service went away again while the call was in flight
+            return
+
+        logger.info("Got {} networks from the komodo service", len(networks))
+        self._replace([NetworkEntry(*network) for network in networks])
+
+    def _on_networks_changed(
+        self, connection, sender, path, interface, signal, parameters, user_data
+    ):
+        if self._local_id is not None:
+            return
+        (deltas,) = parameters.unpack()
+        self._apply([NetworkDelta(*delta) for delta in deltas])
+
+    def _replace(self, entries: List[NetworkEntry]):
+        """Publish the deltas turning the registry into entries"""
+        names = {entry.ssid for entry in entries}
+        deltas = [
+            NetworkDelta(DELTA_REMOVED, ssid, entry.strength, entry.is_active)
+            for ssid, entry in self._networks.items()
+            if ssid not in names
+        ]
+        for entry in entries:
+            previous = self._networks.get(entry.ssid)
+            if previous is None:
+                deltas.append(NetworkDelta(DELTA_ADDED, *entry))
+            elif previous != entry:
+                deltas.append(NetworkDelta(DELTA_CHANGED, *entry))
+        self._apply(deltas)
+
+    def _apply(self, deltas: List[NetworkDelta]):
+        """Update the registry and publish the deltas to every subscriber"""
+        for delta in deltas:
+            if delta.kind == DELTA_REMOVED:
+                self._networks.pop(delta.ssid, None)
+            else:
+                self._networks[delta.ssid] = NetworkEntry(
+                    delta.ssid, delta.strength, delta.is_active
+                )
+
+        if not deltas:
+            return
+
+        for callback in list(self._subscribers.values()):
+            try:
+                callback(deltas)
+            except Exception as e:
+                logger.exception(f"Error in RemoteNetworkModel subscriber: {e}")
+
+
+class RemoteScanScheduler:
+    """ScanScheduler look-alike that asks the komodo service to scan
+
+    Requests from every front-end go to the service's one ScanScheduler,
+    which coalesces and rate-limits them, and outcomes come back through the
+    ScanFinished signal. While the service's bus name has no owner, requests
+    go to the in-process ScanScheduler instead.
+    """
+
+    def __init__(self, connection: Gio.DBusConnection, auto_start: bool = False):
+        logger.debug("Initializing RemoteScanScheduler")
+        self.connection = connection
+        self.results_at: Optional[float] = None
+        self._scanning = False
+        # Wi-Fi devices reported by the latest reply, assumed one until then
+        self._devices = 1
+        self._subscribers: Dict[int, Callable[[ScanResult], None]] = {}
+        self._next_subscriber_id = 1
+
+        self._signal_id = connection.signal_subscribe(
+            BUS_NAME,
+            INTERFACE_NAME,
+            "ScanFinished",
+            OBJECT_PATH,
+            None,
+            Gio.DBusSignalFlags.NONE,
+            self._on_scan_finished,
+            None,
+        )
+        # Subscription to the in-process scheduler while the service is away
+        self._local_id: Optional[int] = None
+        self._watch_id = _watch_service(
+            connection, auto_start, self._on_name_appeared, self._on_name_vanished
+        )
+
+    def request_scan(self) -> int:
+        """Ask the service for a scan, returns the devices expected to report"""
+        if self._local_id is not None:
+            return get_scan_scheduler().request_scan()
+
+        self.connection.call(
+            BUS_NAME,
+            OBJECT_PATH,
+            INTERFACE_NAME,
+            "RequestScan",
+            None,
+            GLib.VariantType("(ub)"),
+            Gio.DBusCallFlags.NONE,
+            CALL_TIMEOUT_MS,
+            None,
+            self._on_request_scan,
+            None,
+        )
+        return self._devices
+
+    def is_scanning(self) -> bool:
+        if self._local_id is not None:
+            return get_scan_scheduler().is_scanning()
+        return self._scanning
+
+    def subscribe(self, callback: Callable[[ScanResult], None]) -> int:
+        subscriber_id = self._next_subscriber_id
+        self._next_subscriber_id += 1
+        self._subscribers[subscriber_id] = callback
+        return subscriber_id
+
+    def unsubscribe(self, subscriber_id: int):
+        self._subscribers.pop(subscriber_id, None)
+
+    def close(self):
+        """Stop following the service"""
+        if self._signal_id:
+            self.connection.signal_unsubscribe(self._signal_id)
+            self._signal_id = 0
+        if self._watch_id:
+            Gio.bus_unwatch_name(self._watch_id)
+            self._watch_id = 0
+        self._stop_local()
+        self._subscribers.clear()
+
+    def _on_name_appeared(self, connection, name, owner):
+        self._stop_local()
+        self._scanning = False
+
+    def _on_name_vanished(self, connection, name):
+        if self._local_id is None:
+            self._local_id = get_scan_scheduler().subscribe(self._on_local_result)
+
+    def _stop_local(self):
+        if self._local_id is not None:
+            get_scan_scheduler().unsubscribe(self._local_id)
+            self._local_id = None
+
+    def _on_local_result(self, result: ScanResult):
+        if result.ok:
+            self.results_at = time.monotonic()
+        self._publish(result)
+
+    def _on_request_scan(self, connection, result, user_data):
+        try:
+            self._devices, self._scanning = connection.call_finish(result).unpack()
+        except GLib.Error as e:
+            logger.warning(f"Scan request to the komodo service failed: {e.message}")
+            self._publish(ScanResult("", False, None))
+
+    def _on_scan_finished(
+        self, connection, sender, path, interface, signal, parameters, user_data
+    ):
+        iface, ok, latency, self._scanning = parameters.unpack()
+        if ok:
+            self.results_at = time.monotonic()
+        self._publish(ScanResult(iface, ok, latency if latency >= 0 else None))
+
+    def _publish(self, result: ScanResult):
+        for callback in list(self._subscribers.values()):
+            try:
+                callback(result)
+            except Exception as e:
+                logger.exception(f"Error in RemoteScanScheduler subscriber: {e}")
+
+
+def _service_mode() -> str:
+    """Read KOMODO_SERVICE
+
+    "auto" (default) uses the service when it is already running, "on"
+    always uses it, starting it through D-Bus activation if needed, and
+    "off" never does.
+    """
+    return os.environ.get("KOMODO_SERVICE", "auto")
+
+
+def _service_connection() -> Optional[Gio.DBusConnection]:
+    """Get the session bus if front-ends should go through the komodo service
+
+    Blocks on the session bus, so the UI waits for the answer with
+    request_service() instead.
+    """
+    mode = _service_mode()
+    if mode == "off":
+        return None
+
+    try:
+        bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        if mode != "on":
+            (running,) = bus.call_sync(
+                "org.freedesktop.DBus",
+                "/org/freedesktop/DBus",
+                "org.freedesktop.DBus",
+                "NameHasOwner",
+                GLib.Variant("(s)", (BUS_NAME,)),
+                GLib.VariantType("(b)"),
+                Gio.DBusCallFlags.NONE,
+                CALL_TIMEOUT_MS,
+                None,
+            ).unpack()
+            if not running:
+                return None
+    except GLib.Error as e:
+        logger.warning(f"Session bus unavailable, not using the service: {e.message}")
+        return None
+
+    return bus
+
+
+# The session bus when the komodo service is used, False when it is not, and
+# None until decided
+_connection = None
+_model: Optional[RemoteNetworkModel] = None
+_scheduler: Optional[RemoteScanScheduler] = None
+
+# Callbacks waiting for the asynchronous decision, or None when no decision is
+# in progress
+_pending: Optional[List[Callable]] = None
+
+
+def _get_connection() -> Optional[Gio.DBusConnection]:
+    global _connection
+
+    if _connection is None:
+        _decide(_service_connection())
+
+    return _connection or None
+
+
+def request_service(callback: Callable):
+    """Call callback(connection) once it is known whether the service is used
+
+    The connection is the session bus when front-ends go through the komodo
+    service and None when they do not. The first request looks the service
+    up asynchronously, so a slow session bus never holds up the first frame,
+    and the callback is called right away once the answer is known. Must be
+    called from the main thread.
+    """
+    global _pending
+
+    if _connection is not None:
+        callback(_connection or None)
+        return
+
+    if _pending is not None:
+        _pending.append(callback)
+        return
+
+    _pending = [callback]
+    mode = _service_mode()
+    if mode == "off":
+        _decide(None)
+        return
+
+    Gio.bus_get(Gio.BusType.SESSION, None, _on_bus, mode)
+
+
+def _on_bus(source, result, mode):
+    try:
+        bus = Gio.bus_get_finish(result)
+    except GLib.Error as e:
+        logger.warning(f"Session bus unavailable, not using the service: {e.message}")
+        _decide(None)
+        return
+
+    if mode == "on":
+        _decide(bus)
+        return
+
+    bus.call(
+        "org.freedesktop.DBus",
+        "/org/freedesktop/DBus",
+        "org.freedesktop.DBus",
+        "NameHasOwner",
+        GLib.Variant("(s)", (BUS_NAME,)),
+        GLib.VariantType("(b)"),
+        Gio.DBusCallFlags.NONE,
+        CALL_TIMEOUT_MS,
+        None,
+        _on_name_has_owner,
+        None,
+    )
+
+
+def _on_name_has_owner(bus, result, user_data):
+    try:
+        (running,) = bus.call_finish(result).unpack()
+    except GLib.Error as e:
+        logger.warning(f"Could not look up the komodo service: {e.message}")
+        running = False
+
+    _decide(bus if running else None)
+
+
+def _decide(connection: Optional[Gio.DBusConnection]):
+    """Settle whether the service is used and call everyone waiting"""
+    global _connection, _pending
+
+    if _connection is None:
+        _connection = connection or False
+        if connection is not None:
+            logger.info("Using the komodo service at {}", BUS_NAME)
+
+    callbacks, _pending = _pending or [], None
+    for callback in callbacks:
+        try:
+            callback(_connection or None)
+        except Exception as e:
+            logger.exception(f"Error in request_service callback: {e}")
+
+
+def get_shared_model():
+    """Get the network model front-ends should follow
+
+    That is the komodo service's model when the service is used, and the
+    in-process NetworkModel otherwise. Call it from a request_service()
+    callback, as it blocks on the session bus until that is known. Must be
+    called from the main thread.
+    """
+    global _model
+
+    connection = _get_connection()
+    if connection is None:
+        return get_network_model()
+
+    if _model is None:
+        _model = RemoteNetworkModel(connection, _service_mode() == "on")
+
+    return _model
+
+
+def get_shared_scheduler():
+    """Get the scan scheduler front-ends should ask for scans
+
+    That is the komodo service's scheduler when the service is used, and the
+    in-process ScanScheduler otherwise. Call it from a request_service()
+    callback, as it blocks on the session bus until that is known. Must be
+    called from the main thread.
+    """
+    global _scheduler
+
+    connection = _get_connection()
+    if connection is None:
+        return get_scan_scheduler()
+
+    if _scheduler is None:
+        _scheduler = RemoteScanScheduler(connection, _service_mode() == "on")
+
+    return _scheduler
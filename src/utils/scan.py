@@ -0,0 +1,257 @@
+import time
+from collections import namedtuple
+from typing import Callable, Dict, Optional
+
+import gi
+from loguru import logger
+
+gi.require_version("NM", "1.0")
+
+from gi.repository import GLib  # noqa: E402
+
+from .backends import get_client, is_wifi_device  # noqa: E402
+from .metrics import get_metrics  # noqa: E402
+
+# Never ask a device to scan more often than this
+MIN_SCAN_INTERVAL_SECONDS = 10
+
+# Give up on a scan whose results never arrive after this long
+SCAN_TIMEOUT_SECONDS = 30
+
+# Outcome of a scan, published once a device has fresh results (ok=True) or a
+# request failed or timed out (ok=False). Latency runs from the request to the
+# outcome, and is None for scans NetworkManager started on its own.
+ScanResult = namedtuple("ScanResult", ["iface", "ok", "latency"])
+
+
+class _DeviceScan:
+    """Scan bookkeeping for a single Wi-Fi device"""
+
+    def __init__(self, device):
+        self.device = device
+        self.in_flight = False
+        self.requested_at = float("-inf")
+        self.deferred_source_id = None
+        self.timeout_source_id = None
+        self.coalesced = 0
+        self.notify_handler = None
+
+
+class ScanScheduler:
+    """Asynchronous, coalescing and rate-limited Wi-Fi scan requests
+
+    Scans are requested with request_scan_async so no thread blocks on
+    D-Bus. A request for a device that is already scanning joins the
+    running scan, and one arriving within MIN_SCAN_INTERVAL_SECONDS of the
+    previous scan is deferred to the end of the interval and merged with any
+    other requests made meanwhile. Subscribers are told when a device's
+    last-scan timestamp moves, which is when fresh results are in.
+
+    Every Wi-Fi device is asked at once, so with several adapters a round of
+    scans takes as long as the slowest one rather than the sum of them; the
+    "scan.round_latency" histogram measures that.
+
+    Must be used from the main thread.
+    """
+
+    def __init__(self, client, min_interval: float = MIN_SCAN_INTERVAL_SECONDS):
+        logger.debug("Initializing ScanScheduler")
+        self.client = client
+        self.min_interval = min_interval
+        self._scans: Dict[str, _DeviceScan] = {}
+        self._subscribers: Dict[int, Callable[[ScanResult], None]] = {}
+        self._next_subscriber_id = 1
+
+        # When a device last reported fresh results, from time.monotonic()
+        self.results_at: Optional[float] = None
+        # When the first of the scans now in flight was requested
+        self._round_started: Optional[float] = None
+
+        self._client_handlers = [
+            client.connect("device-removed", self._on_device_removed),
+        ]
+
+    # Public API
+
+    def request_scan(self) -> int:
+        """Request a scan on every Wi-Fi device
+
+        Returns how many devices will report results for this request, whether
+        they scan now, join a running scan or scan once the interval is up.
+        """
+        logger.debug("Entered ScanScheduler.request_scan()")
+        requested = 0
+
+        for dev in self.client.get_devices():
+            if not is_wifi_device(dev):
+                continue
+
+            scan = self._get_scan(dev)
+            requested += 1
+
+            if scan.in_flight:
+                scan.coalesced += 1
+                logger.debug("Scan already running on {}, joining it", dev.get_iface())
+                continue
+
+            wait = scan.requested_at + self.min_interval - time.monotonic()
+            if wait > 0:
+                if scan.deferred_source_id is None:
+                    logger.debug(
+                        "Deferring scan on {} by {:.1f}s", dev.get_iface(), wait
+                    )
+                    scan.deferred_source_id = GLib.timeout_add(
+                        int(wait * 1000), self._on_deferred_scan, dev.get_path()
+                    )
+                else:
+                    scan.coalesced += 1
+                continue
+
+            self._start_scan(scan)
+
+        return requested
+
+    def is_scanning(self) -> bool:
+        """Whether any device has a scan in flight"""
+        return any(scan.in_flight for scan in self._scans.values())
+
+    def subscribe(self, callback: Callable[[ScanResult], None]) -> int:
+        """Register a callback for scan results, returns its id"""
+        subscriber_id = self._next_subscriber_id
+        self._next_subscriber_id += 1
+        self._subscribers[subscriber_id] = callback
+        return subscriber_id
+
+    def unsubscribe(self, subscriber_id: int):
+        """Remove a callback registered with subscribe()"""
+        self._subscribers.pop(subscriber_id, None)
+
+    # Scan handling
+
+    def _get_scan(self, dev) -> _DeviceScan:
+        """Get the bookkeeping for a device, following its last-scan property"""
+        scan = self._scans.get(dev.get_path())
+        if scan is None:
+            scan = _DeviceScan(dev)
+            scan.notify_handler = dev.connect(
+                "notify::last-scan", self._on_last_scan_changed
+            )
+            self._scans[dev.get_path()] = scan
+        return scan
+
+    def _start_scan(self, scan: _DeviceScan):
+        """Send the scan request for a device"""
+        logger.info("Requesting network scan on device: {}", scan.device.get_iface())
+        scan.in_flight = True
+        scan.requested_at = time.monotonic()
+        if self._round_started is None:
+            self._round_started = scan.requested_at
+        scan.timeout_source_id = GLib.timeout_add_seconds(
+            SCAN_TIMEOUT_SECONDS, self._on_scan_timeout, scan.device.get_path()
+        )
+        scan.device.request_scan_async(None, self._on_scan_requested, None)
+
+    def _finish_scan(self, scan: _DeviceScan, ok: bool):
+        """Mark a device's scan as done and publish the outcome"""
+        latency = time.monotonic() - scan.requested_at
+        scan.in_flight = False
+
+        metrics = get_metrics()
+        metrics.counter("scan.completed" if ok else "scan.failed").inc()
+        metrics.histogram("scan.latency", "Scan request to fresh results").observe(
+            latency
+        )
+        if scan.timeout_source_id:
+            GLib.source_remove(scan.timeout_source_id)
+            scan.timeout_source_id = None
+
+        # The round ends with the last device still scanning
+        if self._round_started is not None and not self.is_scanning():
+            metrics.histogram(
+                "scan.round_latency", "First scan request to every device done"
+            ).observe(time.monotonic() - self._round_started)
+            self._round_started = None
+
+        self._publish(ScanResult(scan.device.get_iface(), ok, latency))
+
+        # Requests made while the scan was deferred or running count towards
+        # it, so only start over once it has been reported
+        metrics.counter("scan.coalesced").inc(scan.coalesced)
+        scan.coalesced = 0
+
+    def _on_deferred_scan(self, path: str):
+        scan = self._scans.get(path)
+        if scan is not None:
+            scan.deferred_source_id = None
+            if not scan.in_flight:
+                self._start_scan(scan)
+        return False
+
+    def _on_scan_requested(self, dev, result, user_data):
+        """Check NetworkManager accepted the request; results come later"""
+        try:
+            dev.request_scan_finish(result)
+        except GLib.Error as e:
+            logger.warning(f"Scan request on {dev.get_iface()} failed: {e.message}")
+            scan = self._scans.get(dev.get_path())
+            if scan is not None and scan.in_flight:
+                self._finish_scan(scan, False)
+
+    def _on_scan_timeout(self, path: str):
+        scan = self._scans.get(path)
+        if scan is not None and scan.in_flight:
+            logger.warning(f"No scan results from {scan.device.get_iface()}")
+            scan.timeout_source_id = None
+            self._finish_scan(scan, False)
+        return False
+
+    def _on_device_removed(self, client, dev):
+        """Forget a device that went away, ending any scan it had running"""
+        scan = self._scans.get(dev.get_path())
+        if scan is None:
+            return
+
+        logger.debug("ScanScheduler dropping device: {}", dev.get_iface())
+        if scan.in_flight:
+            self._finish_scan(scan, False)
+        if scan.deferred_source_id is not None:
+            GLib.source_remove(scan.deferred_source_id)
+            scan.deferred_source_id = None
+        dev.disconnect(scan.notify_handler)
+        del self._scans[dev.get_path()]
+
+    def _on_last_scan_changed(self, dev, pspec):
+        """A device finished a scan, ours or one NetworkManager ran itself"""
+        scan = self._scans.get(dev.get_path())
+        self.results_at = time.monotonic()
+
+        if scan is not None and scan.in_flight:
+            logger.info(
+                "Fresh scan results on {} after {:.2f}s ({} requests coalesced)",
+                dev.get_iface(),
+                time.monotonic() - scan.requested_at,
+                scan.coalesced,
+            )
+            self._finish_scan(scan, True)
+        else:
+            self._publish(ScanResult(dev.get_iface(), True, None))
+
+    def _publish(self, result: ScanResult):
+        for callback in list(self._subscribers.values()):
+            try:
+                callback(result)
+            except Exception as e:
+                logger.exception(f"Error in ScanScheduler subscriber: {e}")
+
+
+_scheduler: Optional[ScanScheduler] = None
+
+
+def get_scan_scheduler() -> ScanScheduler:
+    """Get the shared scan scheduler, creating it on first use"""
+    global _scheduler
+
+    if _scheduler is None:
+        _scheduler = ScanScheduler(get_client())
+
+    return _scheduler
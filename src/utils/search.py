@@ -0,0 +1,125 @@
+import re
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+# How well a name matches a query, best first
+MATCH_PREFIX = 0
+MATCH_SUBSTRING = 1
+MATCH_FUZZY = 2
+
+
+def _compile(query: str) -> Callable[[str], Optional[int]]:
+    """Build the scorer for a query, called with casefolded names"""
+    needle = query.casefold()
+    # The query's characters in order, anything in between
+    fuzzy = re.compile(".*?".join(map(re.escape, needle)), re.DOTALL).search
+
+    def score(key: str) -> Optional[int]:
+        if key.startswith(needle):
+            return MATCH_PREFIX
+        if needle in key:
+            return MATCH_SUBSTRING
+        if fuzzy(key):
+            return MATCH_FUZZY
+        return None
+
+    return score
+
+
+class SearchIndex:
+    """Network names matched against a type-ahead query, kept incrementally
+
+    Names are casefolded once when added. A query matches a name it is a
+    prefix or substring of, or failing that whose characters it contains in
+    order. The matches of the current query are kept, so adding or removing
+    a name costs one comparison, and a query extending the previous one only
+    re-checks the previous matches, since nothing else can match it.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        # Name -> casefolded name
+        self._keys: Dict[str, str] = {}
+        # Name -> score, for the names matching the current query
+        self._matches: Dict[str, int] = {}
+        self._score: Optional[Callable[[str], Optional[int]]] = None
+        self.query = ""
+
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._keys
+
+    def add(self, name: str) -> bool:
+        """Index a name, returns whether it matches the current query"""
+        if name in self._keys:
+            return self.is_match(name)
+
+        key = self._keys[name] = name.casefold()
+        if self._score is None:
+            return True
+
+        score = self._score(key)
+        if score is None:
+            return False
+
+        self._matches[name] = score
+        return True
+
+    def remove(self, name: str):
+        """Drop a name from the index"""
+        self._keys.pop(name, None)
+        self._matches.pop(name, None)
+
+    def is_match(self, name: str) -> bool:
+        """Whether a name is shown for the current query"""
+        return self._score is None or name in self._matches
+
+    def get_score(self, name: str) -> Optional[int]:
+        """How well a name matches the current query, None if it does not"""
+        if self._score is None:
+            return MATCH_PREFIX if name in self._keys else None
+        return self._matches.get(name)
+
+    def set_query(self, query: str) -> Tuple[Set[str], Set[str]]:
+        """Match against a new query
+
+        Returns the names that became shown and those that became hidden, so
+        callers only re-filter those.
+        """
+        query = query.strip()
+        previous_query = self.query.casefold()
+        self.query = query
+
+        if not query:
+            # Everything is shown again
+            shown = set() if self._score is None else self._keys.keys() - self._matches
+            self._score = None
+            self._matches = {}
+            return shown, set()
+
+        score = _compile(query)
+        if self._score is not None and query.casefold().startswith(previous_query):
+            # Narrowing: only the previous matches can still match
+            candidates = self._matches
+        else:
+            candidates = self._keys
+
+        keys = self._keys
+        matches = {}
+        for name in candidates:
+            name_score = score(keys[name])
+            if name_score is not None:
+                matches[name] = name_score
+
+        if self._score is None:
+            shown, hidden = set(), self._keys.keys() - matches
+        else:
+            shown = matches.keys() - self._matches.keys()
+            hidden = self._matches.keys() - matches.keys()
+
+        self._score = score
+        self._matches = matches
+        return shown, hidden
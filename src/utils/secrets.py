@@ -0,0 +1,183 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+import gi
+from loguru import logger
+
+gi.require_version("NM", "1.0")
+
+from gi.repository import GLib, NM  # noqa: E402
+
+from .backends import get_client  # noqa: E402
+from .metrics import get_metrics  # noqa: E402
+from .tasks import gio_call  # noqa: E402
+
+# How long a profile without a PSK, or whose secrets could not be read, is
+# remembered as such before asking NetworkManager again
+NEGATIVE_TTL_SECONDS = 60
+
+
+def psk_from_secrets(secrets_variant) -> str:
+    """Get the Wi-Fi PSK out of a get_secrets() result, or an empty string"""
+    if secrets_variant is None:
+        logger.error("No secrets found for the connection")
+        return ""
+
+    try:
+        secrets = secrets_variant.unpack()
+    except Exception as ue:
+        logger.error(f"Failed to unpack secrets: {ue}")
+        return ""
+
+    wireless_secrets = secrets.get(NM.SETTING_WIRELESS_SECURITY_SETTING_NAME, {})
+    return wireless_secrets.get(NM.SETTING_WIRELESS_SECURITY_PSK) or ""
+
+
+class SecretCache:
+    """Wi-Fi PSKs of saved profiles, cached by connection UUID
+
+    Reading a secret goes through NetworkManager's secret agents, which can
+    take a while and may prompt polkit, so each profile's PSK is fetched once
+    with get_secrets_async and kept. An entry is dropped when its profile's
+    changed signal fires or when it stops being an active connection.
+    Profiles without a PSK, such as open networks, and failed fetches are
+    remembered for NEGATIVE_TTL_SECONDS. Concurrent requests for the same
+    profile share one fetch, and a fetch that was invalidated while in
+    flight is not stored.
+
+    Must be used from the main thread.
+    """
+
+    def __init__(self, client):
+        logger.debug("Initializing SecretCache")
+        self.client = client
+        # UUID -> (PSK, profile, changed handler id, expiry or None)
+        self._secrets: Dict[str, tuple] = {}
+        # UUID -> future of the fetch in flight
+        self._fetches: Dict[str, asyncio.Future] = {}
+        # UUID -> count of invalidations, checked before storing a fetch
+        self._generations: Dict[str, int] = {}
+
+        self._client_handlers = [
+            client.connect("active-connection-added", self._on_active_changed),
+            client.connect("active-connection-removed", self._on_active_changed),
+        ]
+
+    def get_cached(self, conn) -> Optional[str]:
+        """Get the cached PSK of a profile, or None if not cached"""
+        entry = self._secrets.get(conn.get_uuid())
+        if entry is None:
+            return None
+        if entry[3] is not None and time.monotonic() >= entry[3]:
+            self.invalidate(conn.get_uuid())
+            return None
+        return entry[0]
+
+    def store(self, conn, psk: str):
+        """Remember the PSK of a profile until it changes or is deactivated
+
+        An empty PSK is only remembered for NEGATIVE_TTL_SECONDS.
+        """
+        uuid = conn.get_uuid()
+        expires_at = None if psk else time.monotonic() + NEGATIVE_TTL_SECONDS
+        handler_id = conn.connect("changed", self._on_connection_changed)
+        previous = self._secrets.pop(uuid, None)
+        self._secrets[uuid] = (psk, conn, handler_id, expires_at)
+        if previous is not None:
+            previous[1].disconnect(previous[2])
+
+    async def get_psk(self, conn) -> str:
+        """Get the PSK of a profile, fetching it only when not cached"""
+        psk = self.get_cached(conn)
+        if psk is not None:
+            get_metrics().counter("secrets.cache_hits").inc()
+            return psk
+
+        uuid = conn.get_uuid()
+        fetch = self._fetches.get(uuid)
+        if fetch is None:
+            get_metrics().counter("secrets.fetches").inc()
+            fetch = self._fetches[uuid] = asyncio.ensure_future(self._fetch(conn))
+            fetch.add_done_callback(lambda done: self._forget_fetch(uuid, done))
+
+        # Shield the shared fetch from the cancellation of one caller
+        return await asyncio.shield(fetch)
+
+    def invalidate(self, uuid: str):
+        """Forget the PSK of a profile, including one still being fetched"""
+        self._generations[uuid] = self._generations.get(uuid, 0) + 1
+        # Later requests start a fresh fetch rather than join the stale one
+        self._fetches.pop(uuid, None)
+
+        entry = self._secrets.pop(uuid, None)
+        if entry is not None:
+            logger.debug("Forgetting cached secrets of {}", uuid)
+            entry[1].disconnect(entry[2])
+
+    def close(self):
+        """Disconnect from every libnm signal and forget every secret"""
+        for handler_id in self._client_handlers:
+            self.client.disconnect(handler_id)
+        self._client_handlers = []
+
+        for uuid in list(self._secrets):
+            self.invalidate(uuid)
+
+    async def _fetch(self, conn) -> str:
+        uuid = conn.get_uuid()
+        generation = self._generations.get(uuid, 0)
+        # Catch changes to the profile made while the fetch is running
+        handler_id = conn.connect("changed", self._on_connection_changed)
+
+        try:
+            secrets_variant = await gio_call(
+                conn.get_secrets_async,
+                conn.get_secrets_finish,
+                NM.SETTING_WIRELESS_SECURITY_SETTING_NAME,
+            )
+            psk = psk_from_secrets(secrets_variant)
+        except GLib.Error as e:
+            logger.warning(f"Could not read secrets of {uuid}: {e.message}")
+            psk = ""
+        finally:
+            conn.disconnect(handler_id)
+
+        # The profile changed or was deactivated while the fetch was running
+        if self._generations.get(uuid, 0) != generation:
+            logger.debug("Not caching secrets of {} fetched before a change", uuid)
+            return psk
+
+        self.store(conn, psk)
+        return psk
+
+    def _forget_fetch(self, uuid: str, fetch: asyncio.Future):
+        if self._fetches.get(uuid) is fetch:
+            del self._fetches[uuid]
+
+    def _on_connection_changed(self, conn):
+        self.invalidate(conn.get_uuid())
+
+    def _on_active_changed(self, client, active_conn):
+        """Keep only the secrets of profiles that are still active"""
+        active = {conn.get_uuid() for conn in client.get_active_connections()}
+        for uuid in self._secrets.keys() | self._fetches.keys():
+            if uuid not in active:
+                self.invalidate(uuid)
+
+
+_cache: Optional[SecretCache] = None
+
+
+def get_secret_cache() -> SecretCache:
+    """Get the shared secret cache, creating it on first use
+
+    Must be called from the main thread, since libnm delivers its signals on
+    the main context.
+    """
+    global _cache
+
+    if _cache is None:
+        _cache = SecretCache(get_client())
+
+    return _cache
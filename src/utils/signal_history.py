@@ -0,0 +1,140 @@
+import threading
+import time
+from array import array
+from collections import OrderedDict, namedtuple
+from typing import List, Optional, Tuple
+
+from loguru import logger
+
+# Strength samples kept per BSSID
+HISTORY_SAMPLES = 256
+
+# BSSIDs with history; the least recently updated is forgotten beyond this
+MAX_BSSIDS = 2048
+
+# Summary of the samples in a time window. Variance is the population
+# variance of the strength in percent squared.
+SignalStats = namedtuple(
+    "SignalStats", ["count", "minimum", "average", "maximum", "variance"]
+)
+
+
+class StrengthRing:
+    """Fixed-size ring buffer of (timestamp, strength) samples
+
+    Both columns live in arrays allocated up front, so appending never
+    allocates and the memory of a ring never changes.
+    """
+
+    __slots__ = ("_times", "_strengths", "_head", "_count")
+
+    def __init__(self, size: int = HISTORY_SAMPLES):
+        self._times = array("d", bytes(8 * size))
+        self._strengths = array("b", bytes(size))
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp: float, strength: int):
+        """Add a sample, overwriting the oldest one when full"""
+        self._times[self._head] = timestamp
+        self._strengths[self._head] = strength
+        self._head = (self._head + 1) % len(self._times)
+        self._count = min(self._count + 1, len(self._times))
+
+    def last(self) -> Optional[Tuple[float, int]]:
+        """Get the newest sample, or None"""
+        if not self._count:
+            return None
+        index = (self._head - 1) % len(self._times)
+        return self._times[index], self._strengths[index]
+
+    def samples(self, since: float = float("-inf")) -> List[Tuple[float, int]]:
+        """Get the samples taken at or after since, oldest first"""
+        size = len(self._times)
+        start = (self._head - self._count) % size
+        result = []
+        for offset in range(self._count):
+            index = (start + offset) % size
+            if self._times[index] >= since:
+                result.append((self._times[index], self._strengths[index]))
+        return result
+
+
+class SignalHistory:
+    """Strength history for every BSSID seen, in bounded memory
+
+    Each BSSID gets a StrengthRing of HISTORY_SAMPLES samples and at most
+    MAX_BSSIDS are kept, so a session running for weeks uses the same memory
+    as one running for an hour. Timestamps come from time.monotonic().
+    """
+
+    def __init__(self, samples: int = HISTORY_SAMPLES, max_bssids: int = MAX_BSSIDS):
+        self.samples_per_bssid = samples
+        self.max_bssids = max_bssids
+        self._lock = threading.Lock()
+        self._rings: "OrderedDict[str, StrengthRing]" = OrderedDict()
+
+    def record(self, bssid: str, strength: int, timestamp: Optional[float] = None):
+        """Add a strength sample for a BSSID"""
+        if not bssid:
+            return
+
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        with self._lock:
+            ring = self._rings.get(bssid)
+            if ring is None:
+                if len(self._rings) >= self.max_bssids:
+                    forgotten, _ring = self._rings.popitem(last=False)
+                    logger.debug("Forgetting signal history of {}", forgotten)
+                ring = self._rings[bssid] = StrengthRing(self.samples_per_bssid)
+            else:
+                self._rings.move_to_end(bssid)
+
+            ring.append(timestamp, strength)
+
+    def get_samples(
+        self, bssid: str, window: Optional[float] = None
+    ) -> List[Tuple[float, int]]:
+        """Get the (timestamp, strength) samples of the last window seconds"""
+        since = time.monotonic() - window if window is not None else float("-inf")
+        with self._lock:
+            ring = self._rings.get(bssid)
+            return ring.samples(since) if ring else []
+
+    def stats(self, bssid: str, window: Optional[float] = None) -> SignalStats:
+        """Get min/avg/max and variance of the last window seconds"""
+        strengths = [strength for _time, strength in self.get_samples(bssid, window)]
+        if not strengths:
+            return SignalStats(0, None, None, None, None)
+
+        count = len(strengths)
+        average = sum(strengths) / count
+        variance = sum((s - average) ** 2 for s in strengths) / count
+        return SignalStats(count, min(strengths), average, max(strengths), variance)
+
+    def forget(self, bssid: str):
+        """Drop the history of a BSSID"""
+        with self._lock:
+            self._rings.pop(bssid, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rings)
+
+
+_history: Optional[SignalHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_signal_history() -> SignalHistory:
+    """Get the signal history shared by the network model and the UI"""
+    global _history
+
+    with _history_lock:
+        if _history is None:
+            _history = SignalHistory()
+
+    return _history
@@ -0,0 +1,190 @@
+import threading
+from typing import Dict, List, Optional
+
+import gi
+from loguru import logger
+
+gi.require_version("NM", "1.0")
+
+from gi.repository import NM  # noqa: E402
+
+from .access_point import AccessPointRecord, ssid_to_str  # noqa: E402
+from .backends import is_wifi_device  # noqa: E402
+
+
+class ScanSnapshot:
+    """Indexed view of the Wi-Fi devices and access points for one generation
+
+    Built with a single sweep over every device and access point, copying
+    each into an AccessPointRecord, after which lookups by SSID, BSSID,
+    object path and active state are dictionary hits. Records hold the values
+    of when the snapshot was built, strength included. With several Wi-Fi
+    devices, a BSSID they all hear is listed once per network, as seen by
+    the device hearing it best, and seen_by records the strength on each.
+    """
+
+    def __init__(self, generation: int, stamp, wifi_devices, active_connections):
+        self.generation = generation
+        self.stamp = stamp
+        self.wifi_devices = list(wifi_devices)
+
+        # SSID -> [records], one per BSSID, strongest first
+        self.by_ssid: Dict[str, List[AccessPointRecord]] = {}
+        # BSSID -> strongest record, as several devices may see one BSSID
+        self.by_bssid: Dict[str, AccessPointRecord] = {}
+        # BSSID -> {interface name: strength} for every device that sees it
+        self.seen_by: Dict[str, Dict[str, int]] = {}
+        # Object path -> record
+        self.by_path: Dict[str, AccessPointRecord] = {}
+        # Interface name -> device
+        self.device_by_iface: Dict[str, object] = {}
+        # Interface name -> record of the active access point
+        self.active_ap: Dict[str, AccessPointRecord] = {}
+        # SSID -> (active connection, device)
+        self.active_by_ssid: Dict[str, tuple] = {}
+        self.active_ssid = ""
+
+        # Raw SSID -> (display name, raw SSID), shared by a network's records
+        names: Dict[bytes, tuple] = {}
+        # Records of named access points without a BSSID, which cannot merge
+        unmerged: List[AccessPointRecord] = []
+
+        for dev in self.wifi_devices:
+            iface = dev.get_iface()
+            self.device_by_iface[iface] = dev
+
+            for ap in dev.get_access_points():
+                ssid_gbytes = ap.get_ssid()
+                ssid_bytes = ssid_gbytes.get_data() if ssid_gbytes else b""
+                ssid = ""
+                if ssid_bytes:
+                    known = names.get(ssid_bytes)
+                    if known is None:
+                        known = names[ssid_bytes] = (
+                            ssid_to_str(ssid_bytes),
+                            ssid_bytes,
+                        )
+                    ssid, ssid_bytes = known
+
+                record = AccessPointRecord.from_access_point(
+                    ap, iface, ssid, ssid_bytes
+                )
+                self.by_path[record.path] = record
+
+                if record.bssid:
+                    self.seen_by.setdefault(record.bssid, {})[iface] = record.strength
+                    known = self.by_bssid.get(record.bssid)
+                    if known is None or record.strength > known.strength:
+                        self.by_bssid[record.bssid] = record
+                elif ssid:
+                    unmerged.append(record)
+
+            active_ap = dev.get_active_access_point()
+            if active_ap:
+                record = self.by_path.get(active_ap.get_path())
+                if record is not None:
+                    self.active_ap[iface] = record
+
+        # A BSSID heard by several devices counts once, through the device
+        # hearing it best
+        for record in (*self.by_bssid.values(), *unmerged):
+            if record.ssid:
+                self.by_ssid.setdefault(record.ssid, []).append(record)
+
+        for records in self.by_ssid.values():
+            records.sort(key=lambda record: record.strength, reverse=True)
+
+        # Match Wi-Fi active connections to the SSID of their device's AP
+        for active_conn in active_connections:
+            if active_conn.get_connection_type() != NM.SETTING_WIRELESS_SETTING_NAME:
+                continue
+
+            for dev in active_conn.get_devices():
+                record = self.active_ap.get(dev.get_iface())
+                if record and record.ssid:
+                    self.active_by_ssid.setdefault(record.ssid, (active_conn, dev))
+                    self.active_ssid = self.active_ssid or record.ssid
+
+    def get_access_point(self, ssid: str) -> Optional[AccessPointRecord]:
+        """Get the record of the strongest access point for an SSID, or None"""
+        records = self.by_ssid.get(ssid)
+        return records[0] if records else None
+
+    def get_access_points(self, ssid: str) -> List[AccessPointRecord]:
+        """Get the records of every access point of an SSID, strongest first"""
+        return list(self.by_ssid.get(ssid, ()))
+
+    def get_device(self, record: AccessPointRecord):
+        """Get the device that reported an access point"""
+        return self.device_by_iface.get(record.iface)
+
+    def get_radios(self, ssid: str) -> Dict[str, int]:
+        """Get the best strength each device sees a network at, best first"""
+        radios: Dict[str, int] = {}
+        for record in self.by_ssid.get(ssid, ()):
+            for iface, strength in self.seen_by.get(record.bssid, {}).items():
+                radios[iface] = max(strength, radios.get(iface, 0))
+        return dict(sorted(radios.items(), key=lambda item: item[1], reverse=True))
+
+    def is_active(self, ssid: str) -> bool:
+        """Whether a network is active on any device"""
+        return ssid in self.active_by_ssid
+
+
+_lock = threading.Lock()
+_snapshot: Optional[ScanSnapshot] = None
+_invalidations = 0
+
+
+def invalidate_snapshot():
+    """Force the next get_snapshot() call to rebuild
+
+    Called for changes the generation stamp cannot see, like an access point
+    appearing between two scans.
+    """
+    global _invalidations
+    _invalidations += 1
+
+
+def _path_of(obj) -> Optional[str]:
+    return obj.get_path() if obj else None
+
+
+def get_snapshot(client) -> ScanSnapshot:
+    """Get the snapshot for the current scan generation, building it if stale
+
+    The generation stamp only reads cached libnm properties (each device's
+    last scan time and active access point, and the active connections), so
+    checking it is far cheaper than sweeping the access points again.
+    """
+    global _snapshot
+
+    wifi_devices = [dev for dev in client.get_devices() if is_wifi_device(dev)]
+    active_connections = client.get_active_connections()
+    stamp = (
+        _invalidations,
+        tuple(
+            (
+                dev.get_path(),
+                dev.get_last_scan(),
+                _path_of(dev.get_active_access_point()),
+            )
+            for dev in wifi_devices
+        ),
+        tuple(active_conn.get_path() for active_conn in active_connections),
+    )
+
+    with _lock:
+        if _snapshot is None or _snapshot.stamp != stamp:
+            generation = _snapshot.generation + 1 if _snapshot else 1
+            _snapshot = ScanSnapshot(
+                generation, stamp, wifi_devices, active_connections
+            )
+            logger.info(
+                "Built scan snapshot generation {}: {} access points, {} networks",
+                generation,
+                len(_snapshot.by_path),
+                len(_snapshot.by_ssid),
+            )
+
+        return _snapshot
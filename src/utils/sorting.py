@@ -0,0 +1,158 @@
+import bisect
+from collections import namedtuple
+from typing import Dict, Iterator, List, Optional
+
+# Orders the network list can be sorted in
+SORT_STRENGTH = "strength"
+SORT_SECURITY = "security"
+SORT_BAND = "band"
+SORT_LAST_SEEN = "last-seen"
+SORT_KNOWN = "known"
+SORT_NAME = "name"
+
+SORT_KEYS = (
+    SORT_STRENGTH,
+    SORT_SECURITY,
+    SORT_BAND,
+    SORT_LAST_SEEN,
+    SORT_KNOWN,
+    SORT_NAME,
+)
+
+# Strength changes smaller than this, in percent, leave a network where it is
+STRENGTH_HYSTERESIS = 8
+
+# Networks last seen within this many seconds of each other count as equally
+# recent, so one scan's worth of results sorts by strength
+LAST_SEEN_GRANULARITY = 10
+
+# Strongest security first, unknown last
+SECURITY_RANKS = {"WPA2": 0, "WPA": 1, "WEP": 2, "Open": 3}
+
+# What a network is sorted on. last_seen is a Unix timestamp, frequency is in
+# MHz and 0 when unknown.
+NetworkSortInfo = namedtuple(
+    "NetworkSortInfo",
+    ["strength", "security", "frequency", "last_seen", "is_known", "is_active"],
+)
+
+
+def band_rank(frequency: int) -> int:
+    """Rank a frequency's band, 6 GHz first and unknown last"""
+    if frequency >= 5925:
+        return 0
+    if frequency >= 4900:
+        return 1
+    if frequency > 0:
+        return 2
+    return 3
+
+
+def _sort_key(sort_key: str, name: str, info: NetworkSortInfo) -> tuple:
+    """Key placing a network in the list, the active network always first"""
+    strength = -info.strength
+    if sort_key == SORT_STRENGTH:
+        primary = (strength,)
+    elif sort_key == SORT_SECURITY:
+        primary = (SECURITY_RANKS.get(info.security, len(SECURITY_RANKS)), strength)
+    elif sort_key == SORT_BAND:
+        primary = (band_rank(info.frequency), strength)
+    elif sort_key == SORT_LAST_SEEN:
+        primary = (-(info.last_seen // LAST_SEEN_GRANULARITY), strength)
+    elif sort_key == SORT_KNOWN:
+        primary = (not info.is_known, strength)
+    else:
+        primary = ()
+
+    # The name breaks ties, so the order never depends on arrival order
+    return (not info.is_active, *primary, name.casefold(), name)
+
+
+class SortedNetworks:
+    """Network names kept sorted on one of SORT_KEYS, updated in place
+
+    Each network's sort key is kept in a bisected list, so updating one
+    network costs a lookup and a single re-insert rather than a sort of the
+    whole list, and a network whose key did not change is not touched at all.
+    The strength sorted on only follows the reported strength once they
+    differ by STRENGTH_HYSTERESIS, which stops networks of about the same
+    strength from swapping places at every scan.
+    """
+
+    def __init__(self, sort_key: str = SORT_STRENGTH):
+        if sort_key not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key {sort_key}")
+
+        self.sort_key = sort_key
+        # Sort keys in list order, each ending with the network's name
+        self._keys: List[tuple] = []
+        # Name -> sort key
+        self._key_of: Dict[str, tuple] = {}
+        # Name -> info sorted on, with the strength held back by hysteresis
+        self._info: Dict[str, NetworkSortInfo] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._key_of
+
+    def __iter__(self) -> Iterator[str]:
+        return (key[-1] for key in self._keys)
+
+    def names(self) -> List[str]:
+        """Get the network names in list order"""
+        return [key[-1] for key in self._keys]
+
+    def index(self, name: str) -> int:
+        """Get the position of a network in the list"""
+        return bisect.bisect_left(self._keys, self._key_of[name])
+
+    def get_info(self, name: str) -> Optional[NetworkSortInfo]:
+        """Get what a network is currently sorted on, or None"""
+        return self._info.get(name)
+
+    def update(self, name: str, info: NetworkSortInfo) -> bool:
+        """Add or update a network, returns whether its sort key changed"""
+        previous = self._info.get(name)
+        if (
+            previous is not None
+            and abs(info.strength - previous.strength) < STRENGTH_HYSTERESIS
+        ):
+            # One tuple comparison of every other field, as this runs for every
+            # network per refresh
+            if info[1:] == previous[1:]:
+                return False
+            info = info._replace(strength=previous.strength)
+        self._info[name] = info
+
+        key = _sort_key(self.sort_key, name, info)
+        old_key = self._key_of.get(name)
+        if key == old_key:
+            return False
+
+        if old_key is not None:
+            del self._keys[bisect.bisect_left(self._keys, old_key)]
+        bisect.insort(self._keys, key)
+        self._key_of[name] = key
+        return True
+
+    def remove(self, name: str):
+        """Drop a network"""
+        self._info.pop(name, None)
+        key = self._key_of.pop(name, None)
+        if key is not None:
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def set_sort_key(self, sort_key: str):
+        """Sort on another key, re-sorting every network once"""
+        if sort_key not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key {sort_key}")
+        if sort_key == self.sort_key:
+            return
+
+        self.sort_key = sort_key
+        self._key_of = {
+            name: _sort_key(sort_key, name, info) for name, info in self._info.items()
+        }
+        self._keys = sorted(self._key_of.values())
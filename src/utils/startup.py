@@ -0,0 +1,43 @@
+import os
+import time
+from typing import Dict
+
+from loguru import logger
+
+
+def _process_start() -> float:
+    """Boot-clock time at which this process was started
+
+    Read from /proc so interpreter startup and imports are counted too. Falls
+    back to the time this module was imported.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name start at field 3
+            fields = f.read().rsplit(")", 1)[1].split()
+        return int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+
+
+_started = _process_start()
+_marks: Dict[str, float] = {}
+
+
+def elapsed() -> float:
+    """Seconds since the process started"""
+    return time.clock_gettime(time.CLOCK_BOOTTIME) - _started
+
+
+def mark(event: str):
+    """Record when a startup milestone was first reached"""
+    if event in _marks:
+        return
+
+    _marks[event] = elapsed()
+    logger.info("Startup: {} after {:.0f} ms", event, _marks[event] * 1000)
+
+
+def get_marks() -> Dict[str, float]:
+    """Get the recorded milestones, in seconds since the process started"""
+    return dict(_marks)
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import gi
+from loguru import logger
+
+from gi.repository import Gio
+
+
+def install_event_loop() -> bool:
+    """Make asyncio run on the GLib main loop
+
+    With PyGObject's GLibEventLoopPolicy in place, the loop that
+    Gtk.Application.run() iterates is also the asyncio event loop, so
+    coroutines and libnm callbacks share the main thread. Must be called
+    before the application runs. Returns False if PyGObject is too old
+    (before 3.50) to provide the policy.
+    """
+    try:
+        from gi.events import GLibEventLoopPolicy
+    except ImportError:
+        logger.warning(f"PyGObject {gi.__version__} has no asyncio integration")
+        return False
+
+    asyncio.set_event_loop_policy(GLibEventLoopPolicy())
+    logger.info("Running asyncio on the GLib main loop")
+    return True
+
+
+def gio_call(start: Callable, finish: Callable, *args) -> Awaitable:
+    """Await a GIO style *_async/*_finish pair
+
+    start is called as start(*args, cancellable, callback) and the result of
+    finish(result) becomes the result of the await. Cancelling the awaiting
+    task cancels the underlying call.
+    """
+    future = asyncio.get_event_loop().create_future()
+    cancellable = Gio.Cancellable()
+
+    def on_done(source, result, *user_data):
+        if future.cancelled():
+            return
+        try:
+            future.set_result(finish(result))
+        except Exception as e:
+            future.set_exception(e)
+
+    def on_cancelled(future):
+        if future.cancelled():
+            cancellable.cancel()
+
+    future.add_done_callback(on_cancelled)
+    start(*args, cancellable, on_done, None)
+    return future
+
+
+class KeyedTasks:
+    """asyncio tasks with single-flight requests per key
+
+    The coroutine counterpart of KeyedExecutor: a newer task for a key, such
+    as "network-details", cancels the older one. Tasks run on the main loop,
+    so results are delivered to their callback without a thread hop.
+    """
+
+    def __init__(self):
+        logger.debug("Initializing KeyedTasks")
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {"submitted": 0, "cancelled": 0, "completed": 0, "failed": 0}
+
+    def spawn(
+        self,
+        key: Hashable,
+        coro: Awaitable,
+        callback: Optional[Callable[[Any], None]] = None,
+    ) -> asyncio.Task:
+        """Run a coroutine as a task, cancelling the earlier task for key"""
+        self.cancel(key)
+        self._stats["submitted"] += 1
+
+        task = asyncio.get_event_loop().create_task(coro)
+        self._tasks[key] = task
+        task.add_done_callback(lambda task: self._on_done(key, task, callback))
+        return task
+
+    def cancel(self, key: Hashable):
+        """Cancel the task for key, if one is running"""
+        task = self._tasks.pop(key, None)
+        if task is not None and not task.done():
+            task.cancel()
+            self._stats["cancelled"] += 1
+            logger.debug("Cancelled task for {}", key)
+
+    def cancel_all(self):
+        """Cancel every running task"""
+        for key in list(self._tasks):
+            self.cancel(key)
+
+    def get_stats(self) -> dict:
+        """Get task counters and the number of running tasks"""
+        stats = dict(self._stats)
+        stats["running"] = sum(not task.done() for task in self._tasks.values())
+        return stats
+
+    def _on_done(self, key, task, callback):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if task.cancelled():
+            return
+
+        error = task.exception()
+        if error is not None:
+            self._stats["failed"] += 1
+            logger.opt(exception=error).error(f"Error in task for {key}: {error}")
+            return
+
+        self._stats["completed"] += 1
+        if callback is not None:
+            try:
+                callback(task.result())
+            except Exception as e:
+                logger.exception(f"Error delivering result for {key}: {e}")
+
+
+_tasks: Optional[KeyedTasks] = None
+_tasks_lock = threading.Lock()
+
+
+def get_tasks() -> KeyedTasks:
+    """Get the task group shared by all widgets"""
+    global _tasks
+
+    with _tasks_lock:
+        if _tasks is None:
+            _tasks = KeyedTasks()
+
+    return _tasks
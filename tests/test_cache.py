@@ -0,0 +1,81 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip("gi")
+
+from src.utils import cache  # noqa: E402
+from src.utils.cache import (  # noqa: E402
+    CACHE_VERSION,
+    CachedNetwork,
+    load_cached_networks,
+    write_cached_networks,
+)
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = tmp_path / "komodo" / "networks.json"
+    monkeypatch.setattr(cache, "get_cache_path", lambda: str(path))
+    return path
+
+
+def write_rows(path, networks):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"version": CACHE_VERSION, "networks": networks}))
+
+
+def test_round_trip_newest_first(cache_path):
+    now = int(time.time())
+    networks = [
+        CachedNetwork("old", "AA:AA", 40, "WPA2", now - 100, False),
+        CachedNetwork("new", "BB:BB", 70, "Open", now, True),
+    ]
+
+    write_cached_networks(networks)
+
+    assert load_cached_networks() == networks[::-1]
+
+
+def test_networks_past_max_age_are_dropped(cache_path):
+    now = int(time.time())
+    write_cached_networks(
+        [CachedNetwork("stale", "AA:AA", 40, "WPA2", now - 1000, False)]
+    )
+
+    assert load_cached_networks(max_age=10) == []
+
+
+def test_missing_or_unreadable_cache(cache_path):
+    assert load_cached_networks() == []
+
+    cache_path.parent.mkdir(parents=True)
+    cache_path.write_text("{not json")
+    assert load_cached_networks() == []
+
+
+@pytest.mark.parametrize("networks", [{"a": 1}, "abcdef", None, 5])
+def test_networks_that_are_not_a_list_count_as_no_cache(cache_path, networks):
+    write_rows(cache_path, networks)
+
+    assert load_cached_networks() == []
+
+
+def test_malformed_rows_are_skipped(cache_path):
+    now = int(time.time())
+    good = ["home", "AA:AA", 50, "WPA2", now, False]
+    write_rows(
+        cache_path,
+        [
+            ["home", "AA:AA", 50, "WPA2", "yesterday", False],
+            "abcdef",
+            [1, 2, 3],
+            ["home", "AA:AA", True, "WPA2", now, False],
+            ["home", None, 50, "WPA2", now, False],
+            None,
+            good,
+        ],
+    )
+
+    assert load_cached_networks() == [CachedNetwork(*good)]
@@ -0,0 +1,138 @@
+import time
+
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.repository import GLib  # noqa: E402
+
+from src.utils import connections  # noqa: E402
+from src.utils.backends import get_client, set_backend  # noqa: E402
+from src.utils.backends.simulated import (  # noqa: E402
+    SimulatedBackend,
+    SimulatedConfig,
+)
+from src.utils.connect import (  # noqa: E402
+    OUTCOME_ACTIVATED,
+    OUTCOME_CANCELLED,
+    OUTCOME_FAILED,
+    start_connection,
+)
+from src.utils.connections import get_connection_index  # noqa: E402
+from src.utils.snapshot import get_snapshot, invalidate_snapshot  # noqa: E402
+
+
+def run_until(predicate, timeout=5.0):
+    """Iterate the default main context until predicate() holds"""
+    context = GLib.MainContext.default()
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        if not context.iteration(False):
+            time.sleep(0.001)
+
+
+def settle(seconds=0.2):
+    """Run the main context for a while, letting late callbacks arrive"""
+    deadline = time.monotonic() + seconds
+    run_until(lambda: time.monotonic() >= deadline, timeout=seconds + 1)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    set_backend(
+        SimulatedBackend(
+            SimulatedConfig(
+                access_points=30, connect_latency=0.05, disconnect_latency=0.01
+            )
+        )
+    )
+    monkeypatch.setattr(connections, "_index", None)
+    invalidate_snapshot()
+    return get_client()
+
+
+@pytest.fixture
+def new_network(client):
+    """A secured network with no saved profile, so credentials are asked"""
+    snapshot = get_snapshot(client)
+    index = get_connection_index()
+    for ssid in snapshot.by_ssid:
+        record = snapshot.get_access_point(ssid)
+        if (
+            record.is_secured
+            and not snapshot.is_active(ssid)
+            and index.find_for_network(record.ssid_bytes, record.bssid) is None
+        ):
+            return ssid
+    pytest.fail("No secured network without a profile")
+
+
+def profile_ids(client):
+    return sorted(conn.get_id() for conn in client.get_connections())
+
+
+def active_ids(client):
+    return [active.get_id() for active in client.get_active_connections()]
+
+
+def password(value):
+    return lambda ssid, callback: callback(value)
+
+
+def test_connect_with_password(client, new_network):
+    results = []
+    start_connection(new_network, password("password"), results.append)
+
+    run_until(lambda: results)
+
+    assert results[0].outcome == OUTCOME_ACTIVATED
+    assert new_network in profile_ids(client)
+
+
+def test_wrong_password_forgets_the_new_profile(client, new_network):
+    before = profile_ids(client)
+    results = []
+    start_connection(new_network, password("wrong"), results.append)
+
+    run_until(lambda: results)
+    settle()
+
+    assert results[0].outcome == OUTCOME_FAILED
+    assert results[0].reason == "Invalid password"
+    assert profile_ids(client) == before
+
+
+def test_cancel_while_adding_deletes_the_late_profile(client, new_network):
+    before = profile_ids(client)
+    results = []
+    attempt = start_connection(new_network, password("password"), results.append)
+
+    # The profile is being saved; its callback has not run yet
+    attempt.cancel()
+    settle()
+
+    assert results[0].outcome == OUTCOME_CANCELLED
+    assert profile_ids(client) == before
+    assert new_network not in active_ids(client)
+
+
+def test_cancel_while_activating_deactivates_the_late_activation(
+    client, new_network, monkeypatch
+):
+    before = profile_ids(client)
+    results = []
+    attempts = []
+    activate = client.activate_connection_async
+
+    def activate_then_cancel(*args):
+        activate(*args)
+        attempts[0].cancel()
+
+    monkeypatch.setattr(client, "activate_connection_async", activate_then_cancel)
+    attempts.append(start_connection(new_network, password("password"), results.append))
+    settle()
+
+    assert results[0].outcome == OUTCOME_CANCELLED
+    assert profile_ids(client) == before
+    assert new_network not in active_ids(client)
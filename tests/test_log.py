@@ -0,0 +1,84 @@
+import pytest
+
+pytest.importorskip("gi")
+
+from loguru import logger  # noqa: E402
+
+from src.utils import log  # noqa: E402
+from src.utils.log import RateLimiter, sampled  # noqa: E402
+
+SITE = ("module", "function", 1)
+
+
+def test_limit_per_window():
+    limiter = RateLimiter(limit=3, window=60)
+
+    passed = [limiter.check(SITE) for _ in range(5)]
+
+    assert passed == [0, 0, 0, None, None]
+    assert limiter.suppressed == 2
+
+
+def test_next_record_after_the_window_reports_suppressed():
+    limiter = RateLimiter(limit=1, window=0)
+    limiter.window = 60
+    limiter.check(SITE)
+    limiter.check(SITE)
+    limiter.check(SITE)
+
+    limiter.window = 0
+
+    assert limiter.check(SITE) == 2
+    assert limiter.check(SITE) == 0
+
+
+def test_sampling_keeps_one_in_n():
+    limiter = RateLimiter(limit=100, window=60)
+
+    passed = [limiter.check(SITE, sample=3) is not None for _ in range(9)]
+
+    assert passed == [False, False, True] * 3
+    assert limiter.suppressed == 0
+
+
+def test_sites_are_limited_separately():
+    limiter = RateLimiter(limit=1, window=60)
+
+    assert limiter.check(SITE) == 0
+    assert limiter.check(("module", "function", 2)) == 0
+    assert limiter.check(SITE) is None
+
+
+@pytest.fixture
+def messages(monkeypatch):
+    monkeypatch.setattr(log, "_limiter", RateLimiter(limit=2, window=60))
+    logged = []
+    handler = logger.add(logged.append, level="DEBUG", format="{message}")
+    yield logged
+    logger.remove(handler)
+
+
+class CountsFormatting:
+    formatted = 0
+
+    def __format__(self, spec):
+        CountsFormatting.formatted += 1
+        return "value"
+
+
+def test_sampled_calls_are_dropped_before_formatting(messages):
+    value = CountsFormatting()
+    CountsFormatting.formatted = 0
+
+    for _ in range(10):
+        sampled(1).debug("Hot path {}", value)
+
+    assert [message.strip() for message in messages] == ["Hot path value"] * 2
+    assert CountsFormatting.formatted == 2
+
+
+def test_sampled_warnings_always_pass(messages):
+    for _ in range(5):
+        sampled(10).warning("Something is off")
+
+    assert len(messages) == 5
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("gi")
+
+from src.utils.metrics import Counter, Histogram, MetricsRegistry  # noqa: E402
+
+
+def test_empty_histogram():
+    histogram = Histogram("empty")
+
+    assert histogram.percentile(0.5) is None
+    assert histogram.to_dict()["count"] == 0
+    assert histogram.to_dict()["mean"] is None
+
+
+def test_percentiles_are_bucket_bounds_capped_at_the_maximum():
+    histogram = Histogram("latency", buckets=(0.1, 0.2, 0.5))
+    for seconds in (0.05, 0.05, 0.15, 0.3):
+        histogram.observe(seconds)
+
+    assert histogram.percentile(0.5) == 0.1
+    assert histogram.percentile(0.75) == 0.2
+    assert histogram.percentile(1.0) == 0.3
+
+
+def test_observations_over_the_last_bucket():
+    histogram = Histogram("latency", buckets=(0.1,))
+    histogram.observe(0.05)
+    histogram.observe(2.0)
+
+    values = histogram.to_dict()
+
+    assert values["buckets"] == {"0.1": 1, "+Inf": 1}
+    assert values["p99"] == 2.0
+    assert values["min"] == 0.05
+    assert values["max"] == 2.0
+    assert values["sum"] == pytest.approx(2.05)
+
+
+def test_registry_creates_metrics_once():
+    registry = MetricsRegistry()
+
+    counter = registry.counter("scan.completed")
+    counter.inc()
+    registry.counter("scan.completed").inc(2)
+
+    assert isinstance(counter, Counter)
+    assert counter.value == 3
+    with pytest.raises(TypeError):
+        registry.histogram("scan.completed")
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from src.utils.reconcile import (
+    OP_INSERT,
+    OP_MOVE,
+    OP_REMOVE,
+    OP_UPDATE,
+    diff_keyed,
+)
+
+
+def apply_ops(old, ops):
+    """Replay ops on a copy of old the way the list view does"""
+    rows = list(old)
+    for op in ops:
+        keys = [key for key, _value in rows]
+        if op.kind == OP_REMOVE:
+            assert keys[op.position] == op.key
+            del rows[op.position]
+        elif op.kind == OP_INSERT:
+            assert op.key not in keys
+            rows.insert(op.position, (op.key, op.value))
+        elif op.kind == OP_MOVE:
+            index = keys.index(op.key)
+            _key, value = rows.pop(index)
+            rows.insert(op.position, (op.key, value))
+        elif op.kind == OP_UPDATE:
+            rows[keys.index(op.key)] = (op.key, op.value)
+    return rows
+
+
+def random_rows(rng, keys):
+    return [(key, rng.randrange(3)) for key in keys]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_ops_turn_old_into_new(seed):
+    rng = random.Random(seed)
+    universe = [f"net-{n}" for n in range(rng.randrange(1, 40))]
+    old = random_rows(rng, rng.sample(universe, rng.randrange(len(universe) + 1)))
+    new = random_rows(rng, rng.sample(universe, rng.randrange(len(universe) + 1)))
+
+    assert apply_ops(old, diff_keyed(old, new)) == new
+
+
+def test_identical_lists_need_no_ops():
+    rows = [("a", 1), ("b", 2), ("c", 3)]
+
+    assert diff_keyed(rows, list(rows)) == []
+
+
+def test_one_moved_row_is_one_op():
+    old = [(key, None) for key in "abcdefgh"]
+    new = [(key, None) for key in "abcfdegh"]
+
+    ops = diff_keyed(old, new)
+
+    assert [(op.kind, op.key) for op in ops] == [(OP_MOVE, "f")]
+
+
+def test_changed_value_is_an_update_in_place():
+    ops = diff_keyed([("a", 1), ("b", 2)], [("a", 1), ("b", 3)])
+
+    assert [(op.kind, op.key, op.value) for op in ops] == [(OP_UPDATE, "b", 3)]
+
+
+def test_removals_come_first_from_the_end():
+    old = [(key, None) for key in "abcde"]
+
+    ops = diff_keyed(old, [("c", None)])
+
+    assert [(op.kind, op.position) for op in ops] == [
+        (OP_REMOVE, 4),
+        (OP_REMOVE, 3),
+        (OP_REMOVE, 1),
+        (OP_REMOVE, 0),
+    ]
@@ -0,0 +1,95 @@
+import random
+import re
+
+import pytest
+
+from src.utils.search import (
+    MATCH_FUZZY,
+    MATCH_PREFIX,
+    MATCH_SUBSTRING,
+    SearchIndex,
+)
+
+NAMES = ["Home", "home-5G", "Café Wi-Fi", "Office", "HOTEL guest", "eduroam", "ham"]
+
+
+def reference_score(query, name):
+    """Score a name from scratch, as SearchIndex is meant to"""
+    needle = query.strip().casefold()
+    key = name.casefold()
+    if not needle or key.startswith(needle):
+        return MATCH_PREFIX
+    if needle in key:
+        return MATCH_SUBSTRING
+    if re.search(".*?".join(map(re.escape, needle)), key, re.DOTALL):
+        return MATCH_FUZZY
+    return None
+
+
+def test_scores():
+    index = SearchIndex(NAMES)
+    index.set_query("ho")
+
+    assert index.get_score("Home") == MATCH_PREFIX
+    assert index.get_score("HOTEL guest") == MATCH_PREFIX
+    assert index.get_score("Office") is None
+    index.set_query("fi")
+    assert index.get_score("Café Wi-Fi") == MATCH_SUBSTRING
+    index.set_query("hm")
+    assert index.get_score("ham") == MATCH_FUZZY
+    assert index.get_score("Office") is None
+
+
+def test_empty_query_shows_everything_again():
+    index = SearchIndex(NAMES)
+    index.set_query("office")
+
+    shown, hidden = index.set_query("  ")
+
+    assert shown == set(NAMES) - {"Office"}
+    assert hidden == set()
+    assert all(index.is_match(name) for name in NAMES)
+
+
+def test_names_added_and_removed_under_a_query():
+    index = SearchIndex(NAMES)
+    index.set_query("home")
+
+    assert index.add("Homestead") is True
+    assert index.add("Garage") is False
+    index.remove("Home")
+    assert not index.is_match("Home")
+    assert "Home" not in index
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_typing_matches_reference(seed):
+    rng = random.Random(seed)
+    alphabet = "abeho -5"
+    names = {
+        "".join(rng.choice(alphabet) for _ in range(rng.randrange(1, 10)))
+        for _ in range(60)
+    }
+    index = SearchIndex(names)
+    shown_now = set(names)
+    query = ""
+
+    for _ in range(30):
+        # Mostly type, sometimes delete or start over
+        action = rng.random()
+        if action < 0.6:
+            query += rng.choice(alphabet)
+        elif action < 0.9:
+            query = query[:-1]
+        else:
+            query = ""
+
+        shown, hidden = index.set_query(query)
+        assert not shown & shown_now
+        assert hidden <= shown_now
+        shown_now = (shown_now - hidden) | shown
+
+        expected = {name for name in names if reference_score(query, name) is not None}
+        assert shown_now == expected
+        for name in names:
+            assert index.get_score(name) == reference_score(query, name)
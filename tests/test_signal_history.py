@@ -0,0 +1,55 @@
+from src.utils.signal_history import SignalHistory, StrengthRing
+
+
+def test_ring_keeps_the_newest_samples():
+    ring = StrengthRing(4)
+    for n in range(10):
+        ring.append(float(n), n * 10)
+
+    assert len(ring) == 4
+    assert ring.samples() == [(6.0, 60), (7.0, 70), (8.0, 80), (9.0, 90)]
+    assert ring.samples(since=8.0) == [(8.0, 80), (9.0, 90)]
+    assert ring.last() == (9.0, 90)
+
+
+def test_empty_ring():
+    ring = StrengthRing(4)
+
+    assert ring.last() is None
+    assert ring.samples() == []
+
+
+def test_least_recently_updated_bssid_is_forgotten():
+    history = SignalHistory(samples=8, max_bssids=2)
+    history.record("AA", 50, timestamp=1.0)
+    history.record("BB", 60, timestamp=2.0)
+    history.record("AA", 55, timestamp=3.0)
+    history.record("CC", 70, timestamp=4.0)
+
+    assert len(history) == 2
+    assert history.get_samples("BB") == []
+    assert history.get_samples("AA") == [(1.0, 50), (3.0, 55)]
+
+
+def test_stats():
+    history = SignalHistory()
+    for strength in (40, 50, 60):
+        history.record("AA", strength, timestamp=0.0)
+
+    stats = history.stats("AA")
+
+    assert (stats.count, stats.minimum, stats.average, stats.maximum) == (
+        3,
+        40,
+        50,
+        60,
+    )
+    assert abs(stats.variance - 200 / 3) < 1e-9
+    assert history.stats("unknown").count == 0
+
+
+def test_empty_bssid_is_ignored():
+    history = SignalHistory()
+    history.record("", 50)
+
+    assert len(history) == 0
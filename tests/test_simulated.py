@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("gi")
+
+from src.utils.backends.simulated import (  # noqa: E402
+    SimulatedClient,
+    SimulatedConfig,
+)
+
+
+def access_points(client):
+    return sorted(
+        (ap.get_bssid(), ap.get_strength())
+        for dev in client.get_devices()
+        for ap in dev.get_access_points()
+    )
+
+
+def test_same_seed_same_world():
+    config = SimulatedConfig(access_points=40, seed=7)
+    first, second = SimulatedClient(config), SimulatedClient(config)
+
+    assert access_points(first) == access_points(second)
+
+    for _ in range(5):
+        first.step()
+        second.step()
+    assert access_points(first) == access_points(second)
+
+
+def test_other_seed_other_world():
+    first = SimulatedClient(SimulatedConfig(access_points=40, seed=1))
+    second = SimulatedClient(SimulatedConfig(access_points=40, seed=2))
+
+    assert access_points(first) != access_points(second)
+
+
+def bssids(client):
+    return {bssid for bssid, _strength in access_points(client)}
+
+
+def test_churn_replaces_access_points():
+    client = SimulatedClient(SimulatedConfig(access_points=40, churn=0.25))
+    before = bssids(client)
+
+    client.step()
+
+    assert bssids(client) != before
+
+
+def test_no_churn_keeps_access_points():
+    client = SimulatedClient(SimulatedConfig(access_points=40, churn=0, drift=0))
+    before = bssids(client)
+
+    for _ in range(5):
+        client.step()
+
+    assert bssids(client) == before
+
+
+def test_saved_connections():
+    client = SimulatedClient(SimulatedConfig(saved_connections=3))
+
+    assert len(client.get_connections()) == 3
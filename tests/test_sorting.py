@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from src.utils.sorting import (
+    SORT_KEYS,
+    SORT_NAME,
+    SORT_STRENGTH,
+    STRENGTH_HYSTERESIS,
+    NetworkSortInfo,
+    SortedNetworks,
+    _sort_key,
+)
+
+SECURITIES = ("WPA2", "WPA", "WEP", "Open", "")
+FREQUENCIES = (0, 2412, 5180, 5975)
+
+
+def random_info(rng):
+    return NetworkSortInfo(
+        rng.randrange(101),
+        rng.choice(SECURITIES),
+        rng.choice(FREQUENCIES),
+        1_700_000_000 + rng.randrange(100),
+        rng.random() < 0.3,
+        rng.random() < 0.05,
+    )
+
+
+def expected_order(networks):
+    """Sort every network from scratch on what it is sorted on"""
+    return sorted(
+        networks.names(),
+        key=lambda name: _sort_key(networks.sort_key, name, networks.get_info(name)),
+    )
+
+
+@pytest.mark.parametrize("sort_key", SORT_KEYS)
+@pytest.mark.parametrize("seed", range(20))
+def test_updates_keep_the_list_sorted(sort_key, seed):
+    rng = random.Random(seed)
+    networks = SortedNetworks(sort_key)
+    names = [f"Net-{n}" for n in range(40)]
+
+    for _ in range(300):
+        name = rng.choice(names)
+        if rng.random() < 0.1:
+            networks.remove(name)
+        else:
+            networks.update(name, random_info(rng))
+
+        assert networks.names() == expected_order(networks)
+        for position, listed in enumerate(networks):
+            assert networks.index(listed) == position
+
+
+def test_active_network_comes_first():
+    networks = SortedNetworks(SORT_NAME)
+    networks.update("alpha", NetworkSortInfo(90, "WPA2", 2412, 0, False, False))
+    networks.update("zulu", NetworkSortInfo(10, "Open", 2412, 0, False, True))
+
+    assert networks.names() == ["zulu", "alpha"]
+
+
+def test_small_strength_changes_do_not_move_a_network():
+    networks = SortedNetworks(SORT_STRENGTH)
+    networks.update("a", NetworkSortInfo(60, "WPA2", 2412, 0, False, False))
+    networks.update("b", NetworkSortInfo(58, "WPA2", 2412, 0, False, False))
+
+    changed = networks.update(
+        "b",
+        NetworkSortInfo(60 + STRENGTH_HYSTERESIS - 3, "WPA2", 2412, 0, False, False),
+    )
+
+    assert changed is False
+    assert networks.names() == ["a", "b"]
+    assert networks.get_info("b").strength == 58
+
+
+def test_large_strength_changes_move_a_network():
+    networks = SortedNetworks(SORT_STRENGTH)
+    networks.update("a", NetworkSortInfo(60, "WPA2", 2412, 0, False, False))
+    networks.update("b", NetworkSortInfo(58, "WPA2", 2412, 0, False, False))
+
+    changed = networks.update(
+        "b", NetworkSortInfo(58 + STRENGTH_HYSTERESIS, "WPA2", 2412, 0, False, False)
+    )
+
+    assert changed is True
+    assert networks.names() == ["b", "a"]
+
+
+def test_set_sort_key_resorts():
+    rng = random.Random(1)
+    networks = SortedNetworks(SORT_STRENGTH)
+    for n in range(50):
+        networks.update(f"Net-{n}", random_info(rng))
+
+    for sort_key in SORT_KEYS:
+        networks.set_sort_key(sort_key)
+        assert networks.names() == expected_order(networks)
+
+
+def test_unknown_sort_key_is_rejected():
+    with pytest.raises(ValueError):
+        SortedNetworks("colour")
+    with pytest.raises(ValueError):
+        SortedNetworks().set_sort_key("colour")